@@ -0,0 +1,123 @@
+import asyncio
+import os
+import aiomysql
+from pymysql.constants import CLIENT
+from app.database import SESSION_TIME_ZONE, Database, PoolTimeoutError
+
+class AsyncConnectionPool:
+    """Pool asíncrono (aiomysql) para el modo DB_MODE=async.
+
+    aiomysql cierra las conexiones que se devuelven con una transacción
+    abierta, así que se hace rollback antes de liberarlas.
+    """
+
+    def __init__(self, db=None, min_size=2, max_size=50, acquire_timeout=5.0,
+                 idle_timeout=300.0):
+        self.db = db or Database()
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self._pool = None
+        self._waiters = 0
+        self._stats = {
+            "acquired": 0,
+            "timeouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    async def open(self):
+        if self._pool is None:
+            self._pool = await aiomysql.create_pool(
+                host=self.db.host,
+                port=int(self.db.port),
+                user=self.db.user,
+                password=self.db.password,
+                db=self.db.database,
+                minsize=self.min_size,
+                maxsize=self.max_size,
+                pool_recycle=int(self.idle_timeout),
+                autocommit=False,
+                init_command=f"SET time_zone = '{SESSION_TIME_ZONE}'",
+                client_flag=CLIENT.FOUND_ROWS
+            )
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    async def acquire(self, timeout=None):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        self._waiters += 1
+        try:
+            conn = await asyncio.wait_for(
+                self._pool.acquire(),
+                self.acquire_timeout if timeout is None else timeout
+            )
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise PoolTimeoutError(msg="Timed out waiting for a database connection")
+        finally:
+            self._waiters -= 1
+        waited = loop.time() - start
+        self._stats["acquired"] += 1
+        self._stats["wait_time_total"] += waited
+        self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+        return conn
+
+    async def release(self, conn):
+        try:
+            if conn.get_transaction_status():
+                await conn.rollback()
+        except Exception:
+            conn.close()
+        self._pool.release(conn)
+
+    def stats(self):
+        size = self._pool.size if self._pool else 0
+        idle = self._pool.freesize if self._pool else 0
+        acquired = self._stats["acquired"]
+        return {
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "waiters": self._waiters,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            **self._stats,
+            "wait_time_avg": self._stats["wait_time_total"] / acquired if acquired else 0.0,
+        }
+
+
+_async_pool = None
+
+def get_async_pool():
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = AsyncConnectionPool(
+            min_size=int(os.getenv('DB_POOL_MIN', '2')),
+            max_size=int(os.getenv('DB_ASYNC_POOL_MAX', '50')),
+            acquire_timeout=float(os.getenv('DB_POOL_TIMEOUT', '5')),
+            idle_timeout=float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300')),
+        )
+    return _async_pool
+
+def _reset_after_fork():
+    # El pool de aiomysql pertenece al event loop del padre: el hijo abre el suyo
+    global _async_pool
+    _async_pool = None
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+# Dependency
+async def get_async_db():
+    pool = get_async_pool()
+    connection = await pool.acquire()
+    try:
+        yield connection
+    finally:
+        await pool.release(connection)
@@ -0,0 +1,157 @@
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+class MemoryBackend:
+    """LRU + TTL en memoria del proceso, acotado por número de entradas.
+
+    Es el backend por defecto y también el reemplazo local del backend
+    compartido en pruebas: expone la misma interfaz que RedisBackend.
+    """
+
+    blocking = False
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # key -> (value, expira)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def size(self):
+        return len(self._data)
+
+
+class RedisBackend:
+    """Backend compartido entre workers/instancias (requiere el paquete redis)."""
+
+    blocking = True
+
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self.evictions = 0
+
+    def get(self, key):
+        raw = self._client.get(key)
+        return None if raw is None else pickle.loads(raw)
+
+    def set(self, key, value, ttl):
+        self._client.set(key, pickle.dumps(value), px=int(ttl * 1000))
+
+    def delete(self, key):
+        self._client.delete(key)
+
+    def clear(self):
+        # Solo las claves de esta API, no toda la base de Redis
+        for key in self._client.scan_iter("maki:*"):
+            self._client.delete(key)
+
+    def size(self):
+        return None
+
+
+class ReadCache:
+    """Caché de lectura por clave con métricas de aciertos/fallos."""
+
+    def __init__(self, namespace, backend, ttl):
+        self.namespace = namespace
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _key(self, key):
+        return f"maki:{self.namespace}:{key}"
+
+    def get(self, key):
+        value = self.backend.get(self._key(key))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(self._key(key), value, self.ttl)
+
+    def invalidate(self, key):
+        self.invalidations += 1
+        self.backend.delete(self._key(key))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "ttl": self.ttl,
+        }
+
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory').lower()
+CACHE_TTL = float(os.getenv('CACHE_TTL', '300'))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+
+_backend = None
+_caches = {}
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        if CACHE_BACKEND == "redis":
+            _backend = RedisBackend(os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0'))
+        else:
+            _backend = MemoryBackend(CACHE_MAX_ENTRIES)
+    return _backend
+
+def get_cache(namespace, ttl=None):
+    if namespace not in _caches:
+        _caches[namespace] = ReadCache(namespace, get_backend(), CACHE_TTL if ttl is None else ttl)
+    return _caches[namespace]
+
+def get_local_cache(namespace, ttl, max_entries):
+    """Caché siempre en memoria (para llamadas desde código que no puede bloquear)."""
+    if namespace not in _caches:
+        _caches[namespace] = ReadCache(namespace, MemoryBackend(max_entries), ttl)
+    return _caches[namespace]
+
+def cache_stats():
+    backend = get_backend()
+    return {
+        "backend": CACHE_BACKEND,
+        "entries": backend.size(),
+        "evictions": backend.evictions,
+        "caches": {name: {**cache.stats(), "entries": cache.backend.size()}
+                   for name, cache in _caches.items()},
+    }
@@ -0,0 +1,160 @@
+import aiomysql
+from enum import Enum
+from pymysql import MySQLError
+from app.models.models import ORDER_QUERIES
+from app.models.schemas import OrderStatus
+from app.crud.orders import OrderCRUD, batch_created, batch_errors
+from app.crud.lookups import get_name, store_name, now, money, blank_to_none
+
+def _value(v):
+    # PyMySQL escapa los Enum con str(), que en 3.11 incluye el nombre de la clase
+    return v.value if isinstance(v, Enum) else v
+
+class AsyncOrderCRUD:
+    @staticmethod
+    async def create_order(conn, order):
+        names = await AsyncOrderCRUD.get_names(conn, order.user_id, order.product_id)
+        if names is None:
+            return None
+
+        order_date = now()
+        total_price = money(order.total_price)
+        try:
+            async with conn.cursor() as cursor:
+                await cursor.execute(ORDER_QUERIES["create"],
+                                     (order.user_id, order.product_id, _value(order.status),
+                                      total_price, _value(order.payment_method), order_date))
+                await conn.commit()
+                new_order_id = cursor.lastrowid
+        except MySQLError as e:
+            await conn.rollback()
+            raise e
+
+        return {
+            **order.model_dump(),
+            'total_price': total_price,
+            'id': new_order_id,
+            'order_date': order_date,
+            'user_name': names[0],
+            'product_name': names[1]
+        }
+
+    @staticmethod
+    async def create_orders_batch(conn, orders, chunk_size: int = 500, atomic: bool = False):
+        async with conn.cursor() as cursor:
+            users_query, products_query = OrderCRUD.reference_queries(orders)
+            await cursor.execute(*users_query)
+            users = {row[0] for row in await cursor.fetchall()}
+            await cursor.execute(*products_query)
+            products = {row[0] for row in await cursor.fetchall()}
+
+            valid, results = OrderCRUD.split_missing(orders, users, products)
+            if atomic and results:
+                return results + batch_errors(valid, "Batch rejected")
+
+            order_date = now()
+            created = []
+            for start in range(0, len(valid), chunk_size):
+                chunk = valid[start:start + chunk_size]
+                try:
+                    await cursor.executemany(ORDER_QUERIES["create"], OrderCRUD.batch_rows(chunk, order_date))
+                    created.extend(batch_created(chunk, cursor.lastrowid))
+                    if not atomic:
+                        await conn.commit()
+                except MySQLError as e:
+                    await conn.rollback()
+                    if atomic:
+                        return batch_errors(valid, f"Batch rolled back: {e.args[-1]}")
+                    created.extend(await AsyncOrderCRUD._insert_each(conn, cursor, chunk, order_date))
+            if atomic:
+                await conn.commit()
+            return results + created
+
+    @staticmethod
+    async def _insert_each(conn, cursor, chunk, order_date):
+        results = []
+        for (index, order), row in zip(chunk, OrderCRUD.batch_rows(chunk, order_date)):
+            try:
+                await cursor.execute(ORDER_QUERIES["create"], row)
+                await conn.commit()
+                results.append({"index": index, "status": "created", "id": cursor.lastrowid})
+            except MySQLError as e:
+                await conn.rollback()
+                results.append({"index": index, "status": "error", "error": str(e.args[-1])})
+        return results
+
+    @staticmethod
+    async def get_names(conn, user_id: int, product_id: int):
+        user_name = get_name("users", user_id)
+        product_name = get_name("products", product_id)
+        if user_name is None or product_name is None:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(ORDER_QUERIES["get_names"], (user_id, product_id))
+                row = await cursor.fetchone()
+            if row['user_name'] is None or row['product_name'] is None:
+                return None
+            user_name, product_name = row['user_name'], row['product_name']
+            store_name("users", user_id, user_name)
+            store_name("products", product_id, product_name)
+        return user_name, product_name
+
+    @staticmethod
+    async def get_orders(conn):
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(ORDER_QUERIES["get_all"])
+            return await cursor.fetchall()
+
+    @staticmethod
+    async def get_orders_page(conn, after_id: int, limit: int, status: OrderStatus = None, user_id: str = None):
+        query, params = OrderCRUD.page_query(after_id, limit, status, user_id)
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(query, params)
+            return await cursor.fetchall()
+
+    @staticmethod
+    async def get_order_by_id(conn, order_id: str):
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(ORDER_QUERIES["get_by_id"], (order_id,))
+            return await cursor.fetchone()
+
+    @staticmethod
+    async def get_orders_by_user(conn, user_id: str):
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(ORDER_QUERIES["get_by_user"], (user_id,))
+            return await cursor.fetchall()
+
+    @staticmethod
+    async def get_orders_by_status(conn, status: OrderStatus):
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(ORDER_QUERIES["get_by_status"], (_value(status),))
+            return await cursor.fetchall()
+
+    @staticmethod
+    async def update_order(conn, order_id: str, order):
+        try:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(ORDER_QUERIES["update"],
+                                     (blank_to_none(_value(order.status)), blank_to_none(order.total_price),
+                                      blank_to_none(_value(order.payment_method)), order_id))
+                if cursor.rowcount == 0:
+                    await conn.rollback()
+                    return None
+
+                await cursor.execute(ORDER_QUERIES["get_by_id"], (order_id,))
+                result = await cursor.fetchone()
+                await conn.commit()
+                return result
+        except MySQLError as e:
+            await conn.rollback()
+            raise e
+
+    @staticmethod
+    async def delete_order(conn, order_id: str):
+        try:
+            async with conn.cursor() as cursor:
+                await cursor.execute(ORDER_QUERIES["delete"], (order_id,))
+                await conn.commit()
+                return cursor.rowcount > 0
+        except MySQLError as e:
+            await conn.rollback()
+            raise e
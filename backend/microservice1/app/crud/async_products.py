@@ -0,0 +1,72 @@
+import aiomysql
+from pymysql import MySQLError
+from app.models.models import PRODUCT_QUERIES
+from app.crud.lookups import invalidate_name, now, money, blank_to_none
+
+class AsyncProductCRUD:
+    @staticmethod
+    async def create_product(conn, product):
+        created_at = now()
+        price = money(product.price)
+        try:
+            async with conn.cursor() as cursor:
+                await cursor.execute(PRODUCT_QUERIES["create"],
+                                     (product.name, price, product.calories, created_at))
+                await conn.commit()
+                new_product_id = cursor.lastrowid
+        except MySQLError as e:
+            await conn.rollback()
+            raise e
+
+        return {**product.model_dump(), 'price': price, 'id': new_product_id, 'created_at': created_at}
+
+    @staticmethod
+    async def get_products(conn):
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(PRODUCT_QUERIES["get_all"])
+            return await cursor.fetchall()
+
+    @staticmethod
+    async def get_products_page(conn, after_id: int, limit: int):
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(PRODUCT_QUERIES["get_page"], (after_id, limit))
+            return await cursor.fetchall()
+
+    @staticmethod
+    async def get_product_by_id(conn, product_id: str):
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(PRODUCT_QUERIES["get_by_id"], (product_id,))
+            return await cursor.fetchone()
+
+    @staticmethod
+    async def update_product(conn, product_id: str, product):
+        try:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(PRODUCT_QUERIES["update"],
+                                     (blank_to_none(product.name), blank_to_none(product.price),
+                                      blank_to_none(product.calories), product_id))
+                if cursor.rowcount == 0:
+                    await conn.rollback()
+                    return None
+
+                await cursor.execute(PRODUCT_QUERIES["get_by_id"], (product_id,))
+                result = await cursor.fetchone()
+                await conn.commit()
+            invalidate_name("products", product_id)
+            return result
+        except MySQLError as e:
+            await conn.rollback()
+            raise e
+
+    @staticmethod
+    async def delete_product(conn, product_id: str):
+        try:
+            async with conn.cursor() as cursor:
+                await cursor.execute(PRODUCT_QUERIES["delete"], (product_id,))
+                await conn.commit()
+                deleted = cursor.rowcount > 0
+            invalidate_name("products", product_id)
+            return deleted
+        except MySQLError as e:
+            await conn.rollback()
+            raise e
@@ -0,0 +1,80 @@
+import aiomysql
+from pymysql import MySQLError
+from app.models.models import USER_QUERIES
+from app.models.schemas import UserCreate, UserUpdate
+from app.crud.lookups import invalidate_name, now, blank_to_none
+
+class AsyncUserCRUD:
+    @staticmethod
+    async def create_user(conn, user: UserCreate):
+        created_at = now()
+        try:
+            async with conn.cursor() as cursor:
+                await cursor.execute(USER_QUERIES["create"],
+                                     (user.name, user.email, user.phone_number, user.address, created_at))
+                await conn.commit()
+                new_user_id = cursor.lastrowid
+        except MySQLError as e:
+            await conn.rollback()
+            raise e
+
+        return {**user.model_dump(), 'id': new_user_id, 'created_at': created_at}
+
+    @staticmethod
+    async def get_users(conn):
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(USER_QUERIES["get_all"])
+            return await cursor.fetchall()
+
+    @staticmethod
+    async def get_users_page(conn, after_id: int, limit: int):
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(USER_QUERIES["get_page"], (after_id, limit))
+            return await cursor.fetchall()
+
+    @staticmethod
+    async def get_user_by_id(conn, user_id: str):
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(USER_QUERIES["get_by_id"], (user_id,))
+            return await cursor.fetchone()
+
+    @staticmethod
+    async def get_user_by_email(conn, email: str):
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(USER_QUERIES["get_by_email"], (email,))
+            return await cursor.fetchone()
+
+    @staticmethod
+    async def update_user(conn, user_id: str, user: UserUpdate):
+        try:
+            # Un solo UPDATE: los campos no enviados conservan su valor (COALESCE)
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(USER_QUERIES["update"],
+                                     (blank_to_none(user.name), blank_to_none(user.email),
+                                      blank_to_none(user.phone_number), blank_to_none(user.address),
+                                      user_id))
+                if cursor.rowcount == 0:
+                    await conn.rollback()
+                    return None
+
+                await cursor.execute(USER_QUERIES["get_by_id"], (user_id,))
+                result = await cursor.fetchone()
+                await conn.commit()
+            invalidate_name("users", user_id)
+            return result
+        except MySQLError as e:
+            await conn.rollback()
+            raise e
+
+    @staticmethod
+    async def delete_user(conn, user_id: str):
+        try:
+            async with conn.cursor() as cursor:
+                await cursor.execute(USER_QUERIES["delete"], (user_id,))
+                await conn.commit()
+                deleted = cursor.rowcount > 0
+            invalidate_name("users", user_id)
+            return deleted
+        except MySQLError as e:
+            await conn.rollback()
+            raise e
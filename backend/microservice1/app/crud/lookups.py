@@ -0,0 +1,43 @@
+import os
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from app.cache import get_local_cache
+
+# Caché de nombres para armar las respuestas de pedidos sin el JOIN.
+# Siempre local: se consulta desde el CRUD, también dentro del event loop.
+_names = get_local_cache(
+    "names",
+    ttl=float(os.getenv('NAME_CACHE_TTL', '60')),
+    max_entries=int(os.getenv('NAME_CACHE_MAX', '10000'))
+)
+
+
+def get_name(table: str, row_id: int):
+    return _names.get(f"{table}:{row_id}")
+
+
+def store_name(table: str, row_id: int, name: str):
+    _names.set(f"{table}:{row_id}", name)
+
+
+def invalidate_name(table: str, row_id):
+    _names.invalidate(f"{table}:{row_id}")
+
+
+def now():
+    # UTC, igual que la zona de sesión de las conexiones (SESSION_TIME_ZONE).
+    # Las columnas TIMESTAMP guardan segundos; así la respuesta coincide con lo persistido
+    return datetime.utcnow().replace(microsecond=0)
+
+
+def money(value):
+    # price y total_price son DECIMAL(_,2): MySQL redondea al insertar; así la
+    # respuesta (y lo que se cachea) coincide con lo persistido
+    if value is None:
+        return None
+    return Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def blank_to_none(value):
+    # Mantiene la semántica previa de `valor or actual`: los valores vacíos no actualizan
+    return value or None
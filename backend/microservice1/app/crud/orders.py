@@ -1,30 +1,145 @@
 from mysql.connector import Error
 from app.models.models import ORDER_QUERIES
 from app.models.schemas import OrderStatus
+from app.crud.lookups import get_name, store_name, now, money, blank_to_none
+
+def batch_created(chunk, first_id):
+    # Un INSERT multi-fila ("simple insert") recibe ids consecutivos de InnoDB
+    # a partir de lastrowid (asume auto_increment_increment = 1)
+    return [{"index": index, "status": "created", "id": first_id + offset}
+            for offset, (index, _) in enumerate(chunk)]
+
+def batch_errors(chunk, message):
+    return [{"index": index, "status": "error", "error": message} for index, _ in chunk]
 
 class OrderCRUD:
     @staticmethod
     def create_order(conn, order):
+        names = OrderCRUD.get_names(conn, order.user_id, order.product_id)
+        if names is None:
+            return None
+
+        order_date = now()
+        total_price = money(order.total_price)
         try:
-            cursor = conn.cursor(dictionary=True)
+            cursor = conn.cursor()
             cursor.execute(ORDER_QUERIES["create"], 
                          (order.user_id, order.product_id, order.status, 
-                          order.total_price, order.payment_method))
+                          total_price, order.payment_method, order_date))
             conn.commit()
-            
-            # Obtener el pedido creado con detalles
-            cursor.execute("SELECT id FROM orders WHERE user_id = %s ORDER BY order_date DESC LIMIT 1", 
-                         (order.user_id,))
-            new_order_id = cursor.fetchone()['id']
-            
-            cursor.execute(ORDER_QUERIES["get_by_id"], (new_order_id,))
-            result = cursor.fetchone()
+            new_order_id = cursor.lastrowid
             cursor.close()
-            return result
         except Error as e:
             conn.rollback()
             raise e
 
+        # Respuesta armada con los valores conocidos, sin releer el pedido
+        return {
+            **order.model_dump(),
+            'total_price': total_price,
+            'id': new_order_id,
+            'order_date': order_date,
+            'user_name': names[0],
+            'product_name': names[1]
+        }
+
+    @staticmethod
+    def create_orders_batch(conn, orders, chunk_size: int = 500, atomic: bool = False):
+        """Inserta `orders` (lista de (índice, OrderCreate)) por lotes multi-fila.
+
+        atomic=True: una sola transacción, si algo falla no se escribe nada.
+        atomic=False: commit por lote; si un lote falla se reintenta fila por
+        fila para reportar el error de cada ítem.
+        """
+        cursor = conn.cursor()
+        try:
+            users_query, products_query = OrderCRUD.reference_queries(orders)
+            cursor.execute(*users_query)
+            users = {row[0] for row in cursor.fetchall()}
+            cursor.execute(*products_query)
+            products = {row[0] for row in cursor.fetchall()}
+
+            valid, results = OrderCRUD.split_missing(orders, users, products)
+            if atomic and results:
+                return results + batch_errors(valid, "Batch rejected")
+
+            order_date = now()
+            created = []
+            for start in range(0, len(valid), chunk_size):
+                chunk = valid[start:start + chunk_size]
+                try:
+                    cursor.executemany(ORDER_QUERIES["create"], OrderCRUD.batch_rows(chunk, order_date))
+                    created.extend(batch_created(chunk, cursor.lastrowid))
+                    if not atomic:
+                        conn.commit()
+                except Error as e:
+                    conn.rollback()
+                    if atomic:
+                        return batch_errors(valid, f"Batch rolled back: {e.msg}")
+                    created.extend(OrderCRUD._insert_each(conn, cursor, chunk, order_date))
+            if atomic:
+                conn.commit()
+            return results + created
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _insert_each(conn, cursor, chunk, order_date):
+        results = []
+        for (index, order), row in zip(chunk, OrderCRUD.batch_rows(chunk, order_date)):
+            try:
+                cursor.execute(ORDER_QUERIES["create"], row)
+                conn.commit()
+                results.append({"index": index, "status": "created", "id": cursor.lastrowid})
+            except Error as e:
+                conn.rollback()
+                results.append({"index": index, "status": "error", "error": e.msg})
+        return results
+
+    @staticmethod
+    def reference_queries(orders):
+        """Consultas para validar en una pasada que existan usuarios y productos."""
+        user_ids = sorted({order.user_id for _, order in orders})
+        product_ids = sorted({order.product_id for _, order in orders})
+        return (
+            (ORDER_QUERIES["existing_users"].format(ids=", ".join(["%s"] * len(user_ids))), user_ids),
+            (ORDER_QUERIES["existing_products"].format(ids=", ".join(["%s"] * len(product_ids))), product_ids),
+        )
+
+    @staticmethod
+    def split_missing(orders, users, products):
+        valid, errors = [], []
+        for index, order in orders:
+            if order.user_id not in users:
+                errors.append({"index": index, "status": "error", "error": "User not found"})
+            elif order.product_id not in products:
+                errors.append({"index": index, "status": "error", "error": "Product not found"})
+            else:
+                valid.append((index, order))
+        return valid, errors
+
+    @staticmethod
+    def batch_rows(chunk, order_date):
+        return [(order.user_id, order.product_id, order.status.value, order.total_price,
+                 order.payment_method.value, order_date) for _, order in chunk]
+
+    @staticmethod
+    def get_names(conn, user_id: int, product_id: int):
+        """(user_name, product_name) desde el caché o en una sola consulta."""
+        user_name = get_name("users", user_id)
+        product_name = get_name("products", product_id)
+        if user_name is None or product_name is None:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(ORDER_QUERIES["get_names"], (user_id, product_id))
+            row = cursor.fetchone()
+            cursor.close()
+            if row['user_name'] is None or row['product_name'] is None:
+                return None
+            user_name, product_name = row['user_name'], row['product_name']
+            store_name("users", user_id, user_name)
+            store_name("products", product_id, product_name)
+        return user_name, product_name
+
     @staticmethod
     def get_orders(conn):
         try:
@@ -36,6 +151,34 @@ class OrderCRUD:
         except Error as e:
             raise e
 
+    @staticmethod
+    def get_orders_page(conn, after_id: int, limit: int, status: OrderStatus = None, user_id: str = None):
+        query, params = OrderCRUD.page_query(after_id, limit, status, user_id)
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(query, params)
+            results = cursor.fetchall()
+            cursor.close()
+            return results
+        except Error as e:
+            raise e
+
+    @staticmethod
+    def page_query(after_id: int, limit: int, status: OrderStatus = None, user_id: str = None):
+        if status:
+            return ORDER_QUERIES["get_page_by_status"], (status.value, after_id, limit)
+        if user_id:
+            return ORDER_QUERIES["get_page_by_user"], (user_id, after_id, limit)
+        return ORDER_QUERIES["get_page"], (after_id, limit)
+
+    @staticmethod
+    def list_query(status: OrderStatus = None, user_id: str = None):
+        if status:
+            return ORDER_QUERIES["get_by_status"], (status.value,)
+        if user_id:
+            return ORDER_QUERIES["get_by_user"], (user_id,)
+        return ORDER_QUERIES["get_all"], ()
+
     @staticmethod
     def get_order_by_id(conn, order_id: str):
         try:
@@ -72,24 +215,18 @@ class OrderCRUD:
     @staticmethod
     def update_order(conn, order_id: str, order):
         try:
-            current_order = OrderCRUD.get_order_by_id(conn, order_id)
-            if not current_order:
-                return None
-
-            update_data = {
-                'status': order.status or current_order['status'],
-                'total_price': order.total_price or current_order['total_price'],
-                'payment_method': order.payment_method or current_order['payment_method']
-            }
-
             cursor = conn.cursor(dictionary=True)
             cursor.execute(ORDER_QUERIES["update"], 
-                         (update_data['status'], update_data['total_price'], 
-                          update_data['payment_method'], order_id))
-            conn.commit()
-            
+                         (blank_to_none(order.status), blank_to_none(order.total_price), 
+                          blank_to_none(order.payment_method), order_id))
+            if cursor.rowcount == 0:
+                conn.rollback()
+                cursor.close()
+                return None
+
             cursor.execute(ORDER_QUERIES["get_by_id"], (order_id,))
             result = cursor.fetchone()
+            conn.commit()
             cursor.close()
             return result
         except Error as e:
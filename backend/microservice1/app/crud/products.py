@@ -1,24 +1,25 @@
 from mysql.connector import Error
 from app.models.models import PRODUCT_QUERIES
+from app.crud.lookups import invalidate_name, now, money, blank_to_none
 
 class ProductCRUD:
     @staticmethod
     def create_product(conn, product):
+        created_at = now()
+        price = money(product.price)
         try:
-            cursor = conn.cursor(dictionary=True)
+            cursor = conn.cursor()
             cursor.execute(PRODUCT_QUERIES["create"], 
-                         (product.name, product.price, product.calories))
+                         (product.name, price, product.calories, created_at))
             conn.commit()
-            
-            # Obtener el producto creado (por nombre)
-            cursor.execute("SELECT * FROM products WHERE name = %s", (product.name,))
-            result = cursor.fetchone()
+            new_product_id = cursor.lastrowid
             cursor.close()
-            return result
         except Error as e:
             conn.rollback()
             raise e
 
+        return {**product.model_dump(), 'price': price, 'id': new_product_id, 'created_at': created_at}
+
     @staticmethod
     def get_products(conn):
         try:
@@ -30,6 +31,17 @@ class ProductCRUD:
         except Error as e:
             raise e
 
+    @staticmethod
+    def get_products_page(conn, after_id: int, limit: int):
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(PRODUCT_QUERIES["get_page"], (after_id, limit))
+            results = cursor.fetchall()
+            cursor.close()
+            return results
+        except Error as e:
+            raise e
+
     @staticmethod
     def get_product_by_id(conn, product_id: str):
         try:
@@ -44,25 +56,20 @@ class ProductCRUD:
     @staticmethod
     def update_product(conn, product_id: str, product):
         try:
-            current_product = ProductCRUD.get_product_by_id(conn, product_id)
-            if not current_product:
-                return None
-
-            update_data = {
-                'name': product.name or current_product['name'],
-                'price': product.price or current_product['price'],
-                'calories': product.calories or current_product['calories']
-            }
-
             cursor = conn.cursor(dictionary=True)
             cursor.execute(PRODUCT_QUERIES["update"], 
-                         (update_data['name'], update_data['price'], 
-                          update_data['calories'], product_id))
-            conn.commit()
-            
+                         (blank_to_none(product.name), blank_to_none(product.price), 
+                          blank_to_none(product.calories), product_id))
+            if cursor.rowcount == 0:
+                conn.rollback()
+                cursor.close()
+                return None
+
             cursor.execute(PRODUCT_QUERIES["get_by_id"], (product_id,))
             result = cursor.fetchone()
+            conn.commit()
             cursor.close()
+            invalidate_name("products", product_id)
             return result
         except Error as e:
             conn.rollback()
@@ -76,6 +83,7 @@ class ProductCRUD:
             conn.commit()
             affected_rows = cursor.rowcount
             cursor.close()
+            invalidate_name("products", product_id)
             return affected_rows > 0
         except Error as e:
             conn.rollback()
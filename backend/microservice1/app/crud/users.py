@@ -1,25 +1,25 @@
 from mysql.connector import Error
 from app.models.models import USER_QUERIES
 from app.models.schemas import User, UserCreate, UserUpdate
+from app.crud.lookups import invalidate_name, now, blank_to_none
 
 class UserCRUD:
     @staticmethod
     def create_user(conn, user: UserCreate):
+        created_at = now()
         try:
-            cursor = conn.cursor(dictionary=True)
+            cursor = conn.cursor()
             cursor.execute(USER_QUERIES["create"], 
-                         (user.name, user.email, user.phone_number, user.address))
+                         (user.name, user.email, user.phone_number, user.address, created_at))
             conn.commit()
-            
-            # Obtener el usuario creado
-            cursor.execute(USER_QUERIES["get_by_email"], (user.email,))
-            result = cursor.fetchone()
+            new_user_id = cursor.lastrowid
             cursor.close()
-            return result
         except Error as e:
             conn.rollback()
             raise e
 
+        return {**user.model_dump(), 'id': new_user_id, 'created_at': created_at}
+
     @staticmethod
     def get_users(conn):
         try:
@@ -31,6 +31,17 @@ class UserCRUD:
         except Error as e:
             raise e
 
+    @staticmethod
+    def get_users_page(conn, after_id: int, limit: int):
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(USER_QUERIES["get_page"], (after_id, limit))
+            results = cursor.fetchall()
+            cursor.close()
+            return results
+        except Error as e:
+            raise e
+
     @staticmethod
     def get_user_by_id(conn, user_id: str):
         try:
@@ -56,29 +67,22 @@ class UserCRUD:
     @staticmethod
     def update_user(conn, user_id: str, user: UserUpdate):
         try:
-            # Obtener usuario actual primero
-            current_user = UserCRUD.get_user_by_id(conn, user_id)
-            if not current_user:
-                return None
-
-            # Actualizar solo los campos proporcionados
-            update_data = {
-                'name': user.name or current_user['name'],
-                'email': user.email or current_user['email'],
-                'phone_number': user.phone_number or current_user['phone_number'],
-                'address': user.address or current_user['address']
-            }
-
+            # Un solo UPDATE: los campos no enviados conservan su valor (COALESCE)
             cursor = conn.cursor(dictionary=True)
             cursor.execute(USER_QUERIES["update"], 
-                         (update_data['name'], update_data['email'], 
-                          update_data['phone_number'], update_data['address'], 
+                         (blank_to_none(user.name), blank_to_none(user.email), 
+                          blank_to_none(user.phone_number), blank_to_none(user.address), 
                           user_id))
-            conn.commit()
-            
+            if cursor.rowcount == 0:
+                conn.rollback()
+                cursor.close()
+                return None
+
             cursor.execute(USER_QUERIES["get_by_id"], (user_id,))
             result = cursor.fetchone()
+            conn.commit()
             cursor.close()
+            invalidate_name("users", user_id)
             return result
         except Error as e:
             conn.rollback()
@@ -92,6 +96,7 @@ class UserCRUD:
             conn.commit()
             affected_rows = cursor.rowcount
             cursor.close()
+            invalidate_name("users", user_id)
             return affected_rows > 0
         except Error as e:
             conn.rollback()
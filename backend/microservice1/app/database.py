@@ -1,11 +1,19 @@
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.constants import ClientFlag
 import os
 from dotenv import load_dotenv
+import threading
 import time
+from collections import deque
 
 load_dotenv()
 
+# Zona de sesión de todas las conexiones: los TIMESTAMP que arma la app en UTC
+# (lookups.now) se guardan y se leen sin corrimiento, sea cual sea la zona
+# del servidor
+SESSION_TIME_ZONE = '+00:00'
+
 class Database:
     def __init__(self):
         self.host = os.getenv('DB_HOST', 'localhost')
@@ -15,18 +23,24 @@ class Database:
         self.database = os.getenv('DB_NAME', 'maki_orders')
         self.connection = None
 
+    def connect(self):
+        return mysql.connector.connect(
+            host=self.host,
+            port=int(self.port),
+            user=self.user,
+            password=self.password,
+            database=self.database,
+            auth_plugin='mysql_native_password',
+            time_zone=SESSION_TIME_ZONE,
+            # rowcount = filas encontradas (no solo cambiadas) para detectar 404 en los UPDATE
+            client_flags=[ClientFlag.FOUND_ROWS]
+        )
+
     def get_connection(self, retries=5, delay=5):
         for attempt in range(retries):
             try:
                 if self.connection is None or not self.connection.is_connected():
-                    self.connection = mysql.connector.connect(
-                        host=self.host,
-                        port=int(self.port),
-                        user=self.user,
-                        password=self.password,
-                        database=self.database,
-                        auth_plugin='mysql_native_password'
-                    )
+                    self.connection = self.connect()
                 return self.connection
             except Error as e:
                 if attempt < retries - 1:
@@ -40,11 +54,248 @@ class Database:
         if self.connection and self.connection.is_connected():
             self.connection.close()
 
+
+class PoolTimeoutError(Error):
+    """No se pudo obtener una conexión del pool dentro del tiempo límite."""
+
+
+class ConnectionPool:
+    """Pool de conexiones MySQL compartido por todo el proceso.
+
+    - Tamaño acotado entre `min_size` y `max_size`.
+    - Las conexiones que estuvieron ociosas más de `check_after` segundos se
+      validan con un ping al prestarse; si fallan se descartan y se abre otra.
+    - Las conexiones ociosas más de `idle_timeout` segundos se cierran mientras
+      el pool tenga más de `min_size`.
+    - Nunca se duerme ni se conecta con el lock tomado: los reintentos de
+      conexión usan backoff corto y respetan el `acquire_timeout`.
+    """
+
+    def __init__(self, db=None, min_size=2, max_size=10, acquire_timeout=5.0,
+                 idle_timeout=300.0, check_after=5.0, connect_retries=3,
+                 retry_delay=0.2):
+        self.db = db or Database()
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+        self.connect_retries = connect_retries
+        self.retry_delay = retry_delay
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conexion, último uso)
+        self._size = 0        # conexiones abiertas o abriéndose
+        self._in_use = 0
+        self._waiters = 0
+        self._closed = False
+        self._stats = {
+            "acquired": 0,
+            "created": 0,
+            "discarded": 0,
+            "evicted": 0,
+            "timeouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    # ---- API pública ----
+
+    def acquire(self, timeout=None):
+        start = time.monotonic()
+        deadline = start + (self.acquire_timeout if timeout is None else timeout)
+        while True:
+            to_close = []
+            try:
+                conn, last_used = self._reserve(deadline, to_close)
+            finally:
+                self._close_all(to_close)
+
+            if conn is None:
+                try:
+                    conn = self._connect(deadline)
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats["created"] += 1
+            elif time.monotonic() - last_used > self.check_after and not self._is_alive(conn):
+                self._discard(conn)
+                continue
+
+            with self._cond:
+                self._in_use += 1
+                waited = time.monotonic() - start
+                self._stats["acquired"] += 1
+                self._stats["wait_time_total"] += waited
+                self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+            return conn
+
+    def release(self, conn):
+        healthy = True
+        try:
+            # Terminar la transacción implícita para que la siguiente petición
+            # no lea un snapshot viejo (REPEATABLE READ)
+            # Con filas sin leer (stream cortado) el rollback falla y se descarta
+            if conn.in_transaction or conn.unread_result:
+                conn.rollback()
+        except Exception:
+            healthy = False
+
+        to_close = []
+        with self._cond:
+            self._in_use -= 1
+            if healthy and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._size -= 1
+                self._stats["discarded"] += 1
+                to_close.append(conn)
+            to_close.extend(self._evict_idle())
+            self._cond.notify()
+        self._close_all(to_close)
+
+    def warm(self):
+        """Abre conexiones hasta `min_size`. Los fallos no son fatales."""
+        conns = []
+        try:
+            while len(conns) < self.min_size:
+                conns.append(self.acquire())
+        except Error as e:
+            print(f"Pool warm-up incompleto: {e}")
+        for conn in conns:
+            self.release(conn)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            to_close = [conn for conn, _ in self._idle]
+            self._size -= len(to_close)
+            self._idle.clear()
+            self._cond.notify_all()
+        self._close_all(to_close)
+
+    def stats(self):
+        with self._cond:
+            acquired = self._stats["acquired"]
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiters": self._waiters,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                **self._stats,
+                "wait_time_avg": self._stats["wait_time_total"] / acquired if acquired else 0.0,
+            }
+
+    # ---- Internos ----
+
+    def _reserve(self, deadline, to_close):
+        """Toma una conexión ociosa o reserva un hueco para abrir una nueva."""
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError(msg="Connection pool is closed")
+                to_close.extend(self._evict_idle())
+                if self._idle:
+                    # LIFO: la más reciente es la que menos probablemente expiró
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(msg="Timed out waiting for a database connection")
+                self._waiters += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiters -= 1
+
+    def _evict_idle(self):
+        """Saca del pool las conexiones ociosas expiradas (con el lock tomado)."""
+        evicted = []
+        now = time.monotonic()
+        # Las más antiguas están al inicio del deque
+        while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._stats["evicted"] += 1
+            evicted.append(conn)
+        return evicted
+
+    def _connect(self, deadline):
+        delay = self.retry_delay
+        for attempt in range(self.connect_retries):
+            try:
+                return self.db.connect()
+            except Error as e:
+                remaining = deadline - time.monotonic()
+                if attempt == self.connect_retries - 1 or remaining <= delay:
+                    print(f"Error connecting to MySQL after {attempt + 1} attempts: {e}")
+                    raise
+                print(f"Attempt {attempt + 1} failed: {e}. Retrying in {delay:.2f} seconds...")
+                time.sleep(delay)
+                delay *= 2
+
+    def _is_alive(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        with self._cond:
+            self._size -= 1
+            self._stats["discarded"] += 1
+            self._cond.notify()
+        self._close_all([conn])
+
+    @staticmethod
+    def _close_all(conns):
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    min_size=int(os.getenv('DB_POOL_MIN', '2')),
+                    max_size=int(os.getenv('DB_POOL_MAX', '10')),
+                    acquire_timeout=float(os.getenv('DB_POOL_TIMEOUT', '5')),
+                    idle_timeout=float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300')),
+                    check_after=float(os.getenv('DB_POOL_CHECK_AFTER', '5')),
+                )
+    return _pool
+
+def _reset_after_fork():
+    # Un worker hijo no debe usar los sockets ni el lock del proceso padre:
+    # se olvidan (sin cerrarlos, el padre los sigue usando) y se crea un pool nuevo
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
 # Dependency
 def get_db():
-    db = Database()
+    pool = get_pool()
+    connection = pool.acquire()
     try:
-        connection = db.get_connection()
         yield connection
     finally:
-        db.close_connection()
\ No newline at end of file
+        pool.release(connection)
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import time
+from fastapi.concurrency import run_in_threadpool
+from app.session import DB_MODE, get_active_pool
+
+# Cada cuánto se hace ping a la base y cuánto puede tardar (acquire + ping)
+HEALTH_INTERVAL = float(os.getenv('HEALTH_INTERVAL', '5'))
+HEALTH_TIMEOUT = float(os.getenv('HEALTH_TIMEOUT', '1'))
+
+
+class HealthMonitor:
+    """Estado de la base refrescado en segundo plano con un ping por el pool.
+
+    Los probes leen el último resultado sin abrir conexiones. Si el último
+    chequeo es más viejo que 3 intervalos (loop trabado) se reporta no listo.
+    """
+
+    def __init__(self):
+        self.healthy = False
+        self.checked_at = None
+        self.latency_ms = None
+        self.error = "sin chequear"
+        self._task = None
+        self._pending = None
+
+    def _ping_sync(self):
+        pool = get_active_pool()
+        conn = pool.acquire(timeout=HEALTH_TIMEOUT)
+        try:
+            conn.ping(reconnect=False)
+        finally:
+            pool.release(conn)
+
+    async def _ping_async(self):
+        pool = get_active_pool()
+        conn = await pool.acquire(timeout=HEALTH_TIMEOUT)
+        try:
+            await conn.ping(reconnect=False)
+        except BaseException:
+            # Ping fallido o cancelado por el timeout: la conexión no se reutiliza
+            conn.close()
+            raise
+        finally:
+            await pool.release(conn)
+
+    async def check(self):
+        start = time.perf_counter()
+        try:
+            if DB_MODE == "async":
+                await asyncio.wait_for(self._ping_async(), HEALTH_TIMEOUT)
+            else:
+                # Un ping colgado sigue ocupando su hilo: no se lanza otro encima
+                if self._pending is None or self._pending.done():
+                    self._pending = asyncio.ensure_future(run_in_threadpool(self._ping_sync))
+                await asyncio.wait_for(asyncio.shield(self._pending), HEALTH_TIMEOUT)
+            self.healthy, self.error = True, None
+        except asyncio.TimeoutError:
+            self.healthy, self.error = False, f"ping sin respuesta en {HEALTH_TIMEOUT}s"
+        except Exception as e:
+            self.healthy, self.error = False, str(e)
+        self.latency_ms = round((time.perf_counter() - start) * 1000, 2)
+        self.checked_at = time.time()
+
+    async def _loop(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(HEALTH_INTERVAL)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def ready(self):
+        fresh = self.checked_at is not None and time.time() - self.checked_at < 3 * HEALTH_INTERVAL
+        return self.healthy and fresh
+
+    def status(self):
+        return {
+            "status": "healthy" if self.ready else "unhealthy",
+            "database": "connected" if self.ready else "disconnected",
+            "checked_at": self.checked_at,
+            "latency_ms": self.latency_ms,
+            "error": self.error,
+        }
+
+
+health = HealthMonitor()
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import math
+import os
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from app.cache import MemoryBackend
+
+# Cache-Control por prefijo de ruta (gana el prefijo más largo).
+# Se puede sobrescribir con HTTP_CACHE_POLICIES='{"/products": "public, max-age=60"}'
+DEFAULT_POLICIES = {
+    "/products": "public, max-age=30",
+    "/users": "private, no-cache",
+    "/orders": "private, no-cache",
+}
+
+_FIRST_SEEN_TTL = 24 * 3600
+
+# Metadatos del body que un 304 no lleva; el resto (Vary, CORS, ...) se copia
+# de la respuesta original (RFC 9110 §15.4.5)
+_ENTITY_HEADERS = {b"content-length", b"content-type", b"content-encoding", b"content-language",
+                   b"content-range", b"transfer-encoding"}
+
+
+def load_policies():
+    policies = dict(DEFAULT_POLICIES)
+    policies.update(json.loads(os.getenv('HTTP_CACHE_POLICIES', '{}')))
+    return policies
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match usa comparación débil: se ignora el prefijo W/
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ConditionalGetMiddleware:
+    """ETag fuerte + Last-Modified + 304 para los GET JSON de la API.
+
+    El ETag es un hash del body serializado. Como las tablas no tienen
+    columna de versión, Last-Modified es el momento en que este worker vio
+    por primera vez el ETag actual de la URL. Solo se anuncia cuando ese
+    ETag lleva al menos un segundo estable, para que la resolución de
+    segundos de las fechas HTTP nunca produzca un 304 incorrecto.
+    """
+
+    def __init__(self, app, policies=None, max_entries=10000):
+        self.app = app
+        self.policies = sorted((policies or load_policies()).items(),
+                               key=lambda item: len(item[0]), reverse=True)
+        self._first_seen = MemoryBackend(max_entries)  # url -> (etag, primera vez)
+
+    def _policy(self, path):
+        for prefix, policy in self.policies:
+            if path.startswith(prefix):
+                return policy
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return await self.app(scope, receive, send)
+        policy = self._policy(scope["path"])
+        if policy is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        chunks = []
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                headers = dict(message["headers"])
+                content_type = headers.get(b"content-type", b"")
+                if message["status"] != 200 or not content_type.startswith(b"application/json"):
+                    passthrough = True
+                    return await send(message)
+                start = message
+                return
+            if passthrough:
+                return await send(message)
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                await self._finish(scope, start, b"".join(chunks), policy, send)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _finish(self, scope, start, body, policy, send):
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        url = scope["path"] + "?" + scope.get("query_string", b"").decode()
+        now = time.time()
+        seen = self._first_seen.get(url)
+        if seen is None or seen[0] != etag:
+            seen = (etag, now)
+            self._first_seen.set(url, seen, _FIRST_SEEN_TTL)
+        # Segundo HTTP en el que este contenido ya existía con seguridad
+        last_modified = math.floor(seen[1]) + 1
+        stable = now >= seen[1] + 1
+
+        extra = [(b"etag", etag.encode()), (b"cache-control", policy.encode())]
+        if stable:
+            extra.append((b"last-modified", formatdate(last_modified, usegmt=True).encode()))
+
+        request_headers = dict(scope["headers"])
+        if_none_match = request_headers.get(b"if-none-match")
+        if_modified_since = request_headers.get(b"if-modified-since")
+        not_modified = False
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match.decode(), etag)
+        elif if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since.decode()).timestamp()
+                not_modified = last_modified <= since
+            except (TypeError, ValueError):
+                pass
+
+        headers = [(k, v) for k, v in start["headers"] if k.lower() not in (b"etag", b"cache-control")]
+        if not_modified:
+            headers = [(k, v) for k, v in headers if k.lower() not in _ENTITY_HEADERS]
+            await send({"type": "http.response.start", "status": 304, "headers": headers + extra})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send({**start, "headers": headers + extra})
+        await send({"type": "http.response.body", "body": body})
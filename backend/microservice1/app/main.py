@@ -1,13 +1,37 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from app.routes import users, products, orders
-from app.database import Database
+from app.database import PoolTimeoutError
+from app.session import DB_MODE, get_active_pool
+from app.cache import cache_stats
+from app.http_cache import ConditionalGetMiddleware
+from app.metrics import METRICS_ENABLED, MetricsMiddleware, render_metrics
+from app.health import health
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pool = get_active_pool()
+    if DB_MODE == "async":
+        await pool.open()
+    else:
+        await run_in_threadpool(pool.warm)
+    health.start()
+    yield
+    await health.stop()
+    if DB_MODE == "async":
+        await pool.close()
+    else:
+        pool.close()
 
 app = FastAPI(
     title="Maki Orders API",
     description="Microservicio para gestión de pedidos de Maki",
     version="1.0.0",
-    redirect_slashes=False
+    redirect_slashes=False,
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -17,29 +41,57 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],  # GET, POST, PUT, DELETE, etc.
     allow_headers=["*"],  # Todos los headers
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
+# ETag / Last-Modified / 304 para los GET de /products, /users y /orders
+app.add_middleware(ConditionalGetMiddleware)
+
+# Métricas Prometheus por ruta (el más externo, mide también los 304)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Incluir routers
 app.include_router(users.router)
 app.include_router(products.router)
 app.include_router(orders.router)
 
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database busy, try again later"},
+        headers={"Retry-After": "1"}
+    )
+
 @app.get("/")
 def read_root():
     return {"message": "Bienvenido a Maki Orders API"}
 
+@app.get("/health/live")
+def liveness():
+    """El proceso responde (no mira la base)"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
 @app.get("/health")
-def health_check():
-    try:
-        db = Database()
-        conn = db.get_connection()
-        if conn.is_connected():
-            return {"status": "healthy", "database": "connected"}
-    except Exception:
-        return {"status": "unhealthy", "database": "disconnected"}
-    finally:
-        if 'db' in locals():
-            db.close_connection()
+def readiness():
+    """Último ping a la base hecho en segundo plano; 503 si falló o quedó viejo"""
+    status = health.status()
+    return JSONResponse(status_code=200 if health.ready else 503, content=status)
+
+@app.get("/pool/stats")
+def pool_stats():
+    return {"mode": DB_MODE, **get_active_pool().stats()}
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    return cache_stats()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
 
 if __name__ == "__main__":
     import uvicorn
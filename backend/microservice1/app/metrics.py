@@ -0,0 +1,165 @@
+import os
+import time
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                               Histogram, generate_latest, multiprocess)
+from app.models.models import USER_QUERIES, PRODUCT_QUERIES, ORDER_QUERIES
+
+# Con varios workers, PROMETHEUS_MULTIPROC_DIR hace que cada proceso escriba sus
+# métricas en archivos mmap propios y /metrics los agrega al exportar
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+METRICS_ENABLED = os.getenv('METRICS', 'true').lower() in ('1', 'true', 'yes')
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUESTS = Counter('http_requests_total', 'Peticiones HTTP', ['method', 'route', 'status'])
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Latencia de las peticiones HTTP',
+                            ['method', 'route'], buckets=LATENCY_BUCKETS)
+IN_FLIGHT = Gauge('http_requests_in_flight', 'Peticiones en curso', multiprocess_mode='livesum')
+DB_QUERY_LATENCY = Histogram('db_query_duration_seconds', 'Duración de execute() por consulta',
+                             ['query'], buckets=LATENCY_BUCKETS)
+DB_ACQUIRE_LATENCY = Histogram('db_pool_acquire_seconds', 'Espera para obtener una conexión del pool',
+                               ['mode'], buckets=LATENCY_BUCKETS)
+DB_IN_USE = Gauge('db_connections_in_use', 'Conexiones prestadas por el pool', multiprocess_mode='livesum')
+
+
+def _query_names():
+    names, templates = {}, []
+    for set_name, queries in (('USER_QUERIES', USER_QUERIES), ('PRODUCT_QUERIES', PRODUCT_QUERIES),
+                              ('ORDER_QUERIES', ORDER_QUERIES)):
+        for key, query in queries.items():
+            name = f"{set_name}.{key}"
+            if '{ids}' in query:
+                templates.append((query.split('{ids}')[0], name))
+            else:
+                names[query] = name
+    return names, templates
+
+_QUERY_NAMES, _QUERY_TEMPLATES = _query_names()
+
+
+def query_name(query: str) -> str:
+    """Clave de models.py para el texto de una consulta ("other" si no es de ahí)."""
+    name = _QUERY_NAMES.get(query)
+    if name is not None:
+        return name
+    for prefix, name in _QUERY_TEMPLATES:
+        if query.startswith(prefix):
+            return name
+    return 'other'
+
+
+class _TimedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def execute(self, query, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(query, *args, **kwargs)
+        finally:
+            DB_QUERY_LATENCY.labels(query_name(query)).observe(time.perf_counter() - start)
+
+    def executemany(self, query, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, *args, **kwargs)
+        finally:
+            DB_QUERY_LATENCY.labels(query_name(query)).observe(time.perf_counter() - start)
+
+
+class TimedConnection:
+    """Conexión de mysql-connector cuyos cursores miden cada execute()."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return _TimedCursor(self._conn.cursor(*args, **kwargs))
+
+
+class _AsyncTimedCursor(_TimedCursor):
+    async def execute(self, query, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await self._cursor.execute(query, *args, **kwargs)
+        finally:
+            DB_QUERY_LATENCY.labels(query_name(query)).observe(time.perf_counter() - start)
+
+    async def executemany(self, query, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await self._cursor.executemany(query, *args, **kwargs)
+        finally:
+            DB_QUERY_LATENCY.labels(query_name(query)).observe(time.perf_counter() - start)
+
+
+class _AsyncCursorContext:
+    # aiomysql permite tanto `await conn.cursor()` como `async with conn.cursor()`
+    def __init__(self, context):
+        self._context = context
+
+    def __await__(self):
+        return self._wrap().__await__()
+
+    async def _wrap(self):
+        return _AsyncTimedCursor(await self._context)
+
+    async def __aenter__(self):
+        return _AsyncTimedCursor(await self._context.__aenter__())
+
+    async def __aexit__(self, *exc_info):
+        return await self._context.__aexit__(*exc_info)
+
+
+class AsyncTimedConnection(TimedConnection):
+    """Conexión de aiomysql cuyos cursores miden cada execute()."""
+
+    def cursor(self, *args, **kwargs):
+        return _AsyncCursorContext(self._conn.cursor(*args, **kwargs))
+
+
+class MetricsMiddleware:
+    """Contador y latencia por ruta (la plantilla, p.ej. /orders/{order_id}) y
+    gauge de peticiones en curso. La latencia llega hasta el último chunk."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            REQUESTS.labels(scope["method"], path, str(status)).inc()
+            REQUEST_LATENCY.labels(scope["method"], path).observe(time.perf_counter() - start)
+
+
+def render_metrics():
+    """(body, content type) en formato de exposición de Prometheus."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,43 @@
+import os
+import re
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "migrations")
+
+MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(255) PRIMARY KEY,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def pending_migrations(applied, directory=MIGRATIONS_DIR):
+    files = sorted(f for f in os.listdir(directory) if re.match(r"^\d+_.*\.sql$", f))
+    return [f for f in files if f not in applied]
+
+
+def split_statements(sql):
+    without_comments = re.sub(r"^\s*--.*$", "", sql, flags=re.MULTILINE)
+    return [stmt.strip() for stmt in without_comments.split(";") if stmt.strip()]
+
+
+def apply_migrations(conn, directory=MIGRATIONS_DIR):
+    """Aplica en orden los .sql de migrations/ que falten. Devuelve los aplicados."""
+    cursor = conn.cursor()
+    cursor.execute(MIGRATIONS_TABLE)
+    cursor.execute("SELECT version FROM schema_migrations")
+    applied = {row[0] for row in cursor.fetchall()}
+
+    done = []
+    for name in pending_migrations(applied, directory):
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            statements = split_statements(f.read())
+        # DDL en MySQL hace commit implícito: cada archivo se registra al terminar
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (name,))
+        conn.commit()
+        print(f"Migración aplicada: {name}")
+        done.append(name)
+    cursor.close()
+    return done
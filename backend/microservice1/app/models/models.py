@@ -1,14 +1,16 @@
 # Queries para usuarios
 USER_QUERIES = {
     "create": """
-        INSERT INTO users (name, email, phone_number, address) 
-        VALUES (%s, %s, %s, %s)
+        INSERT INTO users (name, email, phone_number, address, created_at) 
+        VALUES (%s, %s, %s, %s, %s)
     """,
     "get_all": "SELECT * FROM users",
+    "get_page": "SELECT * FROM users WHERE id > %s ORDER BY id LIMIT %s",
     "get_by_id": "SELECT * FROM users WHERE id = %s",
     "get_by_email": "SELECT * FROM users WHERE email = %s",
     "update": """
-        UPDATE users SET name = %s, email = %s, phone_number = %s, address = %s 
+        UPDATE users SET name = COALESCE(%s, name), email = COALESCE(%s, email), 
+            phone_number = COALESCE(%s, phone_number), address = COALESCE(%s, address) 
         WHERE id = %s
     """,
     "delete": "DELETE FROM users WHERE id = %s"
@@ -17,13 +19,15 @@ USER_QUERIES = {
 # Queries para productos
 PRODUCT_QUERIES = {
     "create": """
-        INSERT INTO products (name, price, calories) 
-        VALUES (%s, %s, %s)
+        INSERT INTO products (name, price, calories, created_at) 
+        VALUES (%s, %s, %s, %s)
     """,
     "get_all": "SELECT * FROM products",
+    "get_page": "SELECT * FROM products WHERE id > %s ORDER BY id LIMIT %s",
     "get_by_id": "SELECT * FROM products WHERE id = %s",
     "update": """
-        UPDATE products SET name = %s, price = %s, calories = %s 
+        UPDATE products SET name = COALESCE(%s, name), price = COALESCE(%s, price), 
+            calories = COALESCE(%s, calories) 
         WHERE id = %s
     """,
     "delete": "DELETE FROM products WHERE id = %s"
@@ -32,8 +36,14 @@ PRODUCT_QUERIES = {
 # Queries para pedidos
 ORDER_QUERIES = {
     "create": """
-        INSERT INTO orders (user_id, product_id, status, total_price, payment_method) 
-        VALUES (%s, %s, %s, %s, %s)
+        INSERT INTO orders (user_id, product_id, status, total_price, payment_method, order_date) 
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """,
+    "existing_users": "SELECT id FROM users WHERE id IN ({ids})",
+    "existing_products": "SELECT id FROM products WHERE id IN ({ids})",
+    "get_names": """
+        SELECT (SELECT name FROM users WHERE id = %s) as user_name,
+               (SELECT name FROM products WHERE id = %s) as product_name
     """,
     "get_all": """
         SELECT o.*, u.name as user_name, p.name as product_name 
@@ -62,8 +72,36 @@ ORDER_QUERIES = {
         JOIN products p ON o.product_id = p.id
         WHERE o.status = %s
     """,
+    "get_page": """
+        SELECT o.*, u.name as user_name, p.name as product_name 
+        FROM orders o
+        JOIN users u ON o.user_id = u.id
+        JOIN products p ON o.product_id = p.id
+        WHERE o.id > %s
+        ORDER BY o.id
+        LIMIT %s
+    """,
+    "get_page_by_user": """
+        SELECT o.*, u.name as user_name, p.name as product_name 
+        FROM orders o
+        JOIN users u ON o.user_id = u.id
+        JOIN products p ON o.product_id = p.id
+        WHERE o.user_id = %s AND o.id > %s
+        ORDER BY o.id
+        LIMIT %s
+    """,
+    "get_page_by_status": """
+        SELECT o.*, u.name as user_name, p.name as product_name 
+        FROM orders o
+        JOIN users u ON o.user_id = u.id
+        JOIN products p ON o.product_id = p.id
+        WHERE o.status = %s AND o.id > %s
+        ORDER BY o.id
+        LIMIT %s
+    """,
     "update": """
-        UPDATE orders SET status = %s, total_price = %s, payment_method = %s 
+        UPDATE orders SET status = COALESCE(%s, status), total_price = COALESCE(%s, total_price), 
+            payment_method = COALESCE(%s, payment_method) 
         WHERE id = %s
     """,
     "delete": "DELETE FROM orders WHERE id = %s"
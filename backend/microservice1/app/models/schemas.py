@@ -81,4 +81,16 @@ class Order(OrderBase):
 
 class OrderWithDetails(Order):
     user_name: str
-    product_name: str
\ No newline at end of file
+    product_name: str
+
+class OrderBatchItemResult(BaseModel):
+    index: int
+    status: str  # "created" | "error"
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class OrderBatchResult(BaseModel):
+    atomic: bool
+    created: int
+    failed: int
+    results: list[OrderBatchItemResult]
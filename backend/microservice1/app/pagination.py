@@ -0,0 +1,64 @@
+import base64
+import binascii
+import json
+import os
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from app.serialization import FAST_JSON, dumps
+
+DEFAULT_PAGE_SIZE = int(os.getenv('PAGE_DEFAULT_LIMIT', '100'))
+MAX_PAGE_SIZE = int(os.getenv('PAGE_MAX_LIMIT', '1000'))
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', '500'))
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"after_id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        after_id = json.loads(base64.urlsafe_b64decode(padded))["after_id"]
+        if isinstance(after_id, int) and after_id >= 0:
+            return after_id
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        pass
+    raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def is_paginated(after_id, limit, cursor) -> bool:
+    # Sin parámetros de paginación se mantiene el listado completo de siempre
+    return after_id is not None or limit is not None or cursor is not None
+
+
+def page_bounds(after_id, limit, cursor):
+    """(after_id, limit + 1): se pide una fila extra para saber si hay más."""
+    if cursor is not None:
+        after_id = decode_cursor(cursor)
+    return after_id or 0, (limit or DEFAULT_PAGE_SIZE) + 1
+
+
+def paginate(rows, limit, response: Response):
+    limit = limit or DEFAULT_PAGE_SIZE
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1]["id"])
+    return rows
+
+
+def wants_stream(request: Request, stream: bool) -> bool:
+    return stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_response(batches, model):
+    """Serializa cada lote con el mismo modelo que usa la respuesta normal
+    (o directo con orjson si FAST_JSON está activo)."""
+    async def body():
+        async for rows in batches:
+            if FAST_JSON:
+                yield b"".join(dumps(row) + b"\n" for row in rows)
+            else:
+                yield "".join(model.model_validate(row).model_dump_json() + "\n" for row in rows)
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
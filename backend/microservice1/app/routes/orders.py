@@ -1,64 +1,152 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-import mysql.connector
-from app.database import get_db
+import json
+import os
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+from app.session import get_session, DB_ERRORS
+from app.serialization import respond
 from app.crud.orders import OrderCRUD
-from app.models.schemas import Order, OrderCreate, OrderUpdate, OrderWithDetails, OrderStatus
+from app.pagination import (MAX_PAGE_SIZE, STREAM_BATCH_SIZE, NDJSON_MEDIA_TYPE, is_paginated,
+                            page_bounds, paginate, wants_stream, ndjson_response)
+from app.models.schemas import (Order, OrderCreate, OrderUpdate, OrderWithDetails, OrderStatus,
+                                OrderBatchResult)
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '10000'))
+BATCH_CHUNK_SIZE = int(os.getenv('BATCH_CHUNK_SIZE', '500'))
+
+async def _read_batch(request: Request):
+    """Lee una lista JSON o un stream NDJSON (una orden por línea)."""
+    try:
+        if NDJSON_MEDIA_TYPE in request.headers.get("content-type", ""):
+            items, buffer = [], b""
+            async for chunk in request.stream():
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                items.extend(json.loads(line) for line in lines if line.strip())
+                if len(items) > BATCH_MAX_ITEMS:
+                    break
+            else:
+                # Cortado antes de tiempo el resto suele ser una línea a medias:
+                # solo se parsea al terminar el stream (y el 413 sale más abajo)
+                if buffer.strip():
+                    items.append(json.loads(buffer))
+        else:
+            items = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="Expected a non-empty list of orders")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_ITEMS} orders")
+    return items
+
+def _validate_batch(items):
+    orders, errors = [], []
+    for index, raw in enumerate(items):
+        try:
+            orders.append((index, OrderCreate.model_validate(raw)))
+        except ValidationError as e:
+            detail = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            errors.append({"index": index, "status": "error", "error": detail})
+    return orders, errors
+
 @router.post("/", response_model=OrderWithDetails, status_code=status.HTTP_201_CREATED)
-def create_order(order: OrderCreate, conn = Depends(get_db)):
+async def create_order(order: OrderCreate, db = Depends(get_session)):
     try:
-        new_order = OrderCRUD.create_order(conn, order)
+        new_order = await db.orders.create_order(order)
         if new_order:
             return new_order
         raise HTTPException(status_code=400, detail="Error creating order")
-    except mysql.connector.Error:
+    except DB_ERRORS:
+        raise HTTPException(status_code=500, detail="Database error")
+
+@router.post("/batch", response_model=OrderBatchResult, status_code=status.HTTP_201_CREATED)
+async def create_orders_batch(
+    request: Request,
+    atomic: bool = Query(False, description="All-or-nothing: reject the whole batch on any error"),
+    chunk_size: int = Query(BATCH_CHUNK_SIZE, ge=1, le=5000, description="Rows per multi-row INSERT"),
+    db = Depends(get_session)
+):
+    """Carga masiva de pedidos: lista JSON de OrderCreate o NDJSON (application/x-ndjson)."""
+    orders, errors = _validate_batch(await _read_batch(request))
+    try:
+        if atomic and errors:
+            results = errors + [{"index": index, "status": "error", "error": "Batch rejected"}
+                                for index, _ in orders]
+        elif orders:
+            results = errors + await db.orders.create_orders_batch(orders, chunk_size, atomic)
+        else:
+            results = errors
+    except DB_ERRORS:
         raise HTTPException(status_code=500, detail="Database error")
 
+    results.sort(key=lambda r: r["index"])
+    failed = sum(1 for r in results if r["status"] == "error")
+    body = OrderBatchResult(atomic=atomic, created=len(results) - failed, failed=failed, results=results)
+    if not failed:
+        return body
+    # 422: no se escribió nada (atómico); 207: éxito parcial
+    code = 422 if atomic else 207
+    return JSONResponse(status_code=code, content=body.model_dump())
+
 @router.get("/", response_model=list[OrderWithDetails])
-def get_orders(
+async def get_orders(
+    request: Request,
+    response: Response,
     status: OrderStatus = Query(None, description="Filter by order status"),
     user_id: str = Query(None, description="Filter by user ID"),
-    conn = Depends(get_db)
+    after_id: int = Query(None, ge=0, description="Return orders with id greater than this"),
+    limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: str = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    stream: bool = Query(False, description="Stream all rows as NDJSON"),
+    db = Depends(get_session)
 ):
     try:
+        if wants_stream(request, stream):
+            query, params = OrderCRUD.list_query(status, user_id)
+            return ndjson_response(db.stream(query, params, STREAM_BATCH_SIZE), OrderWithDetails)
+        if is_paginated(after_id, limit, cursor):
+            start, size = page_bounds(after_id, limit, cursor)
+            orders = await db.orders.get_orders_page(start, size, status, user_id)
+            return respond(paginate(orders, limit, response), response)
         if status:
-            orders = OrderCRUD.get_orders_by_status(conn, status)
+            orders = await db.orders.get_orders_by_status(status)
         elif user_id:
-            orders = OrderCRUD.get_orders_by_user(conn, user_id)
+            orders = await db.orders.get_orders_by_user(user_id)
         else:
-            orders = OrderCRUD.get_orders(conn)
-        return orders
-    except mysql.connector.Error:
+            orders = await db.orders.get_orders()
+        return respond(orders)
+    except DB_ERRORS:
         raise HTTPException(status_code=500, detail="Database error")
 
 @router.get("/{order_id}", response_model=OrderWithDetails)
-def get_order(order_id: str, conn = Depends(get_db)):
+async def get_order(order_id: str, db = Depends(get_session)):
     try:
-        order = OrderCRUD.get_order_by_id(conn, order_id)
+        order = await db.orders.get_order_by_id(order_id)
         if order:
-            return order
+            return respond(order)
         raise HTTPException(status_code=404, detail="Order not found")
-    except mysql.connector.Error:
+    except DB_ERRORS:
         raise HTTPException(status_code=500, detail="Database error")
 
 @router.put("/{order_id}", response_model=OrderWithDetails)
-def update_order(order_id: str, order: OrderUpdate, conn = Depends(get_db)):
+async def update_order(order_id: str, order: OrderUpdate, db = Depends(get_session)):
     try:
-        updated_order = OrderCRUD.update_order(conn, order_id, order)
+        updated_order = await db.orders.update_order(order_id, order)
         if updated_order:
             return updated_order
         raise HTTPException(status_code=404, detail="Order not found")
-    except mysql.connector.Error:
+    except DB_ERRORS:
         raise HTTPException(status_code=500, detail="Database error")
 
 @router.delete("/{order_id}")
-def delete_order(order_id: str, conn = Depends(get_db)):
+async def delete_order(order_id: str, db = Depends(get_session)):
     try:
-        success = OrderCRUD.delete_order(conn, order_id)
+        success = await db.orders.delete_order(order_id)
         if success:
             return {"message": "Order deleted successfully"}
         raise HTTPException(status_code=404, detail="Order not found")
-    except mysql.connector.Error:
-        raise HTTPException(status_code=500, detail="Database error")
\ No newline at end of file
+    except DB_ERRORS:
+        raise HTTPException(status_code=500, detail="Database error")
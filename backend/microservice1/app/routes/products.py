@@ -1,55 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-import mysql.connector
-from app.database import get_db
-from app.crud.products import ProductCRUD
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from app.session import get_session, DB_ERRORS
+from app.serialization import respond
+from app.models.models import PRODUCT_QUERIES
+from app.pagination import (MAX_PAGE_SIZE, STREAM_BATCH_SIZE, is_paginated, page_bounds,
+                            paginate, wants_stream, ndjson_response)
 from app.models.schemas import Product, ProductCreate, ProductUpdate
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 @router.post("/", response_model=Product, status_code=status.HTTP_201_CREATED)
-def create_product(product: ProductCreate, conn = Depends(get_db)):
+async def create_product(product: ProductCreate, db = Depends(get_session)):
     try:
-        new_product = ProductCRUD.create_product(conn, product)
+        new_product = await db.products.create_product(product)
         if new_product:
             return new_product
         raise HTTPException(status_code=400, detail="Error creating product")
-    except mysql.connector.Error:
+    except DB_ERRORS:
         raise HTTPException(status_code=500, detail="Database error")
 
 @router.get("/", response_model=list[Product])
-def get_products(conn = Depends(get_db)):
+async def get_products(
+    request: Request,
+    response: Response,
+    after_id: int = Query(None, ge=0, description="Return products with id greater than this"),
+    limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: str = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    stream: bool = Query(False, description="Stream all rows as NDJSON"),
+    db = Depends(get_session)
+):
     try:
-        products = ProductCRUD.get_products(conn)
-        return products
-    except mysql.connector.Error:
+        if wants_stream(request, stream):
+            return ndjson_response(db.stream(PRODUCT_QUERIES["get_all"], (), STREAM_BATCH_SIZE), Product)
+        if is_paginated(after_id, limit, cursor):
+            start, size = page_bounds(after_id, limit, cursor)
+            products = await db.products.get_products_page(start, size)
+            return respond(paginate(products, limit, response), response)
+        products = await db.products.get_products()
+        return respond(products)
+    except DB_ERRORS:
         raise HTTPException(status_code=500, detail="Database error")
 
 @router.get("/{product_id}", response_model=Product)
-def get_product(product_id: str, conn = Depends(get_db)):
+async def get_product(product_id: str, db = Depends(get_session)):
     try:
-        product = ProductCRUD.get_product_by_id(conn, product_id)
+        product = await db.products.get_product_by_id(product_id)
         if product:
-            return product
+            return respond(product)
         raise HTTPException(status_code=404, detail="Product not found")
-    except mysql.connector.Error:
+    except DB_ERRORS:
         raise HTTPException(status_code=500, detail="Database error")
 
 @router.put("/{product_id}", response_model=Product)
-def update_product(product_id: str, product: ProductUpdate, conn = Depends(get_db)):
+async def update_product(product_id: str, product: ProductUpdate, db = Depends(get_session)):
     try:
-        updated_product = ProductCRUD.update_product(conn, product_id, product)
+        updated_product = await db.products.update_product(product_id, product)
         if updated_product:
             return updated_product
         raise HTTPException(status_code=404, detail="Product not found")
-    except mysql.connector.Error:
+    except DB_ERRORS:
         raise HTTPException(status_code=500, detail="Database error")
 
 @router.delete("/{product_id}")
-def delete_product(product_id: str, conn = Depends(get_db)):
+async def delete_product(product_id: str, db = Depends(get_session)):
     try:
-        success = ProductCRUD.delete_product(conn, product_id)
+        success = await db.products.delete_product(product_id)
         if success:
             return {"message": "Product deleted successfully"}
         raise HTTPException(status_code=404, detail="Product not found")
-    except mysql.connector.Error:
-        raise HTTPException(status_code=500, detail="Database error")
\ No newline at end of file
+    except DB_ERRORS:
+        raise HTTPException(status_code=500, detail="Database error")
@@ -1,22 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-import mysql.connector
-from app.database import get_db
-from app.crud.users import UserCRUD
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from app.session import get_session, DB_ERRORS
+from app.serialization import respond
+from app.models.models import USER_QUERIES
+from app.pagination import (MAX_PAGE_SIZE, STREAM_BATCH_SIZE, is_paginated, page_bounds,
+                            paginate, wants_stream, ndjson_response)
 from app.models.schemas import User, UserCreate, UserUpdate
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.post("/", response_model=User, status_code=status.HTTP_201_CREATED)
-def create_user(user: UserCreate, conn = Depends(get_db)):
+async def create_user(user: UserCreate, db = Depends(get_session)):
     try:
-        new_user = UserCRUD.create_user(conn, user)
+        new_user = await db.users.create_user(user)
         if new_user:
             return new_user
         raise HTTPException(status_code=400, detail="Error creating user")
-    except mysql.connector.Error as e:
+    except DB_ERRORS as e:
         if "Duplicate entry" in str(e):
             try:
-                existing_user = UserCRUD.get_user_by_email(conn, user.email)
+                existing_user = await db.users.get_user_by_email(user.email)
                 if existing_user:
                     return existing_user
                 else:
@@ -26,41 +28,55 @@ def create_user(user: UserCreate, conn = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Database error")
 
 @router.get("/", response_model=list[User])
-def get_users(conn = Depends(get_db)):
+async def get_users(
+    request: Request,
+    response: Response,
+    after_id: int = Query(None, ge=0, description="Return users with id greater than this"),
+    limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: str = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    stream: bool = Query(False, description="Stream all rows as NDJSON"),
+    db = Depends(get_session)
+):
     try:
-        users = UserCRUD.get_users(conn)
-        return users
-    except mysql.connector.Error:
+        if wants_stream(request, stream):
+            return ndjson_response(db.stream(USER_QUERIES["get_all"], (), STREAM_BATCH_SIZE), User)
+        if is_paginated(after_id, limit, cursor):
+            start, size = page_bounds(after_id, limit, cursor)
+            users = await db.users.get_users_page(start, size)
+            return respond(paginate(users, limit, response), response)
+        users = await db.users.get_users()
+        return respond(users)
+    except DB_ERRORS:
         raise HTTPException(status_code=500, detail="Database error")
 
 @router.get("/{user_id}", response_model=User)
-def get_user(user_id: str, conn = Depends(get_db)):
+async def get_user(user_id: str, db = Depends(get_session)):
     try:
-        user = UserCRUD.get_user_by_id(conn, user_id)
+        user = await db.users.get_user_by_id(user_id)
         if user:
-            return user
+            return respond(user)
         raise HTTPException(status_code=404, detail="User not found")
-    except mysql.connector.Error:
+    except DB_ERRORS:
         raise HTTPException(status_code=500, detail="Database error")
 
 @router.put("/{user_id}", response_model=User)
-def update_user(user_id: str, user: UserUpdate, conn = Depends(get_db)):
+async def update_user(user_id: str, user: UserUpdate, db = Depends(get_session)):
     try:
-        updated_user = UserCRUD.update_user(conn, user_id, user)
+        updated_user = await db.users.update_user(user_id, user)
         if updated_user:
             return updated_user
         raise HTTPException(status_code=404, detail="User not found")
-    except mysql.connector.Error as e:
+    except DB_ERRORS as e:
         if "Duplicate entry" in str(e):
             raise HTTPException(status_code=400, detail="Email already exists")
         raise HTTPException(status_code=500, detail="Database error")
 
 @router.delete("/{user_id}")
-def delete_user(user_id: str, conn = Depends(get_db)):
+async def delete_user(user_id: str, db = Depends(get_session)):
     try:
-        success = UserCRUD.delete_user(conn, user_id)
+        success = await db.users.delete_user(user_id)
         if success:
             return {"message": "User deleted successfully"}
         raise HTTPException(status_code=404, detail="User not found")
-    except mysql.connector.Error:
-        raise HTTPException(status_code=500, detail="Database error")
\ No newline at end of file
+    except DB_ERRORS:
+        raise HTTPException(status_code=500, detail="Database error")
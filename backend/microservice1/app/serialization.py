@@ -0,0 +1,43 @@
+import os
+from decimal import Decimal
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional si FAST_JSON está apagado
+    orjson = None
+
+# Camino rápido opcional: las filas de la base se serializan tal cual con
+# orjson, sin volver a validarlas contra el response_model de Pydantic.
+FAST_JSON = os.getenv('FAST_JSON', 'false').lower() in ('1', 'true', 'yes')
+
+if FAST_JSON and orjson is None:
+    raise RuntimeError("FAST_JSON=true requiere el paquete orjson")
+
+
+def _default(obj):
+    # DECIMAL de MySQL -> float, igual que los campos `float` de los schemas
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def respond(content, response: Response = None):
+    """Devuelve las filas tal cual (FastAPI valida) o, con FAST_JSON, con orjson."""
+    if not FAST_JSON or content is None:
+        return content
+    headers = None
+    if response is not None and "x-next-cursor" in response.headers:
+        headers = {"X-Next-Cursor": response.headers["x-next-cursor"]}
+    return FastJSONResponse(content, headers=headers)
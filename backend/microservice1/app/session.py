@@ -0,0 +1,218 @@
+import os
+import time
+from functools import partial
+import mysql.connector
+from fastapi.concurrency import run_in_threadpool
+from app.database import get_pool
+from app.cache import get_cache
+from app.metrics import (METRICS_ENABLED, DB_ACQUIRE_LATENCY, DB_IN_USE,
+                         AsyncTimedConnection, TimedConnection)
+from app.crud.users import UserCRUD
+from app.crud.products import ProductCRUD
+from app.crud.orders import OrderCRUD
+
+# "sync": mysql-connector + threadpool (fallback)
+# "async": aiomysql, sin ocupar hilos del threadpool por consulta
+DB_MODE = os.getenv('DB_MODE', 'sync').lower()
+
+if DB_MODE == "async":
+    import aiomysql
+    from pymysql import MySQLError
+    from app.async_database import get_async_pool
+    from app.crud.async_users import AsyncUserCRUD
+    from app.crud.async_products import AsyncProductCRUD
+    from app.crud.async_orders import AsyncOrderCRUD
+    DB_ERRORS = (mysql.connector.Error, MySQLError)
+else:
+    DB_ERRORS = (mysql.connector.Error,)
+
+
+class _ThreadedCRUD:
+    """Expone los métodos de un CRUD síncrono como corutinas (threadpool)."""
+
+    def __init__(self, crud, conn):
+        self._crud = crud
+        self._conn = conn
+
+    def __getattr__(self, name):
+        method = getattr(self._crud, name)
+
+        async def call(*args, **kwargs):
+            return await run_in_threadpool(method, self._conn, *args, **kwargs)
+        return call
+
+
+class _BoundCRUD:
+    """Liga la conexión a los métodos de un CRUD asíncrono."""
+
+    def __init__(self, crud, conn):
+        self._crud = crud
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return partial(getattr(self._crud, name), self._conn)
+
+
+class _CachedCRUD:
+    """Caché de lectura por id delante de un CRUD (ya expuesto como corutinas).
+
+    `create_*` escribe la fila nueva en el caché; `update_*`/`delete_*`
+    invalidan la entrada después de escribir en la base.
+    """
+
+    def __init__(self, inner, cache, get_method, create_method, invalidating):
+        self._inner = inner
+        self._cache = cache
+        self._get_method = get_method
+        self._create_method = create_method
+        self._invalidating = invalidating
+
+    async def _call(self, fn, *args):
+        if self._cache.backend.blocking:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    def __getattr__(self, name):
+        method = getattr(self._inner, name)
+        if name == self._get_method:
+            async def get(row_id):
+                row = await self._call(self._cache.get, row_id)
+                if row is None:
+                    row = await method(row_id)
+                    if row is not None:
+                        await self._call(self._cache.set, row_id, row)
+                return row
+            return get
+        if name == self._create_method:
+            async def create(*args):
+                row = await method(*args)
+                if row is not None:
+                    await self._call(self._cache.set, str(row['id']), row)
+                return row
+            return create
+        if name in self._invalidating:
+            async def write(row_id, *args):
+                try:
+                    return await method(row_id, *args)
+                finally:
+                    await self._call(self._cache.invalidate, row_id)
+            return write
+        return method
+
+
+def _cached(users, products):
+    return (
+        _CachedCRUD(users, get_cache("users"), "get_user_by_id", "create_user",
+                    ("update_user", "delete_user")),
+        _CachedCRUD(products, get_cache("products"), "get_product_by_id", "create_product",
+                    ("update_product", "delete_product")),
+    )
+
+
+async def _stream_sync(conn, query, params, batch_size):
+    # Cursor sin buffer: las filas se leen del socket de a `batch_size`
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    await run_in_threadpool(cursor.execute, query, params)
+    done = False
+    try:
+        while True:
+            rows = await run_in_threadpool(cursor.fetchmany, batch_size)
+            if not rows:
+                done = True
+                break
+            yield rows
+    finally:
+        if done:
+            cursor.close()
+        else:
+            # Cliente desconectado: con filas sin leer el cursor no cierra; se
+            # cierra la conexión y el pool la descarta al liberarla
+            await run_in_threadpool(conn.close)
+
+
+async def _stream_async(conn, query, params, batch_size):
+    cursor = await conn.cursor(aiomysql.SSDictCursor)
+    await cursor.execute(query, params)
+    done = False
+    try:
+        while True:
+            rows = await cursor.fetchmany(batch_size)
+            if not rows:
+                done = True
+                break
+            yield rows
+    finally:
+        if done:
+            await cursor.close()
+        else:
+            # Cliente desconectado: cerrar en vez de drenar el resto del resultado
+            conn.close()
+
+
+class DBSession:
+    """Conexión prestada del pool más los CRUD del modo activo.
+
+    Las rutas siempre hacen `await db.orders.metodo(...)`, sin importar
+    si por debajo corre mysql-connector en el threadpool o aiomysql.
+
+    `db.stream(query, params, batch_size)` itera la consulta por lotes con un
+    cursor del lado del servidor. La conexión se libera al terminar la
+    respuesta (FastAPI < 0.106 ejecuta el cierre de las dependencias con
+    yield después de enviar el body).
+    """
+
+    def __init__(self, conn, users, products, orders, stream):
+        self.conn = conn
+        self.users = users
+        self.products = products
+        self.orders = orders
+        self.stream = stream
+
+
+def _instrumented(conn, acquire_start):
+    # Con METRICS activo, los cursores de la conexión miden cada consulta
+    if not METRICS_ENABLED:
+        return conn
+    DB_ACQUIRE_LATENCY.labels(DB_MODE).observe(time.perf_counter() - acquire_start)
+    DB_IN_USE.inc()
+    return AsyncTimedConnection(conn) if DB_MODE == "async" else TimedConnection(conn)
+
+
+def _released():
+    if METRICS_ENABLED:
+        DB_IN_USE.dec()
+
+
+def get_active_pool():
+    return get_async_pool() if DB_MODE == "async" else get_pool()
+
+# Dependency
+async def get_session():
+    if DB_MODE == "async":
+        pool = get_async_pool()
+        start = time.perf_counter()
+        conn = await pool.acquire()
+        db_conn = _instrumented(conn, start)
+        try:
+            users, products = _cached(_BoundCRUD(AsyncUserCRUD, db_conn),
+                                      _BoundCRUD(AsyncProductCRUD, db_conn))
+            yield DBSession(db_conn, users, products,
+                            _BoundCRUD(AsyncOrderCRUD, db_conn),
+                            partial(_stream_async, db_conn))
+        finally:
+            _released()
+            await pool.release(conn)
+    else:
+        pool = get_pool()
+        start = time.perf_counter()
+        conn = await run_in_threadpool(pool.acquire)
+        db_conn = _instrumented(conn, start)
+        try:
+            users, products = _cached(_ThreadedCRUD(UserCRUD, db_conn),
+                                      _ThreadedCRUD(ProductCRUD, db_conn))
+            yield DBSession(db_conn, users, products,
+                            _ThreadedCRUD(OrderCRUD, db_conn),
+                            partial(_stream_sync, db_conn))
+        finally:
+            _released()
+            await run_in_threadpool(pool.release, conn)
@@ -0,0 +1,40 @@
+"""Perfil de producción: gunicorn con workers de uvicorn (uvloop + httptools).
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Cada worker importa la app después del fork (preload_app = False), así que
+el pool de conexiones, las cachés en memoria y el health monitor son propios
+de cada proceso. Con N workers hay hasta N * DB_POOL_MAX conexiones a MySQL.
+"""
+import multiprocessing
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+# uvicorn usa uvloop y httptools si están instalados (uvicorn[standard])
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = False
+
+# SIGTERM: cada worker deja de aceptar conexiones, termina las peticiones en
+# curso (hasta GRACEFUL_TIMEOUT) y corre el shutdown del lifespan (cierra el pool)
+graceful_timeout = int(os.getenv('GRACEFUL_TIMEOUT', '30'))
+timeout = int(os.getenv('WORKER_TIMEOUT', '60'))
+keepalive = int(os.getenv('KEEPALIVE', '5'))
+# Reciclar workers cada N peticiones (0 = nunca), con jitter para no reiniciarlos juntos
+max_requests = int(os.getenv('MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+# Métricas de Prometheus agregadas entre workers (ver app/metrics.py)
+multiproc_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus_maki_api')
+
+
+def on_starting(server):
+    # Archivos de una ejecución anterior sumarían métricas de procesos muertos
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,5 @@
+-- Índice para los listados de pedidos por estado (get_by_status y su variante
+-- paginada por keyset, WHERE status = ? AND id > ? ORDER BY id). Con el id
+-- como segunda columna la página se lee en orden del índice, sin filesort.
+-- Por usuario alcanza el índice de la FK: en InnoDB ya es (user_id, id).
+CREATE INDEX idx_orders_status_id ON orders (status, id);
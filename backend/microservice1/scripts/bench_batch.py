@@ -0,0 +1,49 @@
+"""Throughput de inserción: create_order uno por uno vs create_orders_batch.
+
+    python scripts/bench_batch.py -n 5000 --chunk-size 500
+
+Usa las mismas variables DB_* que la API. Inserta pedidos reales: correr
+contra una base de pruebas.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import Database
+from app.crud.orders import OrderCRUD
+from app.models.schemas import OrderCreate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--orders", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--product-id", type=int, default=1)
+    args = parser.parse_args()
+
+    conn = Database().connect()
+    orders = [(i, OrderCreate(user_id=args.user_id, product_id=args.product_id, total_price=18.99))
+              for i in range(args.orders)]
+
+    start = time.perf_counter()
+    for _, order in orders:
+        OrderCRUD.create_order(conn, order)
+    single = args.orders / (time.perf_counter() - start)
+    print(f"uno por uno:        {single:10.1f} pedidos/s")
+
+    for atomic in (False, True):
+        start = time.perf_counter()
+        results = OrderCRUD.create_orders_batch(conn, orders, args.chunk_size, atomic)
+        rate = args.orders / (time.perf_counter() - start)
+        failed = sum(1 for r in results if r["status"] == "error")
+        label = "batch atómico:" if atomic else "batch parcial:"
+        print(f"{label:<19} {rate:10.1f} pedidos/s  (x{rate / single:.1f}, errores={failed})")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
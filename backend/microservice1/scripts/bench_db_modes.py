@@ -0,0 +1,72 @@
+"""Benchmark lado a lado de DB_MODE=sync vs DB_MODE=async.
+
+Levantar dos instancias de la API contra la misma base de datos:
+
+    DB_MODE=sync  uvicorn app.main:app --port 8001
+    DB_MODE=async uvicorn app.main:app --port 8002
+
+y luego:
+
+    python scripts/bench_db_modes.py --sync http://localhost:8001 \
+        --async-url http://localhost:8002 --path /orders/1 -c 50 200 500
+
+Requiere httpx (pip install httpx).
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+
+
+async def run_load(base_url, path, concurrency, requests_per_worker):
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        async def worker():
+            nonlocal errors
+            for _ in range(requests_per_worker):
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "mean": statistics.mean(latencies) * 1000,
+        "errors": errors,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sync", dest="sync_url", default="http://localhost:8001")
+    parser.add_argument("--async-url", default="http://localhost:8002")
+    parser.add_argument("--path", default="/products/1")
+    parser.add_argument("-c", "--concurrency", type=int, nargs="+", default=[10, 50, 200, 500])
+    parser.add_argument("-n", "--requests-per-worker", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'modo':<6} {'conc':>5} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9} {'errores':>8}")
+    for concurrency in args.concurrency:
+        for mode, url in (("sync", args.sync_url), ("async", args.async_url)):
+            r = await run_load(url, args.path, concurrency, args.requests_per_worker)
+            print(f"{mode:<6} {concurrency:>5} {r['rps']:>9.1f} {r['p50']:>9.2f} "
+                  f"{r['p99']:>9.2f} {r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
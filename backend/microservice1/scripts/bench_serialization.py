@@ -0,0 +1,79 @@
+"""Microbenchmark de serialización: response_model de FastAPI vs FAST_JSON (orjson).
+
+    python scripts/bench_serialization.py --sizes 1000 10000 100000
+
+No necesita base de datos: genera filas con la misma forma que devuelve
+ORDER_QUERIES["get_all"] (Decimal, datetime, strings de los ENUM).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.models.schemas import OrderWithDetails
+from app.serialization import orjson, _default
+
+
+def make_rows(n):
+    base = datetime(2025, 1, 1)
+    return [{
+        "id": i,
+        "user_id": i % 997 + 1,
+        "product_id": i % 53 + 1,
+        "status": "delivered",
+        "order_date": base + timedelta(seconds=i),
+        "total_price": Decimal("18.99"),
+        "payment_method": "card",
+        "user_name": f"User {i % 997 + 1}",
+        "product_name": "California Roll Premium",
+    } for i in range(n)]
+
+
+def default_path(adapter, rows):
+    # Lo que hace FastAPI con response_model: validar, volcar y json.dumps
+    validated = adapter.validate_python(rows)
+    content = jsonable_encoder(adapter.dump_python(validated, mode="json"))
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(rows):
+    return orjson.dumps(rows, default=_default)
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if orjson is None:
+        sys.exit("Instalar orjson para comparar el camino rápido")
+
+    adapter = TypeAdapter(list[OrderWithDetails])
+    print(f"{'filas':>8} {'response_model ms':>18} {'orjson ms':>10} {'speedup':>8}")
+    for n in args.sizes:
+        rows = make_rows(n)
+        assert json.loads(default_path(adapter, rows)) == json.loads(fast_path(rows))
+        slow = best_of(lambda: default_path(adapter, rows), args.repeat)
+        fast = best_of(lambda: fast_path(rows), args.repeat)
+        print(f"{n:>8} {slow:>18.2f} {fast:>10.2f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
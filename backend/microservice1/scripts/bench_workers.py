@@ -0,0 +1,112 @@
+"""Escalado de throughput con el número de workers de gunicorn (1..N núcleos).
+
+Para cada cantidad de workers levanta gunicorn con gunicorn.conf.py, espera
+a /health/live, genera carga desde varios procesos y reporta RPS, p99 y la
+eficiencia respecto del nivel más chico (normalmente 1 worker).
+
+    python scripts/bench_workers.py --workers 1 2 4 --path /products/ -d 15
+    python scripts/bench_workers.py --app-dir ../orquestador --app orquestador:app \\
+        --ready-path / --path /api/orders/products/
+
+El generador de carga también consume CPU: en la misma máquina usar
+--load-procs suficiente para no ser el cuello de botella, o apuntar a otra.
+Requiere httpx (pip install httpx).
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+import httpx
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def wait_ready(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"El servidor no respondió en {url}")
+
+
+async def _load(url, concurrency, duration):
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    deadline = time.perf_counter() + duration
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def load_process(args):
+    return asyncio.run(_load(*args))
+
+
+def run_level(args, workers):
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "PORT": str(args.port)}
+    server = subprocess.Popen(["gunicorn", "-c", "gunicorn.conf.py", args.app], cwd=args.app_dir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_ready(base + args.ready_path)
+        per_proc = max(1, args.concurrency // args.load_procs)
+        with multiprocessing.Pool(args.load_procs) as pool:
+            pool.map(load_process, [(base + args.path, per_proc, 2)] * args.load_procs)  # calentamiento
+            start = time.perf_counter()
+            results = pool.map(load_process, [(base + args.path, per_proc, args.duration)] * args.load_procs)
+            elapsed = time.perf_counter() - start
+    finally:
+        # SIGTERM = apagado ordenado, igual que docker stop
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    latencies = sorted(l for result, _ in results for l in result)
+    errors = sum(e for _, e in results)
+    p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000
+    return len(latencies) / elapsed, p99, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()])
+    parser.add_argument("--app-dir", default=ROOT)
+    parser.add_argument("--app", default="app.main:app")
+    parser.add_argument("--path", default="/products/")
+    parser.add_argument("--ready-path", default="/health/live")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("-c", "--concurrency", type=int, default=200)
+    parser.add_argument("-d", "--duration", type=float, default=10)
+    parser.add_argument("--load-procs", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'rps':>10} {'p99 ms':>9} {'errores':>8} {'eficiencia':>11}")
+    per_worker = None  # RPS por worker del nivel más chico, como referencia
+    for workers in sorted(set(args.workers)):
+        rps, p99, errors = run_level(args, workers)
+        per_worker = per_worker or rps / workers
+        efficiency = rps / (per_worker * workers) * 100
+        print(f"{workers:>8} {rps:>10.0f} {p99:>9.1f} {errors:>8} {efficiency:>10.0f}%")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
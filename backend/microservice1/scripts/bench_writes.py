@@ -0,0 +1,102 @@
+"""Benchmark de las rutas de escritura: flujo anterior vs flujo actual.
+
+El flujo anterior (INSERT + SELECT del último pedido + SELECT con JOIN, y
+SELECT + UPDATE + SELECT en las actualizaciones) se reproduce aquí con las
+mismas consultas para comparar p50/p99 contra OrderCRUD/UserCRUD.
+
+    python scripts/bench_writes.py -n 2000
+
+Usa las mismas variables DB_* que la API. Inserta pedidos reales: correr
+contra una base de pruebas.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import Database
+from app.crud.orders import OrderCRUD
+from app.crud.users import UserCRUD
+from app.models.models import ORDER_QUERIES, USER_QUERIES
+from app.models.schemas import OrderCreate, UserUpdate
+
+
+def legacy_create_order(conn, order):
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        INSERT INTO orders (user_id, product_id, status, total_price, payment_method)
+        VALUES (%s, %s, %s, %s, %s)
+    """, (order.user_id, order.product_id, order.status.value,
+          order.total_price, order.payment_method.value))
+    conn.commit()
+    cursor.execute("SELECT id FROM orders WHERE user_id = %s ORDER BY order_date DESC LIMIT 1",
+                   (order.user_id,))
+    new_order_id = cursor.fetchone()['id']
+    cursor.execute(ORDER_QUERIES["get_by_id"], (new_order_id,))
+    result = cursor.fetchone()
+    cursor.close()
+    return result
+
+
+def legacy_update_user(conn, user_id, user):
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(USER_QUERIES["get_by_id"], (user_id,))
+    current = cursor.fetchone()
+    cursor.execute("""
+        UPDATE users SET name = %s, email = %s, phone_number = %s, address = %s
+        WHERE id = %s
+    """, (user.name or current['name'], user.email or current['email'],
+          user.phone_number or current['phone_number'], user.address or current['address'],
+          user_id))
+    conn.commit()
+    cursor.execute(USER_QUERIES["get_by_id"], (user_id,))
+    result = cursor.fetchone()
+    cursor.close()
+    return result
+
+
+def measure(label, fn, iterations):
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000
+    print(f"{label:<28} p50={p50:7.3f} ms  p99={p99:7.3f} ms")
+    return p50, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--iterations", type=int, default=1000)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--product-id", type=int, default=1)
+    args = parser.parse_args()
+
+    conn = Database().connect()
+    order = OrderCreate(user_id=args.user_id, product_id=args.product_id, total_price=18.99)
+    update = UserUpdate(phone_number="+51999999999")
+
+    results = {
+        "create_order (anterior)": measure("create_order (anterior)",
+                                           lambda: legacy_create_order(conn, order), args.iterations),
+        "create_order (actual)": measure("create_order (actual)",
+                                         lambda: OrderCRUD.create_order(conn, order), args.iterations),
+        "update_user (anterior)": measure("update_user (anterior)",
+                                          lambda: legacy_update_user(conn, args.user_id, update), args.iterations),
+        "update_user (actual)": measure("update_user (actual)",
+                                        lambda: UserCRUD.update_user(conn, args.user_id, update), args.iterations),
+    }
+
+    for op in ("create_order", "update_user"):
+        old, new = results[f"{op} (anterior)"], results[f"{op} (actual)"]
+        print(f"{op}: p50 x{old[0] / new[0]:.2f}, p99 x{old[1] / new[1]:.2f}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
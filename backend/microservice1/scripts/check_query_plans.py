@@ -0,0 +1,205 @@
+"""Suite de regresión de planes de consulta (EXPLAIN) para maki_orders.
+
+Crea una base aparte, aplica el esquema de init.sql y las migraciones,
+siembra un dataset grande y corre EXPLAIN sobre cada consulta de
+USER_QUERIES / PRODUCT_QUERIES / ORDER_QUERIES. Termina con código 1 si
+alguna consulta hace un full scan (type=ALL), un filesort o una tabla
+temporal que no esté permitido.
+
+    docker run -d --rm --name plan_mysql -p 3307:3306 -e MYSQL_ROOT_PASSWORD=utec mysql:8.0
+    DB_HOST=127.0.0.1 DB_PORT=3307 python scripts/check_query_plans.py --orders 200000
+
+Cada consulta nueva necesita parámetros de ejemplo en SAMPLE_PARAMS (una
+tupla, o una lista de tuplas para revisar el plan con varios valores); si
+falta, la suite falla para que no quede sin revisar.
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import mysql.connector
+from app.database import Database
+from app.migrations import apply_migrations, split_statements
+from app.models.models import USER_QUERIES, PRODUCT_QUERIES, ORDER_QUERIES
+
+INIT_SQL = os.path.join(os.path.dirname(__file__), "..", "init.sql")
+
+QUERY_SETS = {
+    "USER_QUERIES": USER_QUERIES,
+    "PRODUCT_QUERIES": PRODUCT_QUERIES,
+    "ORDER_QUERIES": ORDER_QUERIES,
+}
+
+NOW = datetime(2025, 1, 1, 12, 0, 0)
+
+# Un estado poco frecuente y uno que cubre la mayoría de las filas: el
+# optimizador puede elegir planes distintos para cada uno
+STATUS_SAMPLES = ["cancelled", "delivered"]
+
+SAMPLE_PARAMS = {
+    ("USER_QUERIES", "create"): ("Ana", "ana@example.com", None, None, NOW),
+    ("USER_QUERIES", "get_all"): (),
+    ("USER_QUERIES", "get_page"): (1000, 101),
+    ("USER_QUERIES", "get_by_id"): (42,),
+    ("USER_QUERIES", "get_by_email"): ("user42@example.com",),
+    ("USER_QUERIES", "update"): ("Ana", None, None, None, 42),
+    ("USER_QUERIES", "delete"): (42,),
+    ("PRODUCT_QUERIES", "create"): ("Roll", 10.5, 300, NOW),
+    ("PRODUCT_QUERIES", "get_all"): (),
+    ("PRODUCT_QUERIES", "get_page"): (100, 101),
+    ("PRODUCT_QUERIES", "get_by_id"): (7,),
+    ("PRODUCT_QUERIES", "update"): (None, 12.0, None, 7),
+    ("PRODUCT_QUERIES", "delete"): (7,),
+    ("ORDER_QUERIES", "create"): (1, 1, "pending", 10.0, "cash", NOW),
+    ("ORDER_QUERIES", "existing_users"): (1, 2, 3),
+    ("ORDER_QUERIES", "existing_products"): (1, 2, 3),
+    ("ORDER_QUERIES", "get_names"): (1, 1),
+    ("ORDER_QUERIES", "get_all"): (),
+    ("ORDER_QUERIES", "get_by_id"): (1234,),
+    ("ORDER_QUERIES", "get_by_user"): (42,),
+    ("ORDER_QUERIES", "get_by_status"): [(status,) for status in STATUS_SAMPLES],
+    ("ORDER_QUERIES", "get_page"): (5000, 101),
+    ("ORDER_QUERIES", "get_page_by_user"): (42, 0, 101),
+    ("ORDER_QUERIES", "get_page_by_status"): [(status, 0, 101) for status in STATUS_SAMPLES],
+    ("ORDER_QUERIES", "update"): ("confirmed", None, None, 1234),
+    ("ORDER_QUERIES", "delete"): (1234,),
+}
+
+# Listados completos sin filtro: el full scan (y su orden) es intencional.
+# Una entrada puede fijar además los parámetros: el listado sin paginar de
+# 'delivered' devuelve la mayor parte de la tabla y ahí un scan es lo correcto
+ALLOWED_PLANS = {
+    ("USER_QUERIES", "get_all"),
+    ("PRODUCT_QUERIES", "get_all"),
+    ("ORDER_QUERIES", "get_all"),
+    ("ORDER_QUERIES", "get_by_status", ("delivered",)),
+}
+
+STATUSES = ["pending", "confirmed", "preparing", "delivered", "cancelled"]
+STATUS_WEIGHTS = [10, 10, 5, 70, 5]
+PAYMENTS = ["cash", "card", "transfer"]
+
+
+def create_schema(conn, database):
+    cursor = conn.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+    cursor.execute(f"CREATE DATABASE `{database}`")
+    cursor.execute(f"USE `{database}`")
+    with open(INIT_SQL, encoding="utf-8") as f:
+        for statement in split_statements(f.read()):
+            if statement.upper().startswith("CREATE TABLE"):
+                cursor.execute(statement)
+    cursor.close()
+
+
+def seed(conn, users, products, orders, chunk=5000):
+    rng = random.Random(42)
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO users (name, email, phone_number, address) VALUES (%s, %s, %s, %s)",
+        [(f"User {i}", f"user{i}@example.com", None, None) for i in range(1, users + 1)])
+    cursor.executemany(
+        "INSERT INTO products (name, price, calories) VALUES (%s, %s, %s)",
+        [(f"Product {i}", round(rng.uniform(5, 40), 2), rng.randint(100, 800))
+         for i in range(1, products + 1)])
+    conn.commit()
+    for start in range(0, orders, chunk):
+        rows = [(rng.randint(1, users), rng.randint(1, products),
+                 rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+                 NOW - timedelta(minutes=rng.randint(0, 525600)),
+                 round(rng.uniform(5, 80), 2), rng.choice(PAYMENTS))
+                for _ in range(min(chunk, orders - start))]
+        cursor.executemany(
+            "INSERT INTO orders (user_id, product_id, status, order_date, total_price, payment_method) "
+            "VALUES (%s, %s, %s, %s, %s, %s)", rows)
+        conn.commit()
+    cursor.execute("ANALYZE TABLE users, products, orders")
+    cursor.fetchall()
+    cursor.close()
+
+
+def explain(conn, query, params):
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("EXPLAIN " + query, params)
+    plan = cursor.fetchall()
+    cursor.close()
+    return plan
+
+
+def check(conn):
+    failures = []
+    for set_name, queries in QUERY_SETS.items():
+        for key, query in queries.items():
+            name = f"{set_name}[{key!r}]"
+            if query.lstrip().upper().startswith("INSERT"):
+                continue
+            samples = SAMPLE_PARAMS.get((set_name, key))
+            if samples is None:
+                failures.append(f"{name}: sin parámetros de ejemplo en SAMPLE_PARAMS")
+                continue
+            for params in samples if isinstance(samples, list) else [samples]:
+                failures.extend(check_query(conn, set_name, key, query, params))
+    return failures
+
+
+def check_query(conn, set_name, key, query, params):
+    name = f"{set_name}[{key!r}]"
+    if "{ids}" in query:
+        query = query.format(ids=", ".join(["%s"] * len(params)))
+
+    plan = explain(conn, query, params)
+    summary = ", ".join(f"{row['table']}:{row['type']}:{row.get('key')}" for row in plan)
+    extra = " ".join(row.get("Extra") or "" for row in plan)
+    problems = []
+    scans = [row["table"] for row in plan if row.get("type") == "ALL"]
+    if scans:
+        problems.append(f"full scan en {', '.join(scans)}")
+    if "filesort" in extra:
+        problems.append("filesort")
+    if "Using temporary" in extra:
+        problems.append("tabla temporal")
+
+    allowed = (set_name, key) in ALLOWED_PLANS or (set_name, key, params) in ALLOWED_PLANS
+    status = "FAIL" if problems and not allowed else "ok"
+    flags = f"  [{', '.join(problems)}]" if problems else ""
+    print(f"{status:<4} {name:<42} {params!r:<24} {summary}{flags}")
+    if status == "FAIL":
+        return [f"{name} {params!r}: {', '.join(problems)}"]
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", default="maki_orders_plan_check")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=200000)
+    parser.add_argument("--skip-seed", action="store_true", help="Reusar la base ya sembrada")
+    args = parser.parse_args()
+
+    db = Database()
+    conn = mysql.connector.connect(host=db.host, port=int(db.port), user=db.user,
+                                   password=db.password, auth_plugin='mysql_native_password')
+    if args.skip_seed:
+        conn.database = args.database
+    else:
+        create_schema(conn, args.database)
+        apply_migrations(conn)
+        seed(conn, args.users, args.products, args.orders)
+
+    failures = check(conn)
+    conn.close()
+    if failures:
+        print("\nRegresiones de plan:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nTodos los planes usan índices")
+
+
+if __name__ == "__main__":
+    main()
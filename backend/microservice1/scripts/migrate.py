@@ -0,0 +1,19 @@
+"""Aplica las migraciones pendientes de migrations/ a la base configurada (DB_*).
+
+    python scripts/migrate.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import Database
+from app.migrations import apply_migrations
+
+
+if __name__ == "__main__":
+    conn = Database().get_connection()
+    applied = apply_migrations(conn)
+    if not applied:
+        print("Sin migraciones pendientes")
+    conn.close()
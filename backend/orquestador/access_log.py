@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+ACCESS_LOG = os.getenv("ACCESS_LOG", "true").lower() in ("1", "true", "yes")
+ACCESS_LOG_FILE = os.getenv("ACCESS_LOG_FILE")  # por defecto stdout
+# Fracción de peticiones que se registran; los 5xx se registran siempre
+ACCESS_LOG_SAMPLE = float(os.getenv("ACCESS_LOG_SAMPLE", "1.0"))
+# Registros pendientes como máximo; si el escritor no da abasto se descartan
+ACCESS_LOG_QUEUE = int(os.getenv("ACCESS_LOG_QUEUE", "10000"))
+
+
+class AccessLog:
+    """Access log JSON (una línea por petición) escrito desde un hilo aparte.
+
+    El event loop solo arma un dict y lo encola sin bloquear; el json.dumps y
+    el write ocurren en el hilo. Con la cola llena el registro se descarta y
+    se cuenta en `dropped`.
+    """
+
+    def __init__(self, path=ACCESS_LOG_FILE, sample=ACCESS_LOG_SAMPLE, maxsize=ACCESS_LOG_QUEUE):
+        self.path = path
+        self.sample = sample
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.thread = None
+        self.written = self.dropped = self.sampled_out = 0
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="access-log", daemon=True)
+            self.thread.start()
+
+    def stop(self, timeout=5.0):
+        if self.thread is not None:
+            try:
+                self.queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self.thread.join(timeout)
+            self.thread = None
+
+    def emit(self, record: dict):
+        if self.thread is None:
+            return
+        if record.get("status", 0) < 500 and self.sample < 1 and random.random() >= self.sample:
+            self.sampled_out += 1
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        stream = open(self.path, "a", encoding="utf-8") if self.path else sys.stdout
+        try:
+            while True:
+                record = self.queue.get()
+                if record is None:
+                    break
+                try:
+                    stream.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                    self.written += 1
+                except Exception as e:
+                    logger.error(f"Error escribiendo access log: {str(e)}")
+                if self.queue.empty():
+                    stream.flush()
+        finally:
+            stream.flush()
+            if stream is not sys.stdout:
+                stream.close()
+
+    def stats(self):
+        return {
+            "enabled": self.thread is not None,
+            "sample": self.sample,
+            "queued": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+        }
+
+
+access_log = AccessLog()
+
+
+def trace_timings(timings: dict):
+    """Callback de `trace` de httpx: anota conexión y time-to-first-byte del upstream."""
+    start = time.perf_counter()
+
+    async def trace(event_name, info):
+        now = time.perf_counter()
+        if event_name == "connection.connect_tcp.started":
+            timings["_connect_start"] = now
+        elif event_name == "connection.connect_tcp.complete":
+            timings["upstream_connect_ms"] = round((now - timings.pop("_connect_start", start)) * 1000, 2)
+        elif event_name.endswith("receive_response_headers.complete"):
+            timings["upstream_ttfb_ms"] = round((now - start) * 1000, 2)
+
+    return trace
+
+
+class AccessLogMiddleware:
+    """Mide cada petición hasta el último chunk de la respuesta (también en
+    streaming) y la envía al access log junto con lo que el handler haya dejado
+    en `request.state.access` (servicio, réplica, caché, tiempos del upstream)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or access_log.thread is None:
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        record = {"method": scope["method"], "path": scope["path"], "status": 500, "bytes": 0}
+        scope.setdefault("state", {})["access"] = record
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                record["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                record["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            record["total_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            record["ts"] = time.time()
+            if scope.get("client"):
+                record["client"] = scope["client"][0]
+            access_log.emit(record)
@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+import httpx
+from resilience import resilience
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_CACHE = os.getenv("GATEWAY_CACHE", "true").lower() in ("1", "true", "yes")
+GATEWAY_CACHE_MAX_BYTES = int(os.getenv("GATEWAY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+GATEWAY_CACHE_MAX_ENTRY_BYTES = int(os.getenv("GATEWAY_CACHE_MAX_ENTRY_BYTES", str(1024 * 1024)))
+# Cuánto tiempo se sirve una entrada vencida mientras se revalida en segundo
+# plano (si el upstream no manda stale-while-revalidate)
+GATEWAY_CACHE_SWR = float(os.getenv("GATEWAY_CACHE_SWR", "10"))
+# TTL de estáticos de Swagger y openapi.json cuando el upstream no manda Cache-Control
+GATEWAY_STATIC_TTL = float(os.getenv("GATEWAY_STATIC_TTL", "300"))
+
+# Headers que no se guardan: hop-by-hop y los que se recalculan al servir
+_SKIP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade", "age", "date", "set-cookie",
+}
+
+
+def parse_cache_control(value: str) -> dict:
+    directives = {}
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') or None
+    return directives
+
+
+def _seconds(value, default=0.0):
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def freshness(headers: httpx.Headers, default_ttl: float):
+    """(ttl, swr) para guardar la respuesta, o None si no es cacheable.
+
+    Sin Cache-Control solo se cachea con default_ttl (estáticos). Con no-cache
+    se guarda con TTL 0: cada uso revalida con If-None-Match, pero el upstream
+    puede contestar 304 sin reenviar el body.
+    """
+    if "set-cookie" in headers or headers.get("vary", "").strip() == "*":
+        return None
+    cache_control = headers.get("cache-control")
+    if cache_control is None:
+        return (default_ttl, GATEWAY_CACHE_SWR) if default_ttl > 0 else None
+    directives = parse_cache_control(cache_control)
+    if "no-store" in directives or "private" in directives:
+        return None
+    swr = _seconds(directives.get("stale-while-revalidate"), GATEWAY_CACHE_SWR)
+    if "no-cache" in directives:
+        has_validator = "etag" in headers or "last-modified" in headers
+        return (0.0, 0.0) if has_validator else None
+    if "s-maxage" in directives:
+        return _seconds(directives["s-maxage"]), swr
+    if "max-age" in directives:
+        return _seconds(directives["max-age"]), swr
+    return (default_ttl, swr) if default_ttl > 0 else None
+
+
+class CachedResponse:
+    def __init__(self, response: httpx.Response, body: bytes, ttl: float, swr: float):
+        self.status_code = response.status_code
+        self.headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _SKIP_HEADERS]
+        self.body = body
+        self.etag = response.headers.get("etag")
+        self.last_modified = response.headers.get("last-modified")
+        self.vary = [h.strip().lower() for h in response.headers.get("vary", "").split(",") if h.strip()]
+        self.refresh(ttl, swr)
+
+    def refresh(self, ttl: float, swr: float):
+        self.stored_at = time.monotonic()
+        self.ttl = ttl
+        self.swr = swr
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+    @property
+    def fresh(self) -> bool:
+        return self.age < self.ttl
+
+    @property
+    def servable_stale(self) -> bool:
+        return self.age < self.ttl + self.swr
+
+    def validators(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["if-none-match"] = self.etag
+        if self.last_modified:
+            headers["if-modified-since"] = self.last_modified
+        return headers
+
+
+class GatewayCache:
+    """Caché de respuestas GET del orquestrador (LRU acotada por bytes + TTL).
+
+    Respeta Cache-Control del upstream (max-age, s-maxage, no-cache, no-store,
+    private, stale-while-revalidate) y Vary. Los misses concurrentes de la
+    misma clave comparten una sola llamada al upstream (single-flight) y las
+    entradas recién vencidas se sirven mientras se revalidan en segundo plano.
+    """
+
+    def __init__(self, max_bytes=GATEWAY_CACHE_MAX_BYTES, max_entry_bytes=GATEWAY_CACHE_MAX_ENTRY_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.entries: OrderedDict = OrderedDict()
+        self.vary: dict = {}  # clave base -> headers de Vary de la última respuesta
+        self.size = 0
+        self._inflight: dict = {}
+        self._refreshing = set()
+        self.hits = self.misses = self.stale = self.revalidated = self.coalesced = self.evictions = 0
+        self.invalidations = 0
+
+    def _key(self, base, request_headers):
+        names = self.vary.get(base, ())
+        return base, tuple(request_headers.get(name, "") for name in names)
+
+    def _get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry.servable_stale or entry.validators():
+                self.entries.move_to_end(key)
+                return entry
+            self._remove(key)
+        return None
+
+    def _store(self, base, request_headers, entry: CachedResponse):
+        self.vary[base] = entry.vary
+        key = self._key(base, request_headers)
+        self._remove(key)
+        self.entries[key] = entry
+        self.size += len(entry.body)
+        while self.size > self.max_bytes and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted.body)
+            self.evictions += 1
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry.body)
+
+    async def fetch(self, base, request_headers, load, default_ttl=0.0):
+        """Devuelve (entrada, estado) desde la caché, o (None, (réplica, respuesta))
+        cuando la respuesta no es cacheable y hay que transmitirla tal cual.
+
+        `load(validators)` hace la petición al upstream con headers condicionales
+        extra y devuelve (réplica, respuesta en streaming) como resilience.send.
+        """
+        key = self._key(base, request_headers)
+        entry = self._get(key)
+        if entry is not None and entry.fresh:
+            self.hits += 1
+            return entry, "HIT"
+        if entry is not None and entry.servable_stale and entry.ttl > 0:
+            self.stale += 1
+            if key not in self._refreshing:
+                self._refreshing.add(key)
+                asyncio.create_task(self._refresh(key, base, request_headers, entry, load, default_ttl))
+            return entry, "STALE"
+
+        if key in self._inflight:
+            self.coalesced += 1
+            shared = await asyncio.shield(self._inflight[key])
+            if shared is not None:
+                return shared
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            result = None
+            try:
+                result = await self._load(base, request_headers, entry, load, default_ttl)
+                return result
+            finally:
+                del self._inflight[key]
+                future.set_result(result if result is not None and result[0] is not None else None)
+
+        # El líder no pudo cachear: cada uno va al upstream por su cuenta
+        self.misses += 1
+        return None, await load({})
+
+    async def _load(self, base, request_headers, entry, load, default_ttl):
+        replica, response = await load(entry.validators() if entry is not None else {})
+        if response.status_code == 304 and entry is not None:
+            await resilience.close(replica, response)
+            policy = freshness(response.headers, default_ttl) or freshness(httpx.Headers(entry.headers), default_ttl)
+            entry.refresh(*(policy or (0.0, 0.0)))
+            self.revalidated += 1
+            return entry, "REVALIDATED"
+
+        self.misses += 1
+        policy = freshness(response.headers, default_ttl)
+        length = response.headers.get("content-length")
+        if response.status_code != 200 or policy is None or length is None or int(length) > self.max_entry_bytes:
+            return None, (replica, response)
+        try:
+            body = b"".join([chunk async for chunk in response.aiter_raw()])
+        finally:
+            await resilience.close(replica, response)
+        entry = CachedResponse(response, body, *policy)
+        self._store(base, request_headers, entry)
+        return entry, "MISS"
+
+    async def _refresh(self, key, base, request_headers, entry, load, default_ttl):
+        try:
+            result = await self._load(base, request_headers, entry, load, default_ttl)
+            if result[0] is None:
+                # Dejó de ser cacheable: se descarta la respuesta y la entrada
+                await resilience.close(*result[1])
+                self._remove(key)
+        except Exception as e:
+            logger.warning(f"No se pudo revalidar {base}: {str(e)}")
+        finally:
+            self._refreshing.discard(key)
+
+    def invalidate(self, service: str, path: str):
+        """Descarta las entradas del recurso y de su colección (p.ej. products/5
+        y products/) tras un POST/PUT/PATCH/DELETE exitoso (RFC 9111 §4.4)."""
+        target = path.strip("/")
+        paths = {target, target.rpartition("/")[0]}
+        for key in [key for key in self.entries if key[0][0] == service and key[0][1].strip("/") in paths]:
+            self._remove(key)
+            self.vary.pop(key[0], None)
+            self.invalidations += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.vary.clear()
+        self.size = 0
+
+    def stats(self):
+        return {
+            "enabled": GATEWAY_CACHE,
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "revalidated": self.revalidated,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+gateway_cache = GatewayCache()
@@ -0,0 +1,68 @@
+import os
+import time
+from upstreams import upstreams
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                               Histogram, generate_latest, multiprocess)
+
+# Con varios workers, PROMETHEUS_MULTIPROC_DIR hace que cada proceso escriba sus
+# métricas en archivos mmap propios y /metrics los agrega al exportar
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+METRICS_ENABLED = os.getenv("METRICS", "true").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUESTS = Counter("gateway_requests_total", "Peticiones HTTP al orquestrador",
+                   ["method", "route", "service", "status"])
+REQUEST_LATENCY = Histogram("gateway_request_duration_seconds", "Latencia total en el orquestrador",
+                            ["method", "route", "service"], buckets=LATENCY_BUCKETS)
+IN_FLIGHT = Gauge("gateway_requests_in_flight", "Peticiones en curso", multiprocess_mode="livesum")
+UPSTREAM_LATENCY = Histogram("upstream_response_seconds", "Tiempo hasta los headers del upstream por intento",
+                             ["service"], buckets=LATENCY_BUCKETS)
+UPSTREAM_ATTEMPTS = Counter("upstream_attempts_total", "Intentos al upstream por resultado",
+                            ["service", "outcome"])
+
+
+class MetricsMiddleware:
+    """Contador y latencia por ruta y servicio, y gauge de peticiones en curso.
+    La latencia llega hasta el último chunk (incluye el streaming del body)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            # El nombre viene del cliente: solo los servicios configurados son label,
+            # si no cada /api/<lo-que-sea>/ crearía series nuevas
+            service = scope.get("path_params", {}).get("service", "")
+            if service and service not in upstreams:
+                service = "unknown"
+            REQUESTS.labels(scope["method"], path, service, str(status)).inc()
+            REQUEST_LATENCY.labels(scope["method"], path, service).observe(time.perf_counter() - start)
+
+
+def render_metrics():
+    """(body, content type) en formato de exposición de Prometheus."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,22 +1,46 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 import httpx
 import logging
 import json
+import math
+import os
+from upstreams import upstreams
+from resilience import CircuitOpenError, resilience, route_timeout
+from routing import classify, content_type_for, rewrite_swagger_html
+from gateway_cache import GATEWAY_CACHE, GATEWAY_STATIC_TTL, gateway_cache
+from access_log import ACCESS_LOG, AccessLogMiddleware, access_log, trace_timings
+from metrics import METRICS_ENABLED, MetricsMiddleware, render_metrics
+from ratelimit import MAX_CONCURRENCY, RATE_LIMIT_BACKEND, AdmissionMiddleware, admission_stats
 
 #Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+#Microservicios: replica sets con balanceo y health checks (ver upstreams.py)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await upstreams.start()
+    if ACCESS_LOG:
+        access_log.start()
+    yield
+    await upstreams.stop()
+    access_log.stop()
+
 app = FastAPI(
     title="Orquestrador de Microservicios",
     version="1.0.0",
     description="Orquestrador que redirige peticiones a microservicios",
-    redirect_slashes=False
+    redirect_slashes=False,
+    lifespan=lifespan
 )
 
-# Configurar CORS
+# Rate limit por IP y por servicio + límite de concurrencia, antes de tocar el upstream
+app.add_middleware(AdmissionMiddleware)
+
+# Configurar CORS (por fuera de la admisión: los 429/503 también llevan sus headers)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # En producción, especifica los dominios exactos
@@ -25,194 +49,282 @@ app.add_middleware(
     allow_headers=["*"],  # Todos los headers
 )
 
-#Microservicios config
-MICROSERVICES = {
-    "orders":    "http://maki_api:8000",
-    "inventory": "http://inventory-service:4000",
-    "menu":      "http://menu_service:8080"
-}
+# Métricas Prometheus por ruta y servicio
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Access log JSON (el más externo, para medir también CORS)
+app.add_middleware(AccessLogMiddleware)
 
 @app.get("/")
 async def health_check():
-    """Health check del orquestrador"""
+    """Health check del orquestrador.
+
+    Usa el estado que ya mantienen los health checks activos de upstreams.py:
+    un probe nunca genera llamadas a los microservicios.
+    """
+    services = {name: upstreams[name].healthy for name in upstreams.keys()}
     return {
-        "status": "healthy", 
+        "status": "healthy" if all(services.values()) else "degraded",
         "service": "orquestrador",
-        "microservices": list(MICROSERVICES.keys())
+        "microservices": list(services),
+        "upstreams": services
     }
 
-# Rutas específicas para archivos estáticos de Swagger
-@app.get("/api/{service}/static/{file_path:path}")
-async def static_files_fastapi(service: str, file_path: str, request: Request):
-    """Maneja archivos estáticos de FastAPI Swagger UI"""
-    if service not in MICROSERVICES:
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/admin/upstreams")
+async def upstreams_status():
+    """Estado de las réplicas de cada microservicio"""
+    return upstreams.status()
+
+@app.post("/admin/reload")
+async def reload_upstreams():
+    """Recarga MICROSERVICES_CONFIG sin reiniciar"""
+    try:
+        await upstreams.reload()
+    except (OSError, ValueError) as e:
+        raise HTTPException(400, f"Configuración inválida: {str(e)}")
+    return upstreams.status()
+
+@app.get("/admin/resilience")
+async def resilience_status():
+    """Circuit breakers, presupuesto de reintentos, latencias y contadores por servicio"""
+    return resilience.status()
+
+@app.get("/admin/access-log")
+async def access_log_status():
+    """Registros escritos, descartados por backpressure y omitidos por muestreo"""
+    return access_log.stats()
+
+@app.get("/admin/admission")
+async def admission_status():
+    """Peticiones rechazadas por rate limit o por concurrencia"""
+    return {"backend": RATE_LIMIT_BACKEND, "max_concurrency": MAX_CONCURRENCY or None, **admission_stats}
+
+@app.get("/admin/cache")
+async def cache_status():
+    """Estadísticas de la caché de respuestas del orquestrador"""
+    return gateway_cache.stats()
+
+@app.delete("/admin/cache")
+async def purge_cache():
+    """Vacía la caché de respuestas"""
+    gateway_cache.clear()
+    return gateway_cache.stats()
+
+# Métodos que no modifican el recurso: el resto invalida la caché (RFC 9111 §4.4)
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS", "TRACE"}
+
+def cacheable_request(request: Request, has_body: bool) -> bool:
+    # Las peticiones autenticadas o que piden explícitamente no usar caché van directo
+    if request.method != "GET" or has_body or not GATEWAY_CACHE or "authorization" in request.headers:
+        return False
+    cache_control = request.headers.get("cache-control", "")
+    return "no-cache" not in cache_control and "no-store" not in cache_control
+
+def without_conditionals(headers) -> dict:
+    # Al revalidar una entrada se usan sus validadores; los del cliente se responden desde la entrada
+    return {k: v for k, v in headers.items() if k.lower() not in ("if-none-match", "if-modified-since")}
+
+def cached_response(entry, state: str, request: Request) -> Response:
+    headers = [(k, v) for k, v in entry.headers if k.lower() != "content-length"]
+    headers += [("age", str(int(entry.age))), ("x-cache", state)]
+    if_none_match = request.headers.get("if-none-match")
+    if entry.etag and if_none_match and entry.etag.removeprefix("W/") in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]:
+        response = Response(status_code=304)
+        response.raw_headers = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers
+                                if k.lower() in ("etag", "cache-control", "last-modified", "vary", "age", "x-cache")]
+        return response
+    response = Response(content=entry.body, status_code=entry.status_code)
+    response.raw_headers += [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+    return response
+
+async def fetch_static(service: str, upstream_path: str, request: Request):
+    """(status, headers, body crudo) de un estático, pasando por la caché de respuestas"""
+    async def load(validators):
+        return await resilience.send(
+            service, upstreams[service],
+            lambda replica: replica.client.build_request("GET", upstream_path, headers=validators),
+            idempotent=True, timeout=route_timeout(service, upstream_path.lstrip("/"))
+        )
+    
+    if cacheable_request(request, has_body=False):
+        entry, result = await gateway_cache.fetch((service, upstream_path, ""), {}, load,
+                                                  default_ttl=GATEWAY_STATIC_TTL)
+        if entry is not None:
+            return entry.status_code, entry.headers, entry.body
+        replica, response = result
+    else:
+        replica, response = await load({})
+    try:
+        body = b"".join([chunk async for chunk in response.aiter_raw()])
+    finally:
+        await resilience.close(replica, response)
+    return response.status_code, response.headers.multi_items(), body
+
+# Headers del upstream que no se copian en los estáticos
+STATIC_SKIP_HEADERS = frozenset(['content-length', 'transfer-encoding', 'connection', 'server'])
+
+async def static_file(service: str, prefix: str, file_path: str, request: Request, framework: str):
+    if service not in upstreams:
         raise HTTPException(404, f"Microservicio '{service}' no encontrado")
     
-    target_url = f"{MICROSERVICES[service]}/static/{file_path}"
-    logger.info(f"Archivo estático FastAPI: {request.url} → {target_url}")
+    access = access_record(request)
+    if access is not None:
+        access["service"] = service
     
     try:
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            response = await client.get(target_url)
-            
-            clean_headers = {k: v for k, v in response.headers.items() 
-                            if k.lower() not in ['content-length', 'transfer-encoding', 'connection', 'server']}
-            
-            # Determinar Content-Type correcto basado en la extensión
-            content_type = 'application/octet-stream'
-            if file_path.lower().endswith('.css'):
-                content_type = 'text/css'
-            elif file_path.lower().endswith('.js'):
-                content_type = 'application/javascript'
-            elif file_path.lower().endswith('.png'):
-                content_type = 'image/png'
-            elif file_path.lower().endswith('.ico'):
-                content_type = 'image/x-icon'
-            elif file_path.lower().endswith('.svg'):
-                content_type = 'image/svg+xml'
-            elif file_path.lower().endswith(('.woff', '.woff2')):
-                content_type = 'font/woff2' if file_path.lower().endswith('.woff2') else 'font/woff'
-            
-            return Response(
-                content=response.content,
-                status_code=response.status_code,
-                headers=clean_headers,
-                media_type=content_type
-            )
+        status_code, headers, body = await fetch_static(service, f"/{prefix}/{file_path}", request)
+        return Response(
+            content=body,
+            status_code=status_code,
+            headers={k: v for k, v in headers if k.lower() not in STATIC_SKIP_HEADERS},
+            media_type=content_type_for(file_path)
+        )
     except Exception as e:
-        logger.error(f"Error cargando archivo estático FastAPI: {str(e)}")
+        logger.error(f"Error cargando archivo estático {framework}: {str(e)}")
         raise HTTPException(404, f"Archivo estático no encontrado")
 
+# Rutas específicas para archivos estáticos de Swagger
+@app.get("/api/{service}/static/{file_path:path}")
+async def static_files_fastapi(service: str, file_path: str, request: Request):
+    """Maneja archivos estáticos de FastAPI Swagger UI"""
+    return await static_file(service, "static", file_path, request, "FastAPI")
+
 @app.get("/api/{service}/webjars/{file_path:path}")
 async def static_files_springboot(service: str, file_path: str, request: Request):
     """Maneja archivos estáticos de Spring Boot Swagger UI"""
-    if service not in MICROSERVICES:
-        raise HTTPException(404, f"Microservicio '{service}' no encontrado")
-    
-    target_url = f"{MICROSERVICES[service]}/webjars/{file_path}"
-    logger.info(f"Archivo estático Spring Boot: {request.url} → {target_url}")
-    
+    return await static_file(service, "webjars", file_path, request, "Spring Boot")
+
+def access_record(request: Request):
+    """Registro del access log de esta petición (None si está desactivado)"""
+    return request.scope.get("state", {}).get("access")
+
+# Headers hop-by-hop (RFC 7230 §6.1): no se reenvían en ninguna dirección
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade",
+}
+
+def forward_request_headers(request: Request) -> dict:
+    # Host lo fija httpx según el upstream
+    return {k: v for k, v in request.headers.items()
+            if k.lower() not in HOP_BY_HOP_HEADERS and k.lower() != "host"}
+
+def forward_response_headers(response: httpx.Response) -> list:
+    # Se copian tal cual (incluidos Content-Length y Content-Encoding: el body va en crudo)
+    return [(k, v) for k, v in response.headers.multi_items() if k.lower() not in HOP_BY_HOP_HEADERS]
+
+async def stream_body(response: httpx.Response, replica):
+    # aclose también si el cliente se desconecta a mitad: libera la conexión del pool
     try:
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            response = await client.get(target_url)
-            
-            clean_headers = {k: v for k, v in response.headers.items() 
-                            if k.lower() not in ['content-length', 'transfer-encoding', 'connection', 'server']}
-            
-            # Determinar Content-Type correcto basado en la extensión
-            content_type = 'application/octet-stream'
-            if file_path.lower().endswith('.css'):
-                content_type = 'text/css'
-            elif file_path.lower().endswith('.js'):
-                content_type = 'application/javascript'
-            elif file_path.lower().endswith('.png'):
-                content_type = 'image/png'
-            elif file_path.lower().endswith('.ico'):
-                content_type = 'image/x-icon'
-            elif file_path.lower().endswith('.svg'):
-                content_type = 'image/svg+xml'
-            elif file_path.lower().endswith(('.woff', '.woff2')):
-                content_type = 'font/woff2' if file_path.lower().endswith('.woff2') else 'font/woff'
-            
-            return Response(
-                content=response.content,
-                status_code=response.status_code,
-                headers=clean_headers,
-                media_type=content_type
-            )
-    except Exception as e:
-        logger.error(f"Error cargando archivo estático Spring Boot: {str(e)}")
-        raise HTTPException(404, f"Archivo estático no encontrado")
+        async for chunk in response.aiter_raw():
+            yield chunk
+    finally:
+        replica.outstanding -= 1
+        await response.aclose()
 
 @app.api_route("/api/{service}/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
 async def redirect_request(service: str, path: str, request: Request):
-    """Redirige peticiones a microservicios específicos"""
+    """Redirige peticiones a microservicios específicos.
+
+    Proxy en streaming: el body de la petición y el de la respuesta pasan por
+    chunks sin bufferizar ni decodificar, conservando status, headers y
+    Content-Encoding del upstream. La única excepción es el HTML de Swagger,
+    que se reescribe para que sus estáticos pasen por el orquestrador.
+    """
     
-    if service not in MICROSERVICES:
+    if service not in upstreams:
         logger.warning(f"Microservicio '{service}' no encontrado")
         raise HTTPException(404, f"Microservicio '{service}' no encontrado")
     
-    target_url = f"{MICROSERVICES[service]}/{path}"
-    logger.info(f"Redirigiendo {request.method} {request.url} → {target_url}")
+    has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+    request_headers = forward_request_headers(request)
+    timeout = route_timeout(service, path)
+    route = classify(path)
+    
+    access = access_record(request)
+    if access is not None:
+        access["service"] = service
+    
+    def build(replica, headers=request_headers):
+        if access is not None:
+            access["upstream"] = replica.url
+        return replica.client.build_request(
+            method=request.method,
+            url=f"/{path}",
+            params=request.query_params.multi_items(),
+            headers=headers,
+            content=request.stream() if has_body else None,
+            timeout=timeout,
+            extensions={"trace": trace_timings(access)} if access is not None else None
+        )
+    
+    async def load(validators):
+        headers = {**without_conditionals(request_headers), **validators} if validators else request_headers
+        return await resilience.send(service, upstreams[service], lambda replica: build(replica, headers),
+                                     idempotent=True, timeout=timeout)
     
     try:
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            response = await client.request(
-                method=request.method,
-                url=target_url,
-                headers=dict(request.headers),
-                content=await request.body()
+        if cacheable_request(request, has_body):
+            # Estáticos de Swagger sin Cache-Control del upstream se cachean GATEWAY_STATIC_TTL
+            default_ttl = GATEWAY_STATIC_TTL if route.static else 0.0
+            entry, result = await gateway_cache.fetch((service, path, request.url.query), request.headers,
+                                                      load, default_ttl=default_ttl)
+            if access is not None:
+                access["cache"] = result if entry is not None else "MISS"
+            if entry is not None:
+                return cached_response(entry, result, request)
+            replica, response = result
+        else:
+            replica, response = await resilience.send(
+                service, upstreams[service], build,
+                idempotent=request.method == "GET" and not has_body,
+                timeout=timeout
             )
-            
-            logger.info(f"Respuesta de {service}: {response.status_code}")
-            
-            # Limpiar headers problemáticos para todas las respuestas
-            clean_headers = {k: v for k, v in response.headers.items() 
-                            if k.lower() not in ['content-length', 'transfer-encoding', 'connection', 'server']}
-            
-            # Para archivos estáticos (CSS, JS, imágenes, fuentes) - SOLUCIÓN CRÍTICA
-            if any(ext in path.lower() for ext in ['.css', '.js', '.png', '.ico', '.svg', '.woff', '.woff2', '.ttf']):
-                # Determinar Content-Type correcto basado en la extensión
-                content_type = 'application/octet-stream'
-                if path.lower().endswith('.css'):
-                    content_type = 'text/css'
-                elif path.lower().endswith('.js'):
-                    content_type = 'application/javascript'
-                elif path.lower().endswith('.png'):
-                    content_type = 'image/png'
-                elif path.lower().endswith('.ico'):
-                    content_type = 'image/x-icon'
-                elif path.lower().endswith('.svg'):
-                    content_type = 'image/svg+xml'
-                elif path.lower().endswith(('.woff', '.woff2')):
-                    content_type = 'font/woff2' if path.lower().endswith('.woff2') else 'font/woff'
-                
-                return Response(
-                    content=response.content,
-                    status_code=response.status_code,
-                    headers=clean_headers,
-                    media_type=content_type
-                )
-            
-            # Para archivos OpenAPI JSON
-            if "openapi.json" in path or "api-docs" in path:
-                return response.json()
-            
-            # Para endpoints de documentación (Swagger), devolver HTML
-            if "docs" in path or "swagger" in path:
-                # Modificar el HTML para que los archivos estáticos apunten al orquestrador
-                html_content = response.text
-                
-                # Reemplazar rutas de archivos estáticos para que apunten al orquestrador
-                if service == "orders":  # FastAPI
-                    html_content = html_content.replace('/static/', f'/api/{service}/static/')
-                elif service == "inventory":  # NestJS
-                    html_content = html_content.replace('/docs/', f'/api/{service}/docs/')
-                elif service == "menu":  # Spring Boot
-                    html_content = html_content.replace('/webjars/', f'/api/{service}/webjars/')
-                
-                return HTMLResponse(
-                    content=html_content,
-                    status_code=response.status_code,
-                    headers=clean_headers
-                )
-            
-            # Para otros endpoints, intentar JSON primero
-            try:
-                return response.json()
-            except:
-                # Si no es JSON válido, devolver texto
-                return response.text
-            
+            if request.method not in SAFE_METHODS and response.status_code < 400:
+                gateway_cache.invalidate(service, path)
+    except CircuitOpenError as e:
+        logger.warning(str(e))
+        raise HTTPException(503, f"Microservicio {service} no disponible",
+                            headers={"Retry-After": str(math.ceil(e.retry_after) or 1)})
     except httpx.TimeoutException:
         logger.error(f"Timeout al conectar con {service}")
         raise HTTPException(504, f"Timeout al conectar con {service}")
-    except httpx.ConnectError:
+    except httpx.TransportError:
         logger.error(f"Microservicio {service} no disponible")
         raise HTTPException(503, f"Microservicio {service} no disponible")
     except Exception as e:
         logger.error(f"Error inesperado: {str(e)}")
         raise HTTPException(500, f"Error interno del servidor")
+    
+    # Para endpoints de documentación (Swagger), reescribir el HTML
+    is_html = response.headers.get("content-type", "").startswith("text/html")
+    if is_html and route.docs:
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+            replica.outstanding -= 1
+        headers = {k: v for k, v in response.headers.items()
+                   if k.lower() not in HOP_BY_HOP_HEADERS
+                   and k.lower() not in ('content-length', 'content-encoding', 'server')}
+        return HTMLResponse(
+            content=rewrite_swagger_html(service, path, response.status_code, response.headers,
+                                         lambda: response.text),
+            status_code=response.status_code,
+            headers=headers
+        )
+    
+    proxied = StreamingResponse(stream_body(response, replica), status_code=response.status_code)
+    # Reemplazar los headers por defecto con los del upstream (se permiten repetidos, p.ej. Set-Cookie)
+    proxied.raw_headers = [(k.lower().encode("latin-1"), v.encode("latin-1"))
+                           for k, v in forward_response_headers(response)]
+    return proxied
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from collections import Counter, OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Token bucket por IP de cliente: peticiones/segundo y ráfaga (0 = sin límite)
+RATE_LIMIT_IP = float(os.getenv("RATE_LIMIT_IP", "0"))
+RATE_LIMIT_IP_BURST = float(os.getenv("RATE_LIMIT_IP_BURST", str(RATE_LIMIT_IP * 2)))
+# Token bucket por microservicio, protege al upstream: '{"orders": [300, 600]}' (rate, ráfaga)
+RATE_LIMIT_SERVICES = json.loads(os.getenv("RATE_LIMIT_SERVICES", "{}"))
+# Usar el primer X-Forwarded-For como IP (solo detrás de un proxy de confianza)
+TRUST_FORWARDED = os.getenv("TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
+# memory | redis (compartido entre réplicas del orquestrador, requiere el paquete redis)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+
+# Peticiones proxied en curso por worker; las que sobran esperan hasta
+# ADMISSION_QUEUE_TIMEOUT y si no hay lugar reciben 503 (0 = sin límite)
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "0"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "0.1"))
+
+
+class MemoryLimiterBackend:
+    """Buckets en memoria del worker (el event loop es de un solo hilo: sin lock)."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, último refill)
+
+    async def take(self, key, rate, burst):
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - last) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+
+_TOKEN_BUCKET_LUA = """
+local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or burst
+local ts = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisLimiterBackend:
+    """Buckets compartidos entre réplicas: el refill y el consumo son atómicos (Lua).
+
+    Si Redis no responde se deja pasar la petición (fail open).
+    """
+
+    def __init__(self, url):
+        import redis.asyncio as redis
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(_TOKEN_BUCKET_LUA)
+
+    async def take(self, key, rate, burst):
+        try:
+            allowed, tokens = await self._script(keys=[f"maki:ratelimit:{key}"], args=[rate, burst, time.time()])
+        except Exception as e:
+            logger.warning(f"Rate limiter sin Redis, se deja pasar: {str(e)}")
+            return True, 0.0
+        return bool(allowed), 0.0 if allowed else (1 - float(tokens)) / rate
+
+
+def get_limiter_backend():
+    if RATE_LIMIT_BACKEND == "redis":
+        return RedisLimiterBackend(RATE_LIMIT_REDIS_URL)
+    return MemoryLimiterBackend()
+
+
+# Contadores del worker (el middleware lo instancia Starlette, no queda a mano)
+admission_stats = Counter()
+
+
+def client_ip(scope) -> str:
+    if TRUST_FORWARDED:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+async def _reject(send, status, detail, retry_after):
+    body = json.dumps({"detail": detail}).encode()
+    await send({"type": "http.response.start", "status": status, "headers": [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+    ]})
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """Control de admisión para /api/: rate limit por IP (429), por servicio (503)
+    y límite global de concurrencia (503), todos con Retry-After.
+
+    El cupo de concurrencia se libera al enviar el último chunk, así que las
+    respuestas en streaming lo ocupan mientras duran.
+    """
+
+    def __init__(self, app, backend=None):
+        self.app = app
+        self.backend = backend or get_limiter_backend()
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENCY) if MAX_CONCURRENCY > 0 else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            return await self.app(scope, receive, send)
+
+        if RATE_LIMIT_IP > 0:
+            allowed, retry_after = await self.backend.take(f"ip:{client_ip(scope)}", RATE_LIMIT_IP,
+                                                           RATE_LIMIT_IP_BURST)
+            if not allowed:
+                admission_stats["limited_ip"] += 1
+                return await _reject(send, 429, "Demasiadas peticiones", retry_after)
+
+        service = scope["path"].split("/", 3)[2]
+        if service in RATE_LIMIT_SERVICES:
+            rate, burst = RATE_LIMIT_SERVICES[service]
+            allowed, retry_after = await self.backend.take(f"service:{service}", rate, burst)
+            if not allowed:
+                admission_stats["limited_service"] += 1
+                return await _reject(send, 503, f"Microservicio {service} saturado", retry_after)
+
+        if self.semaphore is None:
+            return await self.app(scope, receive, send)
+        if self.semaphore.locked():
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), ADMISSION_QUEUE_TIMEOUT)
+            except asyncio.TimeoutError:
+                admission_stats["shed"] += 1
+                return await _reject(send, 503, "Orquestrador saturado", 1)
+        else:
+            await self.semaphore.acquire()
+        admission_stats["in_flight"] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_stats["in_flight"] -= 1
+            self.semaphore.release()
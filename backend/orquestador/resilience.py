@@ -0,0 +1,313 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter, deque
+import httpx
+from upstreams import UPSTREAM_TIMEOUT, Replica, ReplicaSet
+from metrics import METRICS_ENABLED, UPSTREAM_ATTEMPTS, UPSTREAM_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# Timeout hasta recibir los headers del upstream, por "servicio/ruta" (gana el
+# prefijo más largo). Ej: ROUTE_TIMEOUTS='{"orders": 5, "orders/orders/batch": 60}'
+ROUTE_TIMEOUTS = json.loads(os.getenv("ROUTE_TIMEOUTS", "{}"))
+
+# Circuit breaker: se abre si en las últimas BREAKER_WINDOW llamadas (mínimo
+# BREAKER_MIN_CALLS) fallan al menos BREAKER_FAILURE_RATIO; tras BREAKER_COOLDOWN
+# segundos deja pasar una llamada de prueba (half-open)
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+BREAKER_FAILURE_RATIO = float(os.getenv("BREAKER_FAILURE_RATIO", "0.5"))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "10"))
+
+# Reintentos solo para GET/HEAD sin body. Cada petición deposita RETRY_BUDGET_RATIO
+# tokens y cada reintento (o hedge) gasta uno: como mucho ~20% de carga extra
+RETRY_MAX = int(os.getenv("RETRY_MAX", "2"))
+RETRY_BACKOFF = float(os.getenv("RETRY_BACKOFF", "0.05"))
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+RETRY_BUDGET_MAX = float(os.getenv("RETRY_BUDGET_MAX", "10"))
+RETRYABLE_STATUS = {502, 503, 504}
+
+# Hedging: si el primer intento no respondió tras el p95 del servicio, se lanza
+# un segundo a otra réplica y gana el primero que responda
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.01"))
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "0.1"))
+LATENCY_SAMPLES = 200
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, service: str, retry_after: float):
+        super().__init__(f"Circuit breaker abierto para {service}")
+        self.service = service
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, name: str):
+        self.name = name
+        self.state = "closed"
+        self.outcomes = deque(maxlen=BREAKER_WINDOW)
+        self.opened_at = 0.0
+        self.probe_at = None
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < BREAKER_COOLDOWN:
+                return False
+            self.state = "half_open"
+            self.probe_at = None
+        # half_open: una sola llamada de prueba a la vez (si se cancela sin
+        # registrar resultado, se permite otra tras el cooldown)
+        now = time.monotonic()
+        if self.probe_at is not None and now - self.probe_at < BREAKER_COOLDOWN:
+            return False
+        self.probe_at = now
+        return True
+
+    def record(self, ok: bool):
+        if self.state == "half_open":
+            self.probe_at = None
+            if ok:
+                self.state = "closed"
+                self.outcomes.clear()
+                logger.info(f"Circuit breaker de {self.name} cerrado")
+            else:
+                self._open()
+            return
+        if self.state == "open":
+            return
+        self.outcomes.append(ok)
+        failures = self.outcomes.count(False)
+        if len(self.outcomes) >= BREAKER_MIN_CALLS and failures / len(self.outcomes) >= BREAKER_FAILURE_RATIO:
+            self._open()
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        logger.warning(f"Circuit breaker de {self.name} abierto")
+
+    def retry_after(self) -> float:
+        return max(0.0, BREAKER_COOLDOWN - (time.monotonic() - self.opened_at))
+
+
+class RetryBudget:
+    def __init__(self):
+        self.tokens = RETRY_BUDGET_MAX
+
+    def deposit(self):
+        self.tokens = min(RETRY_BUDGET_MAX, self.tokens + RETRY_BUDGET_RATIO)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class LatencyTracker:
+    def __init__(self):
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def quantile(self, q: float):
+        if len(self.samples) < 20:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+class ServicePolicy:
+    """Breaker, presupuesto de reintentos, latencias y contadores de un servicio."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(name)
+        self.budget = RetryBudget()
+        self.latency = LatencyTracker()
+        self.metrics = Counter()
+
+    def hedge_delay(self) -> float:
+        p95 = self.latency.quantile(0.95)
+        return HEDGE_DEFAULT_DELAY if p95 is None else max(HEDGE_MIN_DELAY, p95)
+
+    def status(self):
+        p50, p95 = self.latency.quantile(0.50), self.latency.quantile(0.95)
+        return {
+            "breaker": self.breaker.state,
+            "retry_tokens": round(self.budget.tokens, 2),
+            "latency_p50_ms": None if p50 is None else round(p50 * 1000, 2),
+            "latency_p95_ms": None if p95 is None else round(p95 * 1000, 2),
+            "hedge_delay_ms": round(self.hedge_delay() * 1000, 2),
+            **self.metrics,
+        }
+
+
+def route_timeout(service: str, path: str) -> float:
+    route = f"{service}/{path}"
+    best = None
+    for prefix in ROUTE_TIMEOUTS:
+        if (route == prefix or route.startswith(prefix.rstrip("/") + "/")) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return float(ROUTE_TIMEOUTS[best]) if best is not None else UPSTREAM_TIMEOUT
+
+
+def _failed(response: httpx.Response) -> bool:
+    return response.status_code in RETRYABLE_STATUS
+
+
+class Resilience:
+    """Envía peticiones a un replica set con breaker, timeout, reintentos y hedging.
+
+    `send` devuelve (réplica, respuesta en streaming). La respuesta sigue
+    contando en `replica.outstanding` hasta que quien llama la cierra.
+    """
+
+    def __init__(self):
+        self.policies: dict[str, ServicePolicy] = {}
+
+    def policy(self, service: str) -> ServicePolicy:
+        if service not in self.policies:
+            self.policies[service] = ServicePolicy(service)
+        return self.policies[service]
+
+    async def send(self, service: str, replica_set: ReplicaSet, build, idempotent: bool, timeout: float):
+        """`build(replica)` crea el httpx.Request para esa réplica.
+
+        Solo las peticiones idempotentes sin body se reintentan o se duplican
+        (hedging), porque son las únicas que se pueden reconstruir.
+        """
+        policy = self.policy(service)
+        if not policy.breaker.allow():
+            policy.metrics["rejected"] += 1
+            raise CircuitOpenError(service, policy.breaker.retry_after())
+        policy.metrics["requests"] += 1
+        policy.budget.deposit()
+
+        tried = []
+        replica = response = error = None
+        attempts = 1 + RETRY_MAX if idempotent else 1
+        for attempt in range(attempts):
+            if attempt:
+                if policy.breaker.state == "open":
+                    break
+                if not policy.budget.withdraw():
+                    policy.metrics["retries_denied"] += 1
+                    break
+                policy.metrics["retries"] += 1
+                if response is not None:
+                    await self.close(replica, response)
+                await asyncio.sleep(RETRY_BACKOFF * attempt)
+            try:
+                if idempotent and replica_set.hedge and len(replica_set.replicas) > 1:
+                    replica, response = await self._hedged(policy, replica_set, build, timeout, tried)
+                else:
+                    replica = replica_set.pick(exclude=tried)
+                    tried.append(replica)
+                    response = await self._attempt(policy, replica, build(replica), timeout)
+            except httpx.TransportError as e:
+                replica, response, error = None, None, e
+            if response is not None and not _failed(response):
+                return replica, response
+        if response is None:
+            raise error
+        return replica, response
+
+    async def _attempt(self, policy: ServicePolicy, replica: Replica, request: httpx.Request, timeout: float):
+        replica.outstanding += 1
+        start = time.monotonic()
+        try:
+            try:
+                response = await asyncio.wait_for(replica.client.send(request, stream=True), timeout)
+            except asyncio.TimeoutError:
+                policy.metrics["timeouts"] += 1
+                raise httpx.ReadTimeout(f"Sin respuesta en {timeout}s", request=request)
+        except httpx.TransportError as e:
+            replica.outstanding -= 1
+            policy.metrics["failures"] += 1
+            if METRICS_ENABLED:
+                UPSTREAM_ATTEMPTS.labels(policy.name, type(e).__name__).inc()
+            policy.breaker.record(False)
+            if isinstance(e, httpx.ConnectError):
+                replica.record(False)
+            raise
+        except BaseException:
+            replica.outstanding -= 1
+            raise
+        elapsed = time.monotonic() - start
+        policy.latency.add(elapsed)
+        if _failed(response):
+            policy.metrics["failures"] += 1
+        if METRICS_ENABLED:
+            UPSTREAM_LATENCY.labels(policy.name).observe(elapsed)
+            UPSTREAM_ATTEMPTS.labels(policy.name, f"{response.status_code // 100}xx").inc()
+        policy.breaker.record(not _failed(response))
+        return response
+
+    async def _hedged(self, policy: ServicePolicy, replica_set: ReplicaSet, build, timeout: float, tried: list):
+        primary = replica_set.pick(exclude=tried)
+        tried.append(primary)
+        tasks = {asyncio.create_task(self._attempt(policy, primary, build(primary), timeout)): primary}
+        done, _ = await asyncio.wait(tasks, timeout=policy.hedge_delay())
+        if not done:
+            secondary = replica_set.pick(exclude=tried)
+            if secondary is not primary and policy.budget.withdraw():
+                tried.append(secondary)
+                policy.metrics["hedges"] += 1
+                tasks[asyncio.create_task(self._attempt(policy, secondary, build(secondary), timeout))] = secondary
+
+        pending = set(tasks)
+        winner = None
+        fallback = None  # respuesta 5xx o excepción, por si ningún intento sale bien
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        fallback = fallback or task.exception()
+                        continue
+                    candidate = (tasks[task], task.result())
+                    if winner is None and not _failed(candidate[1]):
+                        winner = candidate
+                    elif winner is not None or isinstance(fallback, tuple):
+                        await self.close(*candidate)
+                    else:
+                        fallback = candidate
+        finally:
+            for task in pending:
+                await self._discard(task, tasks[task])
+        if winner is not None:
+            if isinstance(fallback, tuple):
+                await self.close(*fallback)
+            if winner[0] is not primary:
+                policy.metrics["hedge_wins"] += 1
+            return winner
+        if isinstance(fallback, Exception):
+            raise fallback
+        return fallback
+
+    @staticmethod
+    async def close(replica: Replica, response: httpx.Response):
+        """Cierra una respuesta devuelta por `send` sin transmitirla."""
+        replica.outstanding -= 1
+        await response.aclose()
+
+    async def _discard(self, task: asyncio.Task, replica: Replica):
+        # El perdedor del hedge: si ya tenía respuesta se cierra, si no se cancela
+        task.cancel()
+        try:
+            response = await task
+        except (asyncio.CancelledError, httpx.TransportError):
+            return
+        await self.close(replica, response)
+
+    def status(self):
+        return {name: policy.status() for name, policy in self.policies.items()}
+
+
+resilience = Resilience()
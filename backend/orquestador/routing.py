@@ -0,0 +1,83 @@
+import re
+from collections import OrderedDict
+from functools import lru_cache
+
+# Content-Type de los estáticos de Swagger por extensión
+CONTENT_TYPES = {
+    "css": "text/css",
+    "js": "application/javascript",
+    "png": "image/png",
+    "ico": "image/x-icon",
+    "svg": "image/svg+xml",
+    "woff": "font/woff",
+    "woff2": "font/woff2",
+    "ttf": "font/ttf",
+    "map": "application/json",
+}
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+# Documentos de API que se cachean como estáticos aunque no tengan extensión conocida
+_SPEC_SUFFIXES = ("openapi.json", "api-docs")
+
+# Páginas de documentación cuyo HTML se reescribe (mismo criterio que antes: subcadena)
+_DOCS_PATH = re.compile(r"docs|swagger")
+
+# Reescritura del HTML de Swagger por servicio: prefijo de estáticos del framework
+SWAGGER_PREFIXES = {
+    "orders": "/static/",      # FastAPI
+    "inventory": "/docs/",     # NestJS
+    "menu": "/webjars/",       # Spring Boot
+}
+
+
+class Route:
+    """Clasificación de una ruta proxied, calculada una vez por ruta distinta."""
+
+    __slots__ = ("content_type", "static", "docs")
+
+    def __init__(self, path: str):
+        lowered = path.lower()
+        _, dot, extension = lowered.rpartition(".")
+        known = extension in CONTENT_TYPES if dot else False
+        self.content_type = CONTENT_TYPES[extension] if known else DEFAULT_CONTENT_TYPE
+        self.static = known or lowered.endswith(_SPEC_SUFFIXES)
+        self.docs = _DOCS_PATH.search(path) is not None
+
+
+@lru_cache(maxsize=4096)
+def classify(path: str) -> Route:
+    return Route(path)
+
+
+def content_type_for(file_path: str) -> str:
+    return classify(file_path).content_type
+
+
+SWAGGER_HTML_CACHE_MAX = 64
+_swagger_html: OrderedDict = OrderedDict()
+
+
+def rewrite_swagger_html(service: str, path: str, status: int, headers, html) -> bytes:
+    """Hace que los archivos estáticos de Swagger apunten al orquestrador.
+
+    El HTML de cada servicio casi nunca cambia, así que el resultado (ya en
+    UTF-8) se cachea por servicio, ruta y validador del upstream (ETag o
+    Content-Length). `html` es un callable que devuelve el body decodificado:
+    en un acierto ni se decodifica ni se recorre el body.
+    """
+    validator = headers.get("etag") or headers.get("content-length")
+    key = (service, path, status, validator)
+    if validator is not None and key in _swagger_html:
+        _swagger_html.move_to_end(key)
+        return _swagger_html[key]
+
+    content = html()
+    prefix = SWAGGER_PREFIXES.get(service)
+    if prefix is not None:
+        content = content.replace(prefix, f"/api/{service}{prefix}")
+    rewritten = content.encode("utf-8")
+    if validator is not None:
+        _swagger_html[key] = rewritten
+        if len(_swagger_html) > SWAGGER_HTML_CACHE_MAX:
+            _swagger_html.popitem(last=False)
+    return rewritten
@@ -0,0 +1,106 @@
+"""Microbenchmark del overhead por petición del orquestador.
+
+1. Clasificación de rutas: la lógica inline anterior (lower + cadena de
+   if/elif + subcadenas) contra la tabla precomputada de routing.py.
+2. Overhead de punta a punta: el orquestador en proceso con upstreams
+   en memoria (httpx.MockTransport), así solo se mide el trabajo del gateway.
+
+    python scripts/bench_gateway_overhead.py -n 5000
+
+Para comparar antes/después de punta a punta, correr el mismo script en
+ambos commits (la parte 2 solo usa la API HTTP del orquestador).
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import timeit
+
+os.environ.setdefault("GATEWAY_CACHE", "false")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+from orquestador import app
+from upstreams import parse_config, upstreams
+
+PATHS = [
+    "products/", "orders/1234", "docs", "openapi.json",
+    "swagger-ui/swagger-ui-bundle.js", "swagger-ui/index.css", "favicon.ico",
+]
+
+SWAGGER_HTML = ('<html><link href="/static/swagger-ui.css"><script src="/static/swagger-ui-bundle.js">'
+                '</script>' + "<div></div>" * 500 + "</html>").encode()
+PRODUCTS_JSON = b'[' + b','.join(b'{"id":%d,"name":"Roll","price":10.5,"calories":300}' % i
+                                 for i in range(50)) + b']'
+
+
+def legacy_classify(path):
+    # Como estaba antes: varias llamadas a lower() y la cadena de if/elif
+    content_type = 'application/octet-stream'
+    if path.lower().endswith('.css'):
+        content_type = 'text/css'
+    elif path.lower().endswith('.js'):
+        content_type = 'application/javascript'
+    elif path.lower().endswith('.png'):
+        content_type = 'image/png'
+    elif path.lower().endswith('.ico'):
+        content_type = 'image/x-icon'
+    elif path.lower().endswith('.svg'):
+        content_type = 'image/svg+xml'
+    elif path.lower().endswith(('.woff', '.woff2')):
+        content_type = 'font/woff2' if path.lower().endswith('.woff2') else 'font/woff'
+    static = path.lower().endswith(('.css', '.js', '.png', '.ico', '.svg', '.woff', '.woff2', '.map',
+                                    'openapi.json', 'api-docs'))
+    docs = "docs" in path or "swagger" in path
+    return content_type, static, docs
+
+
+def bench_classification(n):
+    from routing import classify
+    for path in PATHS:
+        route = classify(path)
+        assert legacy_classify(path) == (route.content_type, route.static, route.docs), path
+    legacy = timeit.timeit(lambda: [legacy_classify(p) for p in PATHS], number=n)
+    table = timeit.timeit(lambda: [classify(p) for p in PATHS], number=n)
+    per = lambda total: total / (n * len(PATHS)) * 1e9
+    print(f"clasificación   inline {per(legacy):8.0f} ns   tabla {per(table):8.0f} ns   "
+          f"{legacy / table:5.1f}x")
+
+
+def upstream(request):
+    if request.url.path == "/docs":
+        return httpx.Response(200, content=SWAGGER_HTML, headers={"content-type": "text/html"})
+    return httpx.Response(200, content=PRODUCTS_JSON, headers={"content-type": "application/json"})
+
+
+async def bench_gateway(n):
+    await upstreams.apply(parse_config({"orders": "http://orders"}))
+    for replica in upstreams["orders"].replicas:
+        replica.client = httpx.AsyncClient(base_url=replica.url, transport=httpx.MockTransport(upstream))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://orquestador") as client:
+        for label, path in (("JSON proxied", "/api/orders/products/"), ("Swagger HTML", "/api/orders/docs")):
+            for _ in range(200):
+                await client.get(path)
+            start = time.perf_counter()
+            for _ in range(n):
+                response = await client.get(path)
+            elapsed = time.perf_counter() - start
+            assert response.status_code == 200
+            print(f"{label:<15} {elapsed / n * 1e6:8.1f} µs/petición")
+    await upstreams.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=5000)
+    args = parser.parse_args()
+    bench_classification(args.n * 10)
+    asyncio.run(bench_gateway(args.n))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Pruebas de caos del orquestador: upstreams stub que inyectan fallos.
+
+Levanta servidores stub (errores 503, lentitud, colas de latencia, puertos
+cerrados), monta el orquestador en proceso contra ellos y verifica que
+reintentos, circuit breaker, timeouts por ruta y hedging se comporten como
+se espera. Termina con código 1 si algún escenario falla.
+
+    python scripts/chaos.py
+"""
+import asyncio
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+# La configuración de resilience se lee al importar: ajustarla antes
+os.environ.setdefault("ROUTE_TIMEOUTS", '{"timeout": 0.3}')
+os.environ.setdefault("BREAKER_MIN_CALLS", "5")
+os.environ.setdefault("BREAKER_COOLDOWN", "1")
+os.environ.setdefault("RETRY_BUDGET_MAX", "1000")
+os.environ.setdefault("RETRY_BUDGET_RATIO", "1")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+import uvicorn
+from orquestador import app
+from resilience import resilience
+from upstreams import parse_config, upstreams
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def stub_app(mode):
+    """ok | error (503 siempre) | slow (2s) | tail (3% de las respuestas tardan 1s)"""
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        if mode == "slow" or (mode == "tail" and random.random() < 0.03):
+            await asyncio.sleep(2 if mode == "slow" else 1)
+        status = 503 if mode == "error" else 200
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b'{"mode": "%s"}' % mode.encode()})
+    return app
+
+
+def start_stub(mode):
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(stub_app(mode), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+async def fire(client, service, n, concurrency=10):
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(f"/api/{service}/items")
+            results.append((response.status_code, time.perf_counter() - start))
+
+    await asyncio.gather(*(one() for _ in range(n)))
+    return results
+
+
+def p99(results):
+    latencies = sorted(latency for _, latency in results)
+    return latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+
+
+async def main():
+    ok, error, slow = start_stub("ok"), start_stub("error"), start_stub("slow")
+    tail_a, tail_b = start_stub("tail"), start_stub("tail")
+    closed = f"http://127.0.0.1:{free_port()}"
+
+    await upstreams.apply(parse_config({
+        "retry": {"replicas": [error, ok]},
+        "down": {"replicas": [closed, ok]},
+        "breaker": {"replicas": [error]},
+        "timeout": {"replicas": [slow]},
+        "hedge": {"replicas": [tail_a, tail_b], "hedge": True},
+        "nohedge": {"replicas": [tail_a, tail_b], "hedge": False},
+    }))
+
+    failures = []
+
+    def check(name, condition, detail):
+        print(f"{'ok' if condition else 'FAIL':<4} {name:<10} {detail}")
+        if not condition:
+            failures.append(name)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://orquestador", timeout=30) as client:
+        results = await fire(client, "retry", 50)
+        check("retry", all(status == 200 for status, _ in results),
+              f"200s={sum(s == 200 for s, _ in results)}/50 retries={resilience.policy('retry').metrics['retries']}")
+
+        results = await fire(client, "down", 50)
+        check("down", all(status == 200 for status, _ in results),
+              f"200s={sum(s == 200 for s, _ in results)}/50 con una réplica caída")
+
+        results = await fire(client, "breaker", 40, concurrency=1)
+        rejected = resilience.policy("breaker").metrics["rejected"]
+        check("breaker", rejected > 0 and results[-1][1] < 0.05,
+              f"rechazadas={rejected} última={results[-1][1] * 1000:.1f}ms")
+
+        results = await fire(client, "timeout", 5)
+        check("timeout", all(status == 504 and latency < 1.5 for status, latency in results),
+              f"status={sorted({s for s, _ in results})} máx={max(l for _, l in results):.2f}s")
+
+        # Calentar el p95 de ambos servicios antes de medir la cola
+        await fire(client, "hedge", 50)
+        await fire(client, "nohedge", 50)
+        hedged = await fire(client, "hedge", 300, concurrency=20)
+        plain = await fire(client, "nohedge", 300, concurrency=20)
+        check("hedge", p99(hedged) < p99(plain) / 2,
+              f"p99 con hedging={p99(hedged) * 1000:.0f}ms sin={p99(plain) * 1000:.0f}ms "
+              f"hedges={resilience.policy('hedge').metrics['hedges']}")
+
+    await upstreams.stop()
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+"""Prueba de carga del orquestador: latencia y RPS con N clientes concurrentes.
+
+Para comparar antes/después, levantar ambas versiones y pasar las dos URLs:
+
+    python scripts/loadtest.py --target antes=http://localhost:5001 \
+        --target despues=http://localhost:5000 --path /api/orders/products/ -c 500
+"""
+import argparse
+import asyncio
+import time
+import httpx
+
+
+async def run_load(base_url, path, concurrency, duration):
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    deadline = time.perf_counter() + duration
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    await response.aread()
+                    if response.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    pct = lambda q: latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000
+    return {"rps": len(latencies) / elapsed, "p50": pct(0.50), "p95": pct(0.95),
+            "p99": pct(0.99), "requests": len(latencies), "errors": errors}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", action="append", default=[],
+                        help="nombre=url (repetible); por defecto http://localhost:5000")
+    parser.add_argument("--path", default="/api/orders/products/")
+    parser.add_argument("-c", "--concurrency", type=int, default=500)
+    parser.add_argument("-d", "--duration", type=float, default=30.0, help="segundos por target")
+    args = parser.parse_args()
+
+    targets = [t.split("=", 1) for t in args.target] or [["gateway", "http://localhost:5000"]]
+    print(f"{'target':<10} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'reqs':>8} {'errores':>8}")
+    for name, url in targets:
+        r = await run_load(url, args.path, args.concurrency, args.duration)
+        print(f"{name:<10} {r['rps']:>9.1f} {r['p50']:>9.2f} {r['p95']:>9.2f} {r['p99']:>9.2f} "
+              f"{r['requests']:>8} {r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
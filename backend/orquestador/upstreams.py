@@ -0,0 +1,262 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import httpx
+
+logger = logging.getLogger(__name__)
+
+#Microservicios por defecto (una réplica cada uno)
+DEFAULT_MICROSERVICES = {
+    "orders":    "http://maki_api:8000",
+    "inventory": "http://inventory-service:4000",
+    "menu":      "http://menu_service:8080"
+}
+
+# Archivo JSON opcional con réplicas por servicio, p.ej.:
+# {"orders": {"replicas": ["http://maki_api_1:8000", "http://maki_api_2:8000"],
+#             "policy": "p2c", "health_path": "/health", "hedge": true},
+#  "menu": "http://menu_service:8080"}
+MICROSERVICES_CONFIG = os.getenv("MICROSERVICES_CONFIG")
+
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "30"))
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "200"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "50"))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+# HTTP/2 se negocia por ALPN, así que solo aplica a upstreams https (h2 viene con httpx[http2])
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "false").lower() in ("1", "true", "yes")
+
+LB_POLICY = os.getenv("LB_POLICY", "round_robin")
+HEALTH_INTERVAL = float(os.getenv("HEALTH_INTERVAL", "5"))
+HEALTH_TIMEOUT = float(os.getenv("HEALTH_TIMEOUT", "2"))
+UNHEALTHY_THRESHOLD = int(os.getenv("UNHEALTHY_THRESHOLD", "2"))
+HEALTHY_THRESHOLD = int(os.getenv("HEALTHY_THRESHOLD", "2"))
+# Hedging por defecto para todos los servicios (cada uno puede fijar "hedge" en el JSON)
+HEDGING = os.getenv("HEDGING", "false").lower() in ("1", "true", "yes")
+
+
+def create_client(base_url: str) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=base_url,
+        timeout=UPSTREAM_TIMEOUT,
+        follow_redirects=True,
+        http2=UPSTREAM_HTTP2,
+        limits=httpx.Limits(
+            max_connections=UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+            keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.client = create_client(self.url)
+        self.outstanding = 0
+        self.healthy = True
+        self.failures = 0
+        self.successes = 0
+
+    def record(self, ok: bool):
+        """Actualiza el estado con el resultado de un chequeo (activo o pasivo)."""
+        if ok:
+            self.failures = 0
+            self.successes += 1
+            if not self.healthy and self.successes >= HEALTHY_THRESHOLD:
+                self.healthy = True
+                logger.info(f"Réplica {self.url} readmitida")
+        else:
+            self.successes = 0
+            self.failures += 1
+            if self.healthy and self.failures >= UNHEALTHY_THRESHOLD:
+                self.healthy = False
+                logger.warning(f"Réplica {self.url} expulsada tras {self.failures} fallos")
+
+    def status(self):
+        return {"url": self.url, "healthy": self.healthy, "outstanding": self.outstanding}
+
+
+class ReplicaSet:
+    """Réplicas de un microservicio y su política de balanceo.
+
+    Políticas: round_robin, least_outstanding, p2c (power of two choices).
+    Si todas las réplicas están expulsadas se elige entre todas (fail open).
+    """
+
+    def __init__(self, name: str, urls: list, policy: str = LB_POLICY, health_path: str = "/health",
+                 hedge: bool = HEDGING):
+        if policy not in ("round_robin", "least_outstanding", "p2c"):
+            raise ValueError(f"Política de balanceo desconocida: {policy}")
+        self.name = name
+        self.replicas = [Replica(url) for url in urls]
+        self.policy = policy
+        self.health_path = health_path
+        self.hedge = hedge
+        self._counter = itertools.count()
+
+    def candidates(self, exclude=()):
+        healthy = [r for r in self.replicas if r.healthy]
+        candidates = healthy or self.replicas
+        # En reintentos y hedging se prefiere una réplica distinta a las ya usadas
+        return [r for r in candidates if r not in exclude] or candidates
+
+    def pick(self, exclude=()) -> Replica:
+        candidates = self.candidates(exclude)
+        if len(candidates) == 1:
+            return candidates[0]
+        if self.policy == "least_outstanding":
+            return min(candidates, key=lambda r: r.outstanding)
+        if self.policy == "p2c":
+            a, b = random.sample(candidates, 2)
+            return a if a.outstanding <= b.outstanding else b
+        return candidates[next(self._counter) % len(candidates)]
+
+    @property
+    def healthy(self):
+        return any(r.healthy for r in self.replicas)
+
+    async def aclose(self):
+        for replica in self.replicas:
+            await replica.client.aclose()
+
+    def status(self):
+        return {
+            "policy": self.policy,
+            "hedge": self.hedge,
+            "healthy": self.healthy,
+            "replicas": [r.status() for r in self.replicas],
+        }
+
+
+def parse_config(raw: dict) -> dict:
+    """Normaliza {servicio: url | [urls] | {replicas, policy, health_path, hedge}}."""
+    services = {}
+    for name, spec in raw.items():
+        if isinstance(spec, str):
+            spec = {"replicas": [spec]}
+        elif isinstance(spec, list):
+            spec = {"replicas": spec}
+        if not spec.get("replicas"):
+            raise ValueError(f"El servicio '{name}' no tiene réplicas")
+        services[name] = spec
+    return services
+
+
+def load_config() -> dict:
+    if MICROSERVICES_CONFIG and os.path.exists(MICROSERVICES_CONFIG):
+        with open(MICROSERVICES_CONFIG, encoding="utf-8") as f:
+            return parse_config(json.load(f))
+    return parse_config(DEFAULT_MICROSERVICES)
+
+
+class UpstreamRegistry:
+    """Replica sets de todos los microservicios, con health checks activos y
+    recarga de configuración en caliente (sin reiniciar el orquestrador)."""
+
+    def __init__(self):
+        self.services: dict[str, ReplicaSet] = {}
+        self._config = None
+        self._config_mtime = None
+        self._task = None
+        # El loop solo guarda referencias débiles a las tareas: sin esto el
+        # cierre diferido podría recolectarse antes de correr
+        self._closing: set[asyncio.Task] = set()
+
+    def __contains__(self, service):
+        return service in self.services
+
+    def __getitem__(self, service) -> ReplicaSet:
+        return self.services[service]
+
+    def keys(self):
+        return self.services.keys()
+
+    async def apply(self, config: dict):
+        """Reemplaza los replica sets que cambiaron; los demás conservan su estado."""
+        old = self.services
+        new = {}
+        for name, spec in config.items():
+            if self._config and self._config.get(name) == spec and name in old:
+                new[name] = old[name]
+            else:
+                new[name] = ReplicaSet(name, spec["replicas"],
+                                       spec.get("policy", LB_POLICY),
+                                       spec.get("health_path", "/health"),
+                                       spec.get("hedge", HEDGING))
+        self.services = new
+        self._config = config
+        # Los replica sets reemplazados se cierran después de un margen para no
+        # cortar las respuestas que todavía se están transmitiendo
+        for name, replica_set in old.items():
+            if new.get(name) is not replica_set:
+                task = asyncio.create_task(self._close_later(replica_set))
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_later(replica_set: ReplicaSet):
+        try:
+            await asyncio.sleep(UPSTREAM_TIMEOUT)
+        finally:
+            # También al cancelarse (stop): el cliente se cierra igual
+            await replica_set.aclose()
+
+    async def reload(self):
+        config = load_config()
+        await self.apply(config)
+        if MICROSERVICES_CONFIG and os.path.exists(MICROSERVICES_CONFIG):
+            self._config_mtime = os.path.getmtime(MICROSERVICES_CONFIG)
+        logger.info(f"Configuración de microservicios cargada: {list(config)}")
+
+    async def _check(self, replica_set: ReplicaSet, replica: Replica):
+        try:
+            response = await replica.client.get(replica_set.health_path, timeout=HEALTH_TIMEOUT)
+            replica.record(response.status_code < 500)
+        except httpx.HTTPError:
+            replica.record(False)
+
+    async def check_all(self):
+        checks = [self._check(rs, r) for rs in self.services.values() for r in rs.replicas]
+        await asyncio.gather(*checks)
+
+    def _config_changed(self):
+        if not MICROSERVICES_CONFIG or not os.path.exists(MICROSERVICES_CONFIG):
+            return False
+        return os.path.getmtime(MICROSERVICES_CONFIG) != self._config_mtime
+
+    async def _loop(self):
+        while True:
+            try:
+                if self._config_changed():
+                    await self.reload()
+                await self.check_all()
+            except Exception as e:
+                logger.error(f"Error en health checks: {str(e)}")
+            await asyncio.sleep(HEALTH_INTERVAL)
+
+    async def start(self):
+        await self.reload()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        for task in list(self._closing):
+            task.cancel()
+        await asyncio.gather(*self._closing, return_exceptions=True)
+        for replica_set in self.services.values():
+            await replica_set.aclose()
+        self.services = {}
+
+    def status(self):
+        return {name: rs.status() for name, rs in self.services.items()}
+
+
+upstreams = UpstreamRegistry()
@@ -0,0 +1,241 @@
+"""Generador de datos sintéticos vectorizado (NumPy) para pruebas de carga.
+
+Cada lote usa su propio RNG derivado de (seed, tipo, número de lote): el
+resultado es el mismo con 1 o N procesos y cualquier lote se puede
+regenerar sin los anteriores. Los lotes salen en orden y de forma perezosa;
+con workers > 1 se calculan en un ProcessPoolExecutor con a lo sumo
+2 * workers lotes en vuelo, así la memoria no crece con el total.
+
+    for batch in batches("orders", 10_000_000, workers=8, user_ids=ids_u, product_ids=ids_p):
+        cursor.executemany(INSERT_ORDER, batch)
+
+Distribuciones sesgadas:
+- productos: Zipf acotado (PRODUCT_SKEW), pocos productos concentran los pedidos
+- usuarios: Zipf más suave (USER_SKEW), usuarios frecuentes
+- hora del pedido: picos de almuerzo y cena según ORDER_HOUR_WEIGHTS
+"""
+import os
+import zlib
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+SEED = int(os.getenv("SEED", "42"))
+GEN_BATCH_SIZE = int(os.getenv("GEN_BATCH_SIZE", "100000"))
+GEN_WORKERS = int(os.getenv("GEN_WORKERS", "1"))
+# Exponente s de Zipf (p_k ~ 1/k^s): 0 = uniforme, ~1 = muy concentrado
+PRODUCT_SKEW = float(os.getenv("PRODUCT_SKEW", "1.1"))
+USER_SKEW = float(os.getenv("USER_SKEW", "0.8"))
+
+# Peso relativo de cada hora del día para order_date (0h a 23h)
+ORDER_HOUR_WEIGHTS = np.array([1.0, 0.5, 0.3, 0.2, 0.2, 0.3, 0.8, 1.5, 2.0, 2.0, 2.5, 4.0,
+                               8.0, 9.0, 6.0, 3.0, 2.5, 3.0, 5.0, 8.0, 9.0, 7.0, 4.0, 2.0])
+
+NOMBRES = np.array(["Ana", "Carlos", "María", "José", "Laura", "Pedro", "Sofia", "Diego", "Elena", "Miguel"])
+APELLIDOS = np.array(["García", "Rodríguez", "Martínez", "López", "González", "Pérez", "Sánchez", "Ramírez",
+                      "Torres", "Flores"])
+DOMINIOS = np.array(["gmail.com", "hotmail.com", "yahoo.com", "utec.edu.pe", "outlook.com"])
+PRODUCTOS = np.array(["California Roll Premium", "Dragon Roll Especial", "Tempura de Camarón", "Sashimi Mixto",
+                      "Ramen Maki Deluxe", "Green Dragon Roll", "Spicy Tuna Roll", "Salmon Roll", "Eel Roll",
+                      "Crab Roll"])
+STATUSES = np.array(["pending", "confirmed", "preparing", "delivered", "cancelled"])
+STATUS_WEIGHTS = np.array([0.10, 0.10, 0.05, 0.65, 0.10])
+PAYMENT_METHODS = np.array(["cash", "card", "transfer"])
+PAYMENT_WEIGHTS = np.array([0.25, 0.60, 0.15])
+MAKIS = np.array(["California Roll", "Acevichado", "Philadelphia Roll", "Dragon Roll", "Spicy Tuna Roll",
+                  "Salmon Roll", "Eel Roll", "Crab Roll", "Tempura Roll", "Rainbow Roll"])
+DESCRIPCIONES = np.array([
+    "Maki clásico con palta, cangrejo y pepino",
+    "Maki relleno de pescado y cubierto con salsa acevichada",
+    "Maki con salmón y queso crema",
+    "Maki especial con ingredientes premium",
+    "Maki picante con atún fresco",
+    "Maki tradicional con salmón",
+    "Maki con anguila y salsa especial",
+    "Maki de cangrejo con mayonesa",
+    "Maki frito con tempura",
+    "Maki colorido con múltiples ingredientes",
+])
+INGREDIENTES = np.array(["Salmón", "Atún", "Pollo", "Carne", "Huevo", "Lechuga", "Tomate", "Cebolla", "Ajo",
+                         "Perejil", "Sal", "Pimienta", "Aceite", "Vinagre", "Salsa", "Queso", "Leche", "Yogurt",
+                         "Mantequilla", "Crema", "Arroz", "Trigo", "Avena", "Quinoa", "Cebada", "Palta", "Tampico",
+                         "Queso crema", "Cangrejo", "Pepino"])
+CATEGORIAS = np.array(["Proteína", "Vegetal", "Condimento", "Lácteo", "Cereal"])
+UNIDADES = np.array(["kg", "g", "l", "ml", "unidad"])
+
+DAY = 86400
+
+
+@lru_cache(maxsize=8)
+def _zipf_cdf(n: int, skew: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+@lru_cache(maxsize=8)
+def _rank_order(n: int, seed: int) -> np.ndarray:
+    # Qué índice ocupa cada puesto del ranking: los populares no son siempre los primeros ids
+    return np.random.default_rng([seed, n]).permutation(n)
+
+
+def zipf_indices(rng, n: int, size: int, skew: float, seed: int) -> np.ndarray:
+    """`size` índices en [0, n) con popularidad Zipf(skew)."""
+    ranks = np.searchsorted(_zipf_cdf(n, skew), rng.random(size), side="right")
+    return _rank_order(n, seed)[np.minimum(ranks, n - 1)]
+
+
+def _timestamps(now: np.datetime64, seconds_ago: np.ndarray) -> list[datetime]:
+    return (now - seconds_ago.astype("timedelta64[s]")).tolist()
+
+
+def _users(rng, ids, params):
+    n = len(ids)
+    nombres = NOMBRES[rng.integers(len(NOMBRES), size=n)]
+    apellidos = APELLIDOS[rng.integers(len(APELLIDOS), size=n)]
+    dominios = DOMINIOS[rng.integers(len(DOMINIOS), size=n)]
+    phones = rng.integers(900000000, 1000000000, size=n)
+    created = _timestamps(params["now"], rng.integers(0, 365 * DAY, size=n))
+    return [(f"{nombre} {apellido} {i}", f"user{i}@{dominio}", f"+51{phone}", f"Dirección {i}, Lima, Perú", c)
+            for i, nombre, apellido, dominio, phone, c in
+            zip(ids.tolist(), nombres.tolist(), apellidos.tolist(), dominios.tolist(), phones.tolist(), created)]
+
+
+def _products(rng, ids, params):
+    n = len(ids)
+    nombres = PRODUCTOS[rng.integers(len(PRODUCTOS), size=n)]
+    precios = np.round(rng.uniform(15.99, 35.99, size=n), 2)
+    calorias = rng.integers(250, 601, size=n)
+    created = _timestamps(params["now"], rng.integers(0, 365 * DAY, size=n))
+    return [(f"{nombre} {i}", precio, cal, c)
+            for i, nombre, precio, cal, c in zip(ids.tolist(), nombres.tolist(), precios.tolist(),
+                                                  calorias.tolist(), created)]
+
+
+def _orders(rng, ids, params):
+    n = len(ids)
+    user_ids, product_ids, seed = params["user_ids"], params["product_ids"], params["seed"]
+    users = user_ids[zipf_indices(rng, len(user_ids), n, params.get("user_skew", USER_SKEW), seed)]
+    products = product_ids[zipf_indices(rng, len(product_ids), n, params.get("product_skew", PRODUCT_SKEW), seed + 1)]
+    statuses = STATUSES[rng.choice(len(STATUSES), size=n, p=STATUS_WEIGHTS)]
+    payments = PAYMENT_METHODS[rng.choice(len(PAYMENT_METHODS), size=n, p=PAYMENT_WEIGHTS)]
+    # Día uniforme en la ventana, hora según el perfil del día, minuto/segundo uniformes
+    days = rng.integers(0, params.get("days", 30), size=n)
+    hours = rng.choice(24, size=n, p=ORDER_HOUR_WEIGHTS / ORDER_HOUR_WEIGHTS.sum())
+    seconds = days * DAY + (23 - hours) * 3600 + rng.integers(0, 3600, size=n)
+    dates = _timestamps(params["now"], seconds)
+    totals = np.round(rng.uniform(15.99, 35.99, size=n), 2)
+    return list(zip(users.tolist(), products.tolist(), statuses.tolist(), dates, totals.tolist(),
+                    payments.tolist()))
+
+
+def _ingredient_documents(rng, ids, params):
+    n = len(ids)
+    nombres = INGREDIENTES[rng.integers(25, size=n)]  # los 25 del inventario original
+    categorias = CATEGORIAS[rng.integers(len(CATEGORIAS), size=n)]
+    unidades = UNIDADES[rng.integers(len(UNIDADES), size=n)]
+    stock = rng.integers(1, 1001, size=n)
+    precios = np.round(rng.random(n) * 100 + 1, 2)
+    activos = rng.random(n) > 0.1
+    created = _timestamps(params["now"], rng.integers(0, 365 * DAY, size=n))
+    updated = params["now"].tolist()
+    return [
+        {"nombre": f"{nombre} {i}", "categoria": categoria, "unidad": unidad, "stockActual": s,
+         "stockMinimo": max(1, int(s * 0.1)), "precioUnitario": precio, "activo": activo, "createdAt": c,
+         "updatedAt": updated}
+        for i, nombre, categoria, unidad, s, precio, activo, c in
+        zip(ids.tolist(), nombres.tolist(), categorias.tolist(), unidades.tolist(), stock.tolist(),
+            precios.tolist(), activos.tolist(), created)
+    ]
+
+
+def _ingredientes(rng, ids, params):
+    nombres = INGREDIENTES[rng.integers(len(INGREDIENTES), size=len(ids))]
+    stock = rng.integers(10, 201, size=len(ids))
+    return [(f"{nombre} {i}", s) for i, nombre, s in zip(ids.tolist(), nombres.tolist(), stock.tolist())]
+
+
+def _makis(rng, ids, params):
+    n = len(ids)
+    nombres = MAKIS[rng.integers(len(MAKIS), size=n)]
+    descripciones = DESCRIPCIONES[rng.integers(len(DESCRIPCIONES), size=n)]
+    precios = np.round(rng.uniform(15.50, 35.99, size=n), 2)
+    return [(f"{nombre} {i}", d, p) for i, nombre, d, p in
+            zip(ids.tolist(), nombres.tolist(), descripciones.tolist(), precios.tolist())]
+
+
+# Forma de cada fila: la de los INSERT de cada seeder
+KINDS = {
+    "users": _users,                  # (name, email, phone_number, address, created_at)
+    "products": _products,            # (name, price, calories, created_at)
+    "orders": _orders,                # (user_id, product_id, status, order_date, total_price, payment_method)
+    "ingredient_documents": _ingredient_documents,  # dicts de la colección ingredientes
+    "ingredientes": _ingredientes,    # (nombre, stock)
+    "makis": _makis,                  # (nombre, descripcion, precio)
+}
+
+
+def generate_batch(kind: str, index: int, total: int, params: dict) -> list:
+    """El lote `index` (filas index*batch_size+1 .. hasta total) de `kind`."""
+    batch_size = params["batch_size"]
+    ids = np.arange(index * batch_size + 1, min((index + 1) * batch_size, total) + 1)
+    rng = np.random.default_rng([params["seed"], zlib.crc32(kind.encode()), index])
+    return KINDS[kind](rng, ids, params)
+
+
+_worker_params = None
+
+
+def _init_worker(params):
+    global _worker_params
+    _worker_params = params
+
+
+def _generate_in_worker(kind, index, total):
+    return generate_batch(kind, index, total, _worker_params)
+
+
+def plan(kind: str, total: int, *, seed: int = SEED, batch_size: int = GEN_BATCH_SIZE,
+         now: datetime | None = None, **params) -> tuple[int, dict]:
+    """(cantidad de lotes, params para generate_batch). Sirve para repartir
+    los índices de lote entre procesos que generan y cargan por su cuenta."""
+    if kind == "orders":
+        params["user_ids"] = np.asarray(params["user_ids"])
+        params["product_ids"] = np.asarray(params["product_ids"])
+    now = now or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    params.update(seed=seed, batch_size=batch_size, now=np.datetime64(now, "s"))
+    return -(-total // batch_size), params
+
+
+def batches(kind: str, total: int, *, workers: int = GEN_WORKERS, **kwargs) -> Iterator[list]:
+    """Lotes de `total` filas de `kind`, en orden.
+
+    Los kwargs van a `plan` y de ahí a cada worker una sola vez (p.ej.
+    user_ids/product_ids para "orders"). `now` fija la referencia de las
+    fechas; sin él se usa el inicio del día actual, así dos corridas del
+    mismo día coinciden.
+    """
+    count, params = plan(kind, total, **kwargs)
+
+    if workers <= 1:
+        for index in range(count):
+            yield generate_batch(kind, index, total, params)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(params,)) as pool:
+        pending, submitted = deque(), 0
+        while pending or submitted < count:
+            while submitted < count and len(pending) < 2 * workers:
+                pending.append(pool.submit(_generate_in_worker, kind, submitted, total))
+                submitted += 1
+            yield pending.popleft().result()
+
+
+def rows(kind: str, total: int, **kwargs) -> Iterator:
+    """Las filas de `batches` una por una (p.ej. para COPY en streaming)."""
+    for batch in batches(kind, total, **kwargs):
+        yield from batch
@@ -2,7 +2,32 @@ import os
 import json
 from datetime import datetime, timedelta
 from pymongo import MongoClient
+from bson import ObjectId
 import boto3
+from common import synthetic
+from common.columnar import OUTPUT_FORMAT, write_partitioned
+from common.incremental import compact, export_incremental
+
+# Campo del watermark: updatedAt captura altas y cambios; "_id" usa el tiempo
+# del ObjectId (solo altas) para colecciones sin updatedAt
+WATERMARK_FIELD = os.getenv("WATERMARK_FIELD", "updatedAt")
+# Lo escrito hace menos de esto queda para la próxima corrida: escrituras
+# concurrentes pueden confirmarse con un updatedAt anterior al máximo ya visto
+WATERMARK_LAG = int(os.getenv("WATERMARK_LAG", "60"))
+
+# Tipos de los documentos de ingredientes para la salida columnar
+INGREDIENTES_COLUMNS = [
+    ("_id", "string"),
+    ("nombre", "string"),
+    ("categoria", "string"),
+    ("unidad", "string"),
+    ("stockActual", "int32"),
+    ("stockMinimo", "int32"),
+    ("precioUnitario", "float64"),
+    ("activo", "bool"),
+    ("createdAt", "timestamp"),
+    ("updatedAt", "timestamp"),
+]
 
 
 def get_env(name: str, default: str | None = None) -> str:
@@ -12,52 +37,22 @@ def get_env(name: str, default: str | None = None) -> str:
     return value
 
 
-def generate_fake_documents(num_docs: int) -> list[dict]:
-    import random
-
-    categorias = ["Proteína", "Vegetal", "Condimento", "Lácteo", "Cereal"]
-    unidades = ["kg", "g", "l", "ml", "unidad"]
-    nombres = [
-        "Salmón", "Atún", "Pollo", "Carne", "Huevo",
-        "Lechuga", "Tomate", "Cebolla", "Ajo", "Perejil",
-        "Sal", "Pimienta", "Aceite", "Vinagre", "Salsa",
-        "Queso", "Leche", "Yogurt", "Mantequilla", "Crema",
-        "Arroz", "Trigo", "Avena", "Quinoa", "Cebada",
-    ]
-
-    documents: list[dict] = []
-    for i in range(1, num_docs + 1):
-        nombre = random.choice(nombres)
-        categoria = random.choice(categorias)
-        unidad = random.choice(unidades)
-        stock_actual = random.randint(1, 1000)
-        stock_minimo = max(1, int(stock_actual * 0.1))
-        precio_unitario = round(random.random() * 100 + 1, 2)
-        created_at = datetime.utcnow() - timedelta(days=random.randint(0, 365))
-
-        documents.append(
-            {
-                "nombre": f"{nombre} {i}",
-                "categoria": categoria,
-                "unidad": unidad,
-                "stockActual": stock_actual,
-                "stockMinimo": stock_minimo,
-                "precioUnitario": precio_unitario,
-                "activo": random.random() > 0.1,
-                "createdAt": created_at,
-                "updatedAt": datetime.utcnow(),
-            }
-        )
-    return documents
-
-
 def seed_mongodb(uri: str, database: str, collection: str, num_docs: int) -> int:
     client = MongoClient(uri)
     coll = client[database][collection]
     coll.deleteMany({}) if hasattr(coll, "deleteMany") else coll.delete_many({})
-    docs = generate_fake_documents(num_docs)
-    result = coll.insert_many(docs)
-    return len(result.inserted_ids)
+    inserted = 0
+    for docs in synthetic.batches("ingredient_documents", num_docs):
+        # ordered=False: un documento con error no corta el resto del lote
+        inserted += len(coll.insert_many(docs, ordered=False).inserted_ids)
+    return inserted
+
+
+def default_serializer(o):
+    # ObjectId y datetime a string
+    if hasattr(o, "isoformat"):
+        return o.isoformat()
+    return str(o)
 
 
 def export_to_s3(uri: str, database: str, collection: str, bucket: str, key_prefix: str) -> dict:
@@ -65,11 +60,10 @@ def export_to_s3(uri: str, database: str, collection: str, bucket: str, key_pref
     coll = client[database][collection]
     data = list(coll.find())
 
-    # Convert ObjectId and datetime to strings
-    def default_serializer(o):
-        if hasattr(o, "isoformat"):
-            return o.isoformat()
-        return str(o)
+    if OUTPUT_FORMAT != "json":
+        for doc in data:
+            doc["_id"] = str(doc["_id"])
+        return write_partitioned(boto3.client("s3"), bucket, "mongo", data, INGREDIENTES_COLUMNS)
 
     # Formato one-line JSON para Athena (un documento por línea)
     json_lines = []
@@ -85,8 +79,43 @@ def export_to_s3(uri: str, database: str, collection: str, bucket: str, key_pref
     return {"bucket": bucket, "key": key, "records": len(data)}
 
 
+def fetch_changed_documents(uri: str, database: str, collection: str, watermark: dict | None) -> tuple[list[str], dict]:
+    """Documentos con (WATERMARK_FIELD, _id) mayor al watermark, en ese orden.
+
+    El _id desempata documentos con el mismo updatedAt. Conviene un índice
+    {updatedAt: 1, _id: 1} para que la consulta no recorra la colección.
+    """
+    client = MongoClient(uri)
+    coll = client[database][collection]
+    cutoff = datetime.utcnow() - timedelta(seconds=WATERMARK_LAG)
+
+    if WATERMARK_FIELD == "_id":
+        query = {"_id": {"$lt": ObjectId.from_datetime(cutoff)}}
+        if watermark:
+            query["_id"]["$gt"] = ObjectId(watermark["_id"])
+        sort = [("_id", 1)]
+    else:
+        query = {WATERMARK_FIELD: {"$lt": cutoff}}
+        if watermark:
+            last = datetime.fromisoformat(watermark[WATERMARK_FIELD])
+            query["$or"] = [
+                {WATERMARK_FIELD: {"$gt": last}},
+                {WATERMARK_FIELD: last, "_id": {"$gt": ObjectId(watermark["_id"])}},
+            ]
+        sort = [(WATERMARK_FIELD, 1), ("_id", 1)]
+
+    json_lines = []
+    for doc in coll.find(query).sort(sort):
+        watermark = {"_id": str(doc["_id"])}
+        if WATERMARK_FIELD != "_id":
+            watermark[WATERMARK_FIELD] = doc[WATERMARK_FIELD].isoformat()
+        json_lines.append(json.dumps(doc, default=default_serializer))
+    client.close()
+    return json_lines, watermark
+
+
 def main() -> None:
-    mode = os.getenv("MODE", "seed_and_export")  # seed | export | seed_and_export
+    mode = os.getenv("MODE", "seed_and_export")  # seed | export | seed_and_export | incremental | compact
 
     mongo_uri = get_env("MONGO_URI", "mongodb://172.31.17.96:27017")
     mongo_db = get_env("MONGO_DB", "inventory")
@@ -107,6 +136,24 @@ def main() -> None:
         result = export_to_s3(mongo_uri, mongo_db, mongo_collection, s3_bucket, s3_prefix)
         print(f"Exported to s3://{result['bucket']}/{result['key']} ({result['records']} records)")
 
+    if mode in ("incremental", "compact") and not s3_bucket:
+        raise RuntimeError(f"S3_BUCKET is required for {mode}")
+
+    if mode == "incremental":
+        result = export_incremental(
+            "mongo", s3_bucket,
+            lambda watermark: fetch_changed_documents(mongo_uri, mongo_db, mongo_collection, watermark))
+        target = f"s3://{result['bucket']}/{result['key']}" if result["key"] else "nothing new"
+        print(f"Exported {result['records']} changed docs: {target} (watermark {result['watermark']})")
+
+    if mode == "compact":
+        result = compact("mongo", s3_bucket, ("_id",))
+        if result["deltas"]:
+            print(f"Compacted {result['deltas']} deltas into s3://{result['bucket']}/{result['key']} "
+                  f"({result['records']} docs)")
+        else:
+            print("Nothing to compact")
+
 
 if __name__ == "__main__":
     main()
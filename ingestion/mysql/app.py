@@ -1,9 +1,35 @@
 import os
 import json
-from datetime import datetime, timedelta
-import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 import boto3
 import mysql.connector
+from common import synthetic
+from common.columnar import OUTPUT_FORMAT, write_partitioned
+from common.incremental import compact, export_incremental
+
+# Seeder: executemany (una sola transacción, como siempre) | insert (INSERT
+# multi-fila con commit por chunk) | load_data (LOAD DATA LOCAL INFILE por
+# chunk, requiere local_infile=ON en el servidor)
+SEED_LOADER = os.getenv("SEED_LOADER", "executemany")
+SEED_CHUNK_ROWS = int(os.getenv("SEED_CHUNK_ROWS", "10000"))
+# Conexiones cargando en paralelo; cada proceso genera sus propios lotes
+SEED_PARALLEL = int(os.getenv("SEED_PARALLEL", "1"))
+# Sin chequeos de FK/unique por sesión durante la carga (y DISABLE KEYS, que
+# solo afecta a tablas MyISAM). Los datos generados ya son consistentes
+SEED_DISABLE_KEYS = os.getenv("SEED_DISABLE_KEYS", "false").lower() in ("1", "true", "yes")
+
+# Ids por debajo del máximo exportado que se vuelven a leer en cada corrida
+# incremental, para no perder órdenes confirmadas después de otras más nuevas
+WATERMARK_ID_WINDOW = int(os.getenv("WATERMARK_ID_WINDOW", "10000"))
+
+SEED_TABLES = {
+    "users": ("name", "email", "phone_number", "address", "created_at"),
+    "products": ("name", "price", "calories", "created_at"),
+    "orders": ("user_id", "product_id", "status", "order_date", "total_price", "payment_method"),
+}
 
 
 def get_env(name: str, default: str | None = None) -> str:
@@ -18,54 +44,19 @@ def ensure_table(cursor) -> None:
     pass
 
 
-def generate_fake_users(num_rows: int) -> list[tuple]:
-    nombres = ["Ana", "Carlos", "María", "José", "Laura", "Pedro", "Sofia", "Diego", "Elena", "Miguel"]
-    apellidos = ["García", "Rodríguez", "Martínez", "López", "González", "Pérez", "Sánchez", "Ramírez", "Torres", "Flores"]
-    dominios = ["gmail.com", "hotmail.com", "yahoo.com", "utec.edu.pe", "outlook.com"]
-    
-    rows: list[tuple] = []
-    for i in range(1, num_rows + 1):
-        nombre = f"{random.choice(nombres)} {random.choice(apellidos)} {i}"
-        email = f"user{i}@{random.choice(dominios)}"
-        phone = f"+51{random.randint(900000000, 999999999)}"
-        address = f"Dirección {i}, Lima, Perú"
-        created_at = datetime.utcnow() - timedelta(days=random.randint(0, 365))
-        rows.append((nombre, email, phone, address, created_at))
-    return rows
-
-def generate_fake_products(num_rows: int) -> list[tuple]:
-    nombres_productos = [
-        "California Roll Premium", "Dragon Roll Especial", "Tempura de Camarón", 
-        "Sashimi Mixto", "Ramen Maki Deluxe", "Green Dragon Roll",
-        "Spicy Tuna Roll", "Salmon Roll", "Eel Roll", "Crab Roll"
-    ]
-    
-    rows: list[tuple] = []
-    for i in range(1, num_rows + 1):
-        nombre = f"{random.choice(nombres_productos)} {i}"
-        precio = round(random.uniform(15.99, 35.99), 2)
-        calorias = random.randint(250, 600)
-        created_at = datetime.utcnow() - timedelta(days=random.randint(0, 365))
-        rows.append((nombre, precio, calorias, created_at))
-    return rows
-
-def generate_fake_orders(num_rows: int, user_ids: list, product_ids: list) -> list[tuple]:
-    statuses = ['pending', 'confirmed', 'preparing', 'delivered', 'cancelled']
-    payment_methods = ['cash', 'card', 'transfer']
-    
-    rows: list[tuple] = []
-    for i in range(1, num_rows + 1):
-        user_id = random.choice(user_ids)
-        product_id = random.choice(product_ids)
-        status = random.choice(statuses)
-        order_date = datetime.utcnow() - timedelta(days=random.randint(0, 30))
-        total_price = round(random.uniform(15.99, 35.99), 2)
-        payment_method = random.choice(payment_methods)
-        rows.append((user_id, product_id, status, order_date, total_price, payment_method))
-    return rows
-
-
-def seed_mysql(conn, num_rows: int) -> int:
+def _insert_batches(cursor, sql: str, batches) -> int:
+    inserted = 0
+    for batch in batches:
+        cursor.executemany(sql, batch)
+        inserted += len(batch)
+    return inserted
+
+
+def seed_mysql(conn, num_rows: int, num_users: int | None = None, num_products: int | None = None) -> int:
+    # num_rows órdenes; usuarios y productos en la proporción de siempre (2:1:4)
+    num_users = num_users or max(1, num_rows // 2)
+    num_products = num_products or max(1, num_rows // 4)
+
     with conn.cursor() as cursor:
         ensure_table(cursor)
         
@@ -75,10 +66,10 @@ def seed_mysql(conn, num_rows: int) -> int:
         cursor.execute("DELETE FROM users")
         
         # Insertar usuarios
-        user_rows = generate_fake_users(min(num_rows, 1000))
-        cursor.executemany(
+        users = _insert_batches(
+            cursor,
             "INSERT INTO users (name, email, phone_number, address, created_at) VALUES (%s,%s,%s,%s,%s)",
-            user_rows
+            synthetic.batches("users", num_users),
         )
         
         # Obtener IDs de usuarios insertados
@@ -86,53 +77,174 @@ def seed_mysql(conn, num_rows: int) -> int:
         user_ids = [row[0] for row in cursor.fetchall()]
         
         # Insertar productos
-        product_rows = generate_fake_products(min(num_rows, 500))
-        cursor.executemany(
+        products = _insert_batches(
+            cursor,
             "INSERT INTO products (name, price, calories, created_at) VALUES (%s,%s,%s,%s)",
-            product_rows
+            synthetic.batches("products", num_products),
         )
         
         # Obtener IDs de productos insertados
         cursor.execute("SELECT id FROM products")
         product_ids = [row[0] for row in cursor.fetchall()]
         
-        # Insertar órdenes
-        order_rows = generate_fake_orders(min(num_rows, 2000), user_ids, product_ids)
-        cursor.executemany(
+        # Insertar órdenes: productos populares, usuarios frecuentes y picos por hora
+        orders = _insert_batches(
+            cursor,
             "INSERT INTO orders (user_id, product_id, status, order_date, total_price, payment_method) VALUES (%s,%s,%s,%s,%s,%s)",
-            order_rows
+            synthetic.batches("orders", num_rows, user_ids=user_ids, product_ids=product_ids),
         )
         
     conn.commit()
-    return len(user_rows) + len(product_rows) + len(order_rows)
+    return users + products + orders
+
+
+_LOAD_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n"})
+
+
+def _load_chunk(cursor, table: str, chunk: list[tuple]) -> None:
+    columns = ", ".join(SEED_TABLES[table])
+    if SEED_LOADER == "load_data":
+        # Formato por defecto de LOAD DATA: tabs, \n y escapes con barra, NULL = \N
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".tsv") as f:
+            for row in chunk:
+                f.write("\t".join("\\N" if v is None else str(v).translate(_LOAD_ESCAPES) for v in row) + "\n")
+            f.flush()
+            cursor.execute(f"LOAD DATA LOCAL INFILE '{f.name}' INTO TABLE {table} CHARACTER SET utf8mb4 ({columns})")
+    else:
+        # mysql-connector reescribe el executemany de un INSERT en un único INSERT multi-fila
+        placeholders = ",".join(["%s"] * len(SEED_TABLES[table]))
+        cursor.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", chunk)
+
+
+def _load_worker(conn_kwargs: dict, table: str, total: int, params: dict, indices: range) -> int:
+    conn = mysql.connector.connect(**conn_kwargs, allow_local_infile=SEED_LOADER == "load_data")
+    loaded = 0
+    try:
+        with conn.cursor() as cursor:
+            if SEED_DISABLE_KEYS:
+                cursor.execute("SET SESSION foreign_key_checks = 0")
+                cursor.execute("SET SESSION unique_checks = 0")
+            for index in indices:
+                batch = synthetic.generate_batch(table, index, total, params)
+                for start in range(0, len(batch), SEED_CHUNK_ROWS):
+                    chunk = batch[start:start + SEED_CHUNK_ROWS]
+                    _load_chunk(cursor, table, chunk)
+                    conn.commit()
+                    loaded += len(chunk)
+    finally:
+        conn.close()
+    return loaded
+
+
+def bulk_load(conn_kwargs: dict, table: str, total: int, **params) -> int:
+    """Genera y carga `total` filas de `table`; con SEED_PARALLEL > 1 cada
+    proceso abre su conexión y se encarga de uno de cada N lotes."""
+    count, params = synthetic.plan(table, total, **params)
+    start = time.perf_counter()
+    if SEED_PARALLEL <= 1:
+        loaded = _load_worker(conn_kwargs, table, total, params, range(count))
+    else:
+        with ProcessPoolExecutor(SEED_PARALLEL) as pool:
+            futures = [pool.submit(_load_worker, conn_kwargs, table, total, params, range(k, count, SEED_PARALLEL))
+                       for k in range(SEED_PARALLEL)]
+            loaded = sum(future.result() for future in futures)
+    elapsed = time.perf_counter() - start
+    print(f"  {table}: {loaded} rows in {elapsed:.2f}s ({loaded / elapsed if elapsed else 0:,.0f} rows/s)")
+    return loaded
+
+
+def bulk_seed_mysql(conn_kwargs: dict, num_rows: int, num_users: int | None = None,
+                    num_products: int | None = None) -> int:
+    num_users = num_users or max(1, num_rows // 2)
+    num_products = num_products or max(1, num_rows // 4)
+
+    conn = mysql.connector.connect(**conn_kwargs)
+    # Cada SELECT id tiene que ver lo que confirmaron los loaders
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            # TRUNCATE en vez de DELETE: no recorre filas ni chequea FKs, y
+            # reinicia el AUTO_INCREMENT
+            cursor.execute("SET SESSION foreign_key_checks = 0")
+            for table in ("orders", "products", "users"):
+                cursor.execute(f"TRUNCATE TABLE {table}")
+            cursor.execute("SET SESSION foreign_key_checks = 1")
+            if SEED_DISABLE_KEYS:
+                for table in SEED_TABLES:
+                    cursor.execute(f"ALTER TABLE {table} DISABLE KEYS")
+
+            users = bulk_load(conn_kwargs, "users", num_users)
+            cursor.execute("SELECT id FROM users")
+            user_ids = [row[0] for row in cursor.fetchall()]
+
+            products = bulk_load(conn_kwargs, "products", num_products)
+            cursor.execute("SELECT id FROM products")
+            product_ids = [row[0] for row in cursor.fetchall()]
+
+            orders = bulk_load(conn_kwargs, "orders", num_rows, user_ids=user_ids, product_ids=product_ids)
+
+            if SEED_DISABLE_KEYS:
+                for table in SEED_TABLES:
+                    cursor.execute(f"ALTER TABLE {table} ENABLE KEYS")
+    finally:
+        conn.close()
+    return users + products + orders
+
+
+EXPORT_QUERY = """
+    SELECT 
+        o.id,
+        u.name,
+        u.email,
+        u.phone_number,
+        u.address,
+        u.created_at,
+        p.price,
+        p.calories,
+        o.user_id,
+        o.product_id,
+        o.status,
+        o.order_date,
+        o.total_price,
+        o.payment_method
+    FROM orders o
+    JOIN users u ON o.user_id = u.id
+    JOIN products p ON o.product_id = p.id
+    {where}
+    ORDER BY o.id
+"""
+
+# Tipos de EXPORT_QUERY para la salida columnar
+ORDERS_COLUMNS = [
+    ("id", "int32"),
+    ("name", "string"),
+    ("email", "string"),
+    ("phone_number", "string"),
+    ("address", "string"),
+    ("created_at", "timestamp"),
+    ("price", "decimal(8,2)"),
+    ("calories", "int32"),
+    ("user_id", "int32"),
+    ("product_id", "int32"),
+    ("status", "string"),
+    ("order_date", "timestamp"),
+    ("total_price", "decimal(10,2)"),
+    ("payment_method", "string"),
+]
 
 
 def export_to_s3(conn, bucket: str, key_prefix: str) -> dict:
+    if OUTPUT_FORMAT != "json":
+        with conn.cursor(dictionary=True) as cursor:
+            cursor.execute(EXPORT_QUERY.format(where=""))
+            rows = cursor.fetchall()
+        return write_partitioned(boto3.client("s3"), bucket, "mysql", rows, ORDERS_COLUMNS, partition_by=("status",))
+
     json_lines = []
     
     with conn.cursor(dictionary=True) as cursor:
         # Exportar datos con JOIN para obtener información completa
-        cursor.execute("""
-            SELECT 
-                o.id,
-                u.name,
-                u.email,
-                u.phone_number,
-                u.address,
-                u.created_at,
-                p.price,
-                p.calories,
-                o.user_id,
-                o.product_id,
-                o.status,
-                o.order_date,
-                o.total_price,
-                o.payment_method
-            FROM orders o
-            JOIN users u ON o.user_id = u.id
-            JOIN products p ON o.product_id = p.id
-            ORDER BY o.id
-        """)
+        cursor.execute(EXPORT_QUERY.format(where=""))
         for row in cursor.fetchall():
             json_lines.append(json.dumps(row, default=str))
 
@@ -145,8 +257,30 @@ def export_to_s3(conn, bucket: str, key_prefix: str) -> dict:
     return {"bucket": bucket, "key": key, "records": len(json_lines)}
 
 
+def fetch_new_orders(conn, watermark: dict | None) -> tuple[list[str], dict]:
+    # orders no tiene updated_at: el watermark es el último o.id, así que se
+    # capturan las órdenes nuevas pero no los cambios de estado de las viejas.
+    # Los AUTO_INCREMENT se confirman fuera de orden (transacciones concurrentes,
+    # POST /orders/batch): se relee una ventana de WATERMARK_ID_WINDOW ids por
+    # debajo del máximo y se saltan los ya exportados, guardados en "recent"
+    watermark = watermark or {}
+    last_id = watermark.get("id", 0)
+    recent = set(watermark.get("recent", []))
+    json_lines = []
+    with conn.cursor(dictionary=True) as cursor:
+        cursor.execute(EXPORT_QUERY.format(where="WHERE o.id > %s"), (max(0, last_id - WATERMARK_ID_WINDOW),))
+        for row in cursor:
+            if row["id"] in recent:
+                continue
+            recent.add(row["id"])
+            last_id = max(last_id, row["id"])
+            json_lines.append(json.dumps(row, default=str))
+    floor = last_id - WATERMARK_ID_WINDOW
+    return json_lines, {"id": last_id, "recent": sorted(i for i in recent if i > floor)}
+
+
 def main() -> None:
-    mode = os.getenv("MODE", "seed_and_export")  # seed | export | seed_and_export
+    mode = os.getenv("MODE", "seed_and_export")  # seed | export | seed_and_export | incremental | compact
 
     host = get_env("DB_HOST")
     port = int(get_env("DB_PORT", "3306"))
@@ -157,12 +291,20 @@ def main() -> None:
     s3_bucket = os.getenv("S3_BUCKET")
     s3_prefix = os.getenv("S3_PREFIX", "mysql/ingredientes")
     num_rows = int(os.getenv("FAKE_COUNT", "20000"))
+    num_users = int(os.getenv("SEED_USERS", "0")) or None
+    num_products = int(os.getenv("SEED_PRODUCTS", "0")) or None
 
-    conn = mysql.connector.connect(host=host, port=port, user=user, password=password, database=database)
+    conn_kwargs = dict(host=host, port=port, user=user, password=password, database=database)
+    conn = mysql.connector.connect(**conn_kwargs)
 
     if mode in ("seed", "seed_and_export"):
-        inserted = seed_mysql(conn, num_rows)
-        print(f"Seeded MySQL: inserted {inserted} rows")
+        start = time.perf_counter()
+        if SEED_LOADER == "executemany":
+            inserted = seed_mysql(conn, num_rows, num_users, num_products)
+        else:
+            inserted = bulk_seed_mysql(conn_kwargs, num_rows, num_users, num_products)
+        elapsed = time.perf_counter() - start
+        print(f"Seeded MySQL: inserted {inserted} rows in {elapsed:.2f}s ({inserted / elapsed:,.0f} rows/s)")
 
     if mode in ("export", "seed_and_export"):
         if not s3_bucket:
@@ -170,6 +312,22 @@ def main() -> None:
         result = export_to_s3(conn, s3_bucket, s3_prefix)
         print(f"Exported to s3://{result['bucket']}/{result['key']} ({result['records']} records)")
 
+    if mode in ("incremental", "compact") and not s3_bucket:
+        raise RuntimeError(f"S3_BUCKET is required for {mode}")
+
+    if mode == "incremental":
+        result = export_incremental("mysql", s3_bucket, lambda watermark: fetch_new_orders(conn, watermark))
+        target = f"s3://{result['bucket']}/{result['key']}" if result["key"] else "nothing new"
+        print(f"Exported {result['records']} new records: {target} (watermark {result['watermark']['id']})")
+
+    if mode == "compact":
+        result = compact("mysql", s3_bucket, ("id",))
+        if result["deltas"]:
+            print(f"Compacted {result['deltas']} deltas into s3://{result['bucket']}/{result['key']} "
+                  f"({result['records']} records)")
+        else:
+            print("Nothing to compact")
+
     conn.close()
 
 
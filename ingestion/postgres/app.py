@@ -1,9 +1,16 @@
 import os
 import json
-from datetime import datetime, timedelta
+import time
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from itertools import islice
 import random
 import boto3
 import psycopg2
+from psycopg2.extras import RealDictCursor, execute_values
+from common import synthetic
+from common.columnar import OUTPUT_FORMAT, write_partitioned
+from common.incremental import compact, export_incremental
 
 
 def get_env(name: str, default: str | None = None) -> str:
@@ -18,125 +25,154 @@ def ensure_table(cur) -> None:
     pass
 
 
-def generate_fake_ingredientes(num_rows: int) -> list[tuple]:
-    nombres_ingredientes = [
-        "Salmón", "Atún", "Pollo", "Carne", "Huevo",
-        "Lechuga", "Tomate", "Cebolla", "Ajo", "Perejil",
-        "Sal", "Pimienta", "Aceite", "Vinagre", "Salsa",
-        "Queso", "Leche", "Yogurt", "Mantequilla", "Crema",
-        "Arroz", "Trigo", "Avena", "Quinoa", "Cebada",
-        "Palta", "Tampico", "Queso crema", "Cangrejo", "Pepino"
-    ]
-    
-    rows: list[tuple] = []
-    for i in range(1, num_rows + 1):
-        nombre = f"{random.choice(nombres_ingredientes)} {i}"
-        stock = random.randint(10, 200)
-        rows.append((nombre, stock))
-    return rows
-
-def generate_fake_makis(num_rows: int) -> list[tuple]:
-    nombres_makis = [
-        "California Roll", "Acevichado", "Philadelphia Roll",
-        "Dragon Roll", "Spicy Tuna Roll", "Salmon Roll",
-        "Eel Roll", "Crab Roll", "Tempura Roll", "Rainbow Roll"
-    ]
-    
-    descripciones = [
-        "Maki clásico con palta, cangrejo y pepino",
-        "Maki relleno de pescado y cubierto con salsa acevichada", 
-        "Maki con salmón y queso crema",
-        "Maki especial con ingredientes premium",
-        "Maki picante con atún fresco",
-        "Maki tradicional con salmón",
-        "Maki con anguila y salsa especial",
-        "Maki de cangrejo con mayonesa",
-        "Maki frito con tempura",
-        "Maki colorido con múltiples ingredientes"
-    ]
-    
-    rows: list[tuple] = []
-    for i in range(1, num_rows + 1):
-        nombre = f"{random.choice(nombres_makis)} {i}"
-        descripcion = random.choice(descripciones)
-        precio = round(random.uniform(15.50, 35.99), 2)
-        rows.append((nombre, descripcion, precio))
-    return rows
-
-def generate_fake_maki_ingredientes(num_makis: int, num_ingredientes: int) -> list[tuple]:
-    rows: list[tuple] = []
-    for maki_id in range(1, num_makis + 1):
-        # Cada maki tendrá entre 2-5 ingredientes
-        num_ingredientes_por_maki = random.randint(2, 5)
-        ingredientes_usados = set()
-        
-        for _ in range(num_ingredientes_por_maki):
-            ingrediente_id = random.randint(1, num_ingredientes)
-            if ingrediente_id not in ingredientes_usados:
-                ingredientes_usados.add(ingrediente_id)
-                rows.append((maki_id, ingrediente_id))
-    return rows
-
-
-def seed_postgres(conn, num_rows: int) -> int:
+def generate_fake_maki_ingredientes(maki_ids: list[int], ingrediente_ids: list[int]) -> Iterator[tuple]:
+    # Depende de los ids reales, por eso no sale de common.synthetic; misma semilla
+    rng = random.Random(synthetic.SEED)
+    for maki_id in maki_ids:
+        # Cada maki tendrá entre 2-5 ingredientes distintos
+        num_ingredientes_por_maki = min(rng.randint(2, 5), len(ingrediente_ids))
+        for ingrediente_id in rng.sample(ingrediente_ids, num_ingredientes_por_maki):
+            yield (maki_id, ingrediente_id)
+
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+class CopyStream:
+    """Adapta un iterable de tuplas al archivo que lee copy_expert, en formato
+    texto de COPY. Las filas se generan a medida que Postgres las consume."""
+
+    def __init__(self, rows: Iterable[tuple]):
+        self._rows = iter(rows)
+        self._pending = b""
+        self.rows = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunks, total = [self._pending], len(self._pending)
+        while size < 0 or total < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            line = "\t".join("\\N" if v is None else str(v).translate(_COPY_ESCAPES) for v in row) + "\n"
+            chunk = line.encode("utf-8")
+            chunks.append(chunk)
+            total += len(chunk)
+            self.rows += 1
+        data = b"".join(chunks)
+        if size < 0:
+            self._pending = b""
+            return data
+        self._pending = data[size:]
+        return data[:size]
+
+
+def copy_rows(cur, table: str, columns: tuple[str, ...], rows: Iterable[tuple]) -> int:
+    """COPY FROM STDIN en streaming; devuelve la cantidad de filas cargadas."""
+    stream = CopyStream(rows)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", stream, size=1 << 20)
+    return stream.rows
+
+
+def insert_returning_ids(cur, table: str, columns: tuple[str, ...], rows: Iterable[tuple],
+                         page_size: int = 5000) -> list[int]:
+    """INSERT multi-fila por páginas con RETURNING id: los ids reales
+    asignados por la secuencia, sin releer la tabla."""
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s RETURNING id"
+    rows, ids = iter(rows), []
+    while page := list(islice(rows, page_size)):
+        ids.extend(row[0] for row in execute_values(cur, sql, page, page_size=page_size, fetch=True))
+    return ids
+
+
+def _report(table: str, count: int, start: float) -> None:
+    elapsed = time.perf_counter() - start
+    print(f"  {table}: {count} rows in {elapsed:.2f}s ({count / elapsed if elapsed else 0:,.0f} rows/s)")
+
+
+def seed_postgres(conn, num_rows: int, num_ingredientes: int | None = None, num_makis: int | None = None) -> int:
+    num_ingredientes = num_ingredientes or min(num_rows, 100)
+    num_makis = num_makis or min(num_rows, 50)
+
     with conn.cursor() as cur:
         ensure_table(cur)
-        
+        # Es una carga descartable: no esperar el fsync del WAL en el commit
+        cur.execute("SET LOCAL synchronous_commit = off")
+
         # Limpiar tablas existentes
-        cur.execute("DELETE FROM maki_ingrediente")
-        cur.execute("DELETE FROM maki")
-        cur.execute("DELETE FROM ingrediente")
-        
-        # Insertar ingredientes
-        ingrediente_rows = generate_fake_ingredientes(min(num_rows, 100))
-        for row in ingrediente_rows:
-            cur.execute("INSERT INTO ingrediente (nombre, stock) VALUES (%s, %s)", row)
-        
-        # Obtener IDs de ingredientes insertados
-        cur.execute("SELECT id FROM ingrediente")
-        ingrediente_ids = [row[0] for row in cur.fetchall()]
-        
-        # Insertar makis
-        maki_rows = generate_fake_makis(min(num_rows, 50))
-        for row in maki_rows:
-            cur.execute("INSERT INTO maki (nombre, descripcion, precio) VALUES (%s, %s, %s)", row)
-        
-        # Obtener IDs de makis insertados
-        cur.execute("SELECT id FROM maki")
-        maki_ids = [row[0] for row in cur.fetchall()]
-        
-        # Insertar relaciones maki-ingrediente
-        maki_ingrediente_rows = generate_fake_maki_ingredientes(len(maki_ids), len(ingrediente_ids))
-        for row in maki_ingrediente_rows:
-            cur.execute("INSERT INTO maki_ingrediente (maki_id, ingrediente_id) VALUES (%s, %s)", row)
-        
+        cur.execute("TRUNCATE maki_ingrediente, maki, ingrediente RESTART IDENTITY")
+
+        start = time.perf_counter()
+        ingrediente_ids = insert_returning_ids(cur, "ingrediente", ("nombre", "stock"),
+                                               synthetic.rows("ingredientes", num_ingredientes))
+        _report("ingrediente", len(ingrediente_ids), start)
+
+        start = time.perf_counter()
+        maki_ids = insert_returning_ids(cur, "maki", ("nombre", "descripcion", "precio"),
+                                        synthetic.rows("makis", num_makis))
+        _report("maki", len(maki_ids), start)
+
+        # La tabla grande (2-5 filas por maki) va por COPY
+        start = time.perf_counter()
+        relations = copy_rows(cur, "maki_ingrediente", ("maki_id", "ingrediente_id"),
+                              generate_fake_maki_ingredientes(maki_ids, ingrediente_ids))
+        _report("maki_ingrediente", relations, start)
+
     conn.commit()
-    return len(ingrediente_rows) + len(maki_rows) + len(maki_ingrediente_rows)
+    return len(ingrediente_ids) + len(maki_ids) + relations
+
+
+MAKIS_QUERY = """
+    SELECT 
+        m.id as maki_id,
+        m.nombre as maki_nombre,
+        m.descripcion as maki_descripcion,
+        m.precio as maki_precio,
+        i.id as ingrediente_id,
+        i.nombre as ingrediente_nombre,
+        i.stock as ingrediente_stock,
+        mi.maki_id,
+        mi.ingrediente_id
+    FROM maki m
+    JOIN maki_ingrediente mi ON m.id = mi.maki_id
+    JOIN ingrediente i ON mi.ingrediente_id = i.id
+    {where}
+    ORDER BY m.id, i.id
+"""
+EXPORT_QUERY = f"SELECT row_to_json(t) FROM ({MAKIS_QUERY}) t"
+
+# Tipos de MAKIS_QUERY para la salida columnar
+MAKIS_COLUMNS = [
+    ("maki_id", "int32"),
+    ("maki_nombre", "string"),
+    ("maki_descripcion", "string"),
+    ("maki_precio", "decimal(10,2)"),
+    ("ingrediente_id", "int32"),
+    ("ingrediente_nombre", "string"),
+    ("ingrediente_stock", "int32"),
+]
+
+# Las tablas no tienen updated_at: se usa xmin (id de la transacción que
+# escribió la fila), que cambia con cada INSERT/UPDATE de maki, ingrediente o
+# la relación. Es de 32 bits, por eso se compara módulo 2^32.
+CHANGED_SINCE = """
+    WHERE m.xmin::text::bigint >= %(xid)s
+       OR mi.xmin::text::bigint >= %(xid)s
+       OR i.xmin::text::bigint >= %(xid)s
+"""
 
 
 def export_to_s3(conn, bucket: str, key_prefix: str) -> dict:
+    if OUTPUT_FORMAT != "json":
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(MAKIS_QUERY.format(where=""))
+            rows = cur.fetchall()
+        return write_partitioned(boto3.client("s3"), bucket, "postgres", rows, MAKIS_COLUMNS)
+
     json_lines = []
     
     with conn.cursor() as cur:
         # Exportar datos con JOIN para obtener información completa de makis con sus ingredientes
-        cur.execute("""
-            SELECT row_to_json(t) FROM (
-                SELECT 
-                    m.id as maki_id,
-                    m.nombre as maki_nombre,
-                    m.descripcion as maki_descripcion,
-                    m.precio as maki_precio,
-                    i.id as ingrediente_id,
-                    i.nombre as ingrediente_nombre,
-                    i.stock as ingrediente_stock,
-                    mi.maki_id,
-                    mi.ingrediente_id
-                FROM maki m
-                JOIN maki_ingrediente mi ON m.id = mi.maki_id
-                JOIN ingrediente i ON mi.ingrediente_id = i.id
-                ORDER BY m.id, i.id
-            ) t
-        """)
+        cur.execute(EXPORT_QUERY.format(where=""))
         for row in cur.fetchall():
             json_lines.append(json.dumps(row[0], default=str))
 
@@ -149,8 +185,33 @@ def export_to_s3(conn, bucket: str, key_prefix: str) -> dict:
     return {"bucket": bucket, "key": key, "records": len(json_lines)}
 
 
+def fetch_changed_makis(conn, watermark: dict | None) -> tuple[list[str], dict]:
+    json_lines = []
+    # Lectura y watermark en el mismo snapshot: toda transacción con id menor
+    # al xmin del snapshot ya terminó, así que ese es el próximo punto de partida.
+    # Las que estaban en curso se vuelven a exportar la próxima vez (duplicados,
+    # nunca huecos); los DELETE no se capturan.
+    conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT txid_snapshot_xmin(txid_current_snapshot()) % 4294967296")
+            next_xid = cur.fetchone()[0]
+            last_xid = (watermark or {}).get("xid")
+            if last_xid is None or next_xid < last_xid:
+                # Primera corrida o wraparound del contador: export completo
+                cur.execute(EXPORT_QUERY.format(where=""))
+            else:
+                cur.execute(EXPORT_QUERY.format(where=CHANGED_SINCE), {"xid": last_xid})
+            for row in cur:
+                json_lines.append(json.dumps(row[0], default=str))
+    finally:
+        conn.rollback()  # solo lectura: cierra la transacción del snapshot
+        conn.set_session(isolation_level="DEFAULT", readonly="DEFAULT")
+    return json_lines, {"xid": next_xid}
+
+
 def main() -> None:
-    mode = os.getenv("MODE", "seed_and_export")  # seed | export | seed_and_export
+    mode = os.getenv("MODE", "seed_and_export")  # seed | export | seed_and_export | incremental | compact
 
     host = get_env("DB_HOST")
     port = int(get_env("DB_PORT", "5432"))
@@ -161,12 +222,18 @@ def main() -> None:
     s3_bucket = os.getenv("S3_BUCKET")
     s3_prefix = os.getenv("S3_PREFIX", "postgres/ingredientes")
     num_rows = int(os.getenv("FAKE_COUNT", "20000"))
+    # Por defecto 100 ingredientes y 50 makis; subirlos para pruebas de carga
+    # del servicio Menu (p.ej. SEED_MAKIS=1000000 da ~3.5M filas de relación)
+    num_ingredientes = int(os.getenv("SEED_INGREDIENTES", "0")) or None
+    num_makis = int(os.getenv("SEED_MAKIS", "0")) or None
 
     conn = psycopg2.connect(host=host, port=port, user=user, password=password, dbname=database)
 
     if mode in ("seed", "seed_and_export"):
-        inserted = seed_postgres(conn, num_rows)
-        print(f"Seeded PostgreSQL: inserted {inserted} rows")
+        start = time.perf_counter()
+        inserted = seed_postgres(conn, num_rows, num_ingredientes, num_makis)
+        elapsed = time.perf_counter() - start
+        print(f"Seeded PostgreSQL: inserted {inserted} rows in {elapsed:.2f}s ({inserted / elapsed:,.0f} rows/s)")
 
     if mode in ("export", "seed_and_export"):
         if not s3_bucket:
@@ -174,6 +241,22 @@ def main() -> None:
         result = export_to_s3(conn, s3_bucket, s3_prefix)
         print(f"Exported to s3://{result['bucket']}/{result['key']} ({result['records']} records)")
 
+    if mode in ("incremental", "compact") and not s3_bucket:
+        raise RuntimeError(f"S3_BUCKET is required for {mode}")
+
+    if mode == "incremental":
+        result = export_incremental("postgres", s3_bucket, lambda watermark: fetch_changed_makis(conn, watermark))
+        target = f"s3://{result['bucket']}/{result['key']}" if result["key"] else "nothing new"
+        print(f"Exported {result['records']} changed records: {target} (watermark {result['watermark']})")
+
+    if mode == "compact":
+        result = compact("postgres", s3_bucket, ("maki_id", "ingrediente_id"))
+        if result["deltas"]:
+            print(f"Compacted {result['deltas']} deltas into s3://{result['bucket']}/{result['key']} "
+                  f"({result['records']} records)")
+        else:
+            print("Nothing to compact")
+
     conn.close()
 
 
@@ -0,0 +1,162 @@
+"""Tamaño y tiempo de scan: NDJSON contra Parquet (zstd/snappy) y ORC.
+
+Escribe el mismo dataset en cada formato en un directorio temporal y mide
+tres consultas típicas de Athena: count(*), agregado por una columna y un
+filtro selectivo. Con DuckDB instalado se usa para JSON y Parquet (como un
+motor SQL real); si no, pyarrow. ORC siempre se lee con pyarrow.
+
+    python scripts/bench_formats.py --rows 500000
+    python scripts/bench_formats.py --input mysql_2024010112.json --group-by status --sum total_price
+
+--input acepta un export NDJSON bajado de S3 (tipos inferidos por pyarrow);
+sin --input se generan órdenes sintéticas con tipos Decimal/timestamp.
+Requiere pyarrow (y opcionalmente duckdb).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as pa_json
+import pyarrow.parquet as pq
+from pyarrow import orc
+from common.columnar import ROW_GROUP_SIZE, arrow_schema
+
+SYNTHETIC_COLUMNS = [
+    ("id", "int32"),
+    ("user_id", "int32"),
+    ("product_id", "int32"),
+    ("status", "string"),
+    ("order_date", "timestamp"),
+    ("total_price", "decimal(10,2)"),
+    ("payment_method", "string"),
+]
+
+
+def synthetic_orders(num_rows):
+    statuses = ['pending', 'confirmed', 'preparing', 'delivered', 'cancelled']
+    payment_methods = ['cash', 'card', 'transfer']
+    now = datetime.utcnow()
+    for i in range(1, num_rows + 1):
+        yield {
+            "id": i,
+            "user_id": random.randint(1, 1000),
+            "product_id": random.randint(1, 500),
+            "status": random.choice(statuses),
+            "order_date": now - timedelta(seconds=random.randint(0, 30 * 86400)),
+            "total_price": Decimal(f"{random.uniform(15.99, 35.99):.2f}"),
+            "payment_method": random.choice(payment_methods),
+        }
+
+
+def load_table(args, workdir):
+    """(tabla arrow, ruta del NDJSON) desde --input o sintético."""
+    if args.input:
+        return pa_json.read_json(args.input), args.input
+    rows = list(synthetic_orders(args.rows))
+    path = os.path.join(workdir, "data.json")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(json.dumps(row, default=str) for row in rows))
+    return pa.Table.from_pylist(rows, schema=arrow_schema(SYNTHETIC_COLUMNS)), path
+
+
+def write_formats(table, json_path, workdir):
+    paths = {"ndjson": json_path}
+    for codec in ("zstd", "snappy"):
+        paths[f"parquet-{codec}"] = os.path.join(workdir, f"data.{codec}.parquet")
+        pq.write_table(table, paths[f"parquet-{codec}"], compression=codec, row_group_size=ROW_GROUP_SIZE)
+    paths["orc-zstd"] = os.path.join(workdir, "data.orc")
+    orc.write_table(table, paths["orc-zstd"], compression="zstd")
+    return paths
+
+
+def _duckdb_queries(fmt, path, group_by, total, filter_value):
+    import duckdb
+
+    source = f"read_json_auto('{path}', format='newline_delimited')" if fmt == "ndjson" else f"read_parquet('{path}')"
+    return [
+        lambda: duckdb.sql(f"SELECT count(*) FROM {source}").fetchall(),
+        # Los exportadores escriben los Decimal como string en el NDJSON
+        lambda: duckdb.sql(f"SELECT {group_by}, sum(CAST({total} AS DOUBLE)) FROM {source} GROUP BY 1").fetchall(),
+        lambda: duckdb.sql(f"SELECT count(*) FROM {source} WHERE {group_by} = '{filter_value}'").fetchall(),
+    ]
+
+
+def _arrow_queries(fmt, path, group_by, total, filter_value):
+    def read(columns=None, value=None):
+        if fmt.startswith("parquet"):
+            filters = [(group_by, "==", value)] if value is not None else None
+            return pq.read_table(path, columns=columns, filters=filters)
+        if fmt == "ndjson":
+            # JSON no tiene proyección: siempre se parsea el archivo entero
+            table = pa_json.read_json(path)
+        else:
+            table = orc.read_table(path, columns=columns)
+        return table.filter(pc.field(group_by) == value) if value is not None else table
+
+    def group():
+        table = read([group_by, total])
+        if pa.types.is_string(table[total].type):
+            # Los exportadores escriben los Decimal como string en el NDJSON
+            table = table.set_column(table.schema.get_field_index(total), total,
+                                     pc.cast(table[total], pa.float64()))
+        return table.group_by(group_by).aggregate([(total, "sum")])
+
+    return [
+        lambda: read([group_by]).num_rows,
+        group,
+        lambda: read([group_by], filter_value).num_rows,
+    ]
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", help="export NDJSON existente (por defecto, órdenes sintéticas)")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--group-by", default="status")
+    parser.add_argument("--sum", dest="total", default="total_price")
+    parser.add_argument("--filter", default="cancelled", help="valor de --group-by para el filtro selectivo")
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    try:
+        import duckdb  # noqa: F401
+        engine = "duckdb"
+    except ImportError:
+        engine = "pyarrow"
+
+    with tempfile.TemporaryDirectory() as workdir:
+        table, json_path = load_table(args, workdir)
+        paths = write_formats(table, json_path, workdir)
+        print(f"{table.num_rows} filas, motor {engine} (ORC con pyarrow)")
+        print(f"{'formato':<16} {'MB':>8} {'ratio':>6} {'count ms':>9} {'group ms':>9} {'filtro ms':>10}")
+        json_size = os.path.getsize(json_path)
+        for fmt, path in paths.items():
+            build = _duckdb_queries if engine == "duckdb" and not fmt.startswith("orc") else _arrow_queries
+            queries = build(fmt, path, args.group_by, args.total, args.filter)
+            timings = [best_of(query, args.repeat) for query in queries]
+            size = os.path.getsize(path)
+            print(f"{fmt:<16} {size / 1e6:>8.2f} {json_size / size:>5.1f}x "
+                  f"{timings[0]:>9.1f} {timings[1]:>9.1f} {timings[2]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
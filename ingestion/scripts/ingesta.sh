@@ -18,6 +18,9 @@ set -euo pipefail
 #   PG_DB                default menu
 #   PG_USER              default postgres
 #   PG_PASSWORD          default utec
+#   INCREMENTAL          true = solo filas nuevas/cambiadas desde el último
+#                        watermark (exportadores Python, MODE=incremental)
+#   COMPACT              true = fundir los deltas en snapshots (MODE=compact)
 
 timestamp_path() {
   date +%Y%m%d%H
@@ -45,6 +48,30 @@ require_env S3_BUCKET
 : "${PG_USER:=postgres}"
 : "${PG_PASSWORD:=utec}"
 
+INGESTION_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+# Incremental y compactación usan los exportadores Python, que guardan el
+# watermark en s3://$S3_BUCKET/<fuente>/_state/
+run_python_exporters() {
+  local mode="$1" mongo_uri="$MONGO_URI"
+  export PYTHONPATH="$INGESTION_DIR${PYTHONPATH:+:$PYTHONPATH}" MODE="$mode" S3_BUCKET
+  echo "MongoDB ($mode)..."
+  # Separar host y base antes de reasignar MONGO_URI (se expande de izquierda a derecha)
+  MONGO_URI="${mongo_uri%/*}" MONGO_DB="${mongo_uri##*/}" python3 "$INGESTION_DIR/mongodb/app.py"
+  echo "MySQL ($mode)..."
+  DB_HOST="$MYSQL_HOST" DB_PORT="$MYSQL_PORT" DB_USER="$MYSQL_USER" DB_PASSWORD="$MYSQL_PASSWORD" DB_NAME="$MYSQL_DB" \
+    python3 "$INGESTION_DIR/mysql/app.py"
+  echo "PostgreSQL ($mode)..."
+  DB_HOST="$PG_HOST" DB_PORT="$PG_PORT" DB_USER="$PG_USER" DB_PASSWORD="$PG_PASSWORD" DB_NAME="$PG_DB" \
+    python3 "$INGESTION_DIR/postgres/app.py"
+}
+
+if [[ "${INCREMENTAL:-false}" == "true" || "${COMPACT:-false}" == "true" ]]; then
+  [[ "${INCREMENTAL:-false}" == "true" ]] && run_python_exporters incremental
+  [[ "${COMPACT:-false}" == "true" ]] && run_python_exporters compact
+  exit 0
+fi
+
 OUT_DIR="/tmp"
 TS=$(timestamp_path)
 